@@ -0,0 +1,115 @@
+import argparse
+import threading
+from contextlib import contextmanager
+
+# Admission control: saat server kelebihan beban, request ditolak cepat dengan status BUSY
+# dan retry_after (detik) alih-alih ditumpuk tanpa batas di antrean executor.
+#   max_pending  batas request yang menunggu diproses (engine thread: antrean executor,
+#                engine asyncio: request yang sedang berjalan), 0 = tanpa batas
+#   limits       batas request bersamaan per perintah, misalnya {"UPLOAD": 8} sehingga upload besar
+#                tidak memakai semua worker dan LIST/GET kecil tetap dilayani.
+#                Perintah protokol lama memakai batas yang sama (LEGACY_UPLOAD dihitung sebagai UPLOAD)
+DEFAULT_BACKLOG = 128
+DEFAULT_MAX_PENDING = 256
+DEFAULT_RETRY_AFTER = 1.0
+
+
+class ServerBusy(Exception):
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+    def response(self):
+        return {"status": "BUSY", "data": str(self), "retry_after": self.retry_after}
+
+
+# Slot satu request pada batas per perintah (command None = perintah tanpa batas). keep() menahan slot
+# setelah blok limit() selesai, misalnya body GET yang dikirim SendScheduler; dilepas dengan release()
+class AdmissionSlot:
+    def __init__(self, admission, command):
+        self.admission = admission
+        self.command = command
+        self.kept = False
+
+    def keep(self):
+        self.kept = True
+        return self
+
+    def release(self):
+        if self.command is not None:
+            self.admission.release(self.command)
+            self.command = None
+
+
+class AdmissionControl:
+    def __init__(self, max_pending=DEFAULT_MAX_PENDING, limits=None, retry_after=DEFAULT_RETRY_AFTER):
+        self.lock = threading.Lock()
+        self.max_pending = max_pending
+        self.limits = {command.upper(): limit for command, limit in (limits or {}).items()}
+        self.retry_after = retry_after
+        self.pending = 0
+        self.active = dict.fromkeys(self.limits, 0)
+        self.rejected = {}  # "QUEUE" atau nama perintah -> jumlah request yang ditolak
+
+    # retry_after membesar seiring penuhnya antrean supaya client yang ditolak tidak kembali bersamaan
+    def busy(self, reason):
+        load = self.pending / self.max_pending if self.max_pending else 0
+        return ServerBusy(reason, round(self.retry_after * (1 + load), 3))
+
+    def reject(self, key, reason):
+        self.rejected[key] = self.rejected.get(key, 0) + 1
+        return self.busy(reason)
+
+    # Masuk antrean, ServerBusy bila antrean penuh; pasangannya leave()
+    def enter(self):
+        with self.lock:
+            if self.max_pending and self.pending >= self.max_pending:
+                raise self.reject("QUEUE", f"Server busy, {self.pending} requests pending")
+            self.pending += 1
+
+    def leave(self):
+        with self.lock:
+            self.pending -= 1
+
+    # Ambil slot batas per perintah, ServerBusy bila sudah penuh
+    def acquire(self, command):
+        if command.startswith("LEGACY_"):
+            command = command[len("LEGACY_"):]
+        limit = self.limits.get(command)
+        if limit is None:
+            return AdmissionSlot(self, None)
+        with self.lock:
+            if self.active[command] >= limit:
+                raise self.reject(command, f"Server busy, {command} limited to {limit} concurrent requests")
+            self.active[command] += 1
+        return AdmissionSlot(self, command)
+
+    def release(self, command):
+        with self.lock:
+            self.active[command] -= 1
+
+    @contextmanager
+    def limit(self, command):
+        slot = self.acquire(command)
+        try:
+            yield slot
+        finally:
+            if not slot.kept:
+                slot.release()
+
+    def stats(self):
+        with self.lock:
+            return {"pending": self.pending, "max_pending": self.max_pending, "limits": dict(self.limits),
+                    "active": dict(self.active), "rejected": dict(self.rejected)}
+
+
+# Tipe argparse untuk --limit CMD=N
+def parse_limit(value):
+    command, _, limit = value.partition("=")
+    try:
+        limit = int(limit)
+    except ValueError:
+        limit = 0
+    if not command or limit < 1:
+        raise argparse.ArgumentTypeError(f"Invalid limit {value}, expected CMD=N with N >= 1")
+    return command.upper(), limit
@@ -0,0 +1,162 @@
+import os
+import asyncio
+import logging
+from transport_ets import MAGIC, NotBinaryError, AsyncConnectionPool, encode_header, read_json_body
+from compression_ets import StreamDecoder, available_codecs
+from checksum_ets import StreamChecksum, checksum_for, split_checksum
+from fileclient_ets import (DEFAULT_TIMEOUT, DEFAULT_MAX_RETRIES, BUSY_MAX_RETRIES, RETRYABLE_ERRORS, backoff_delay,
+                            busy_delay, error_result, list_header, part_path, remove_quietly, trailer_frame,
+                            read_hashed, write_hashed, upload_header)
+
+# Versi asyncio dari FileClient (lihat fileclient_ets): API, retry dan checksum sama, semua method coroutine.
+# timeout berlaku per langkah jaringan (connect, header, setiap potongan body), bukan untuk seluruh
+# transfer, sehingga file besar tetap bisa diunduh selama datanya terus mengalir
+class AsyncFileClient:
+    def __init__(self, host='127.0.0.1', port=8686, timeout=DEFAULT_TIMEOUT, max_retries=DEFAULT_MAX_RETRIES,
+                 max_connections=100, compression=True, checksum=None):
+        self.address = (host, port)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.compression = compression
+        self.checksum = checksum and split_checksum(checksum)[0]
+        self.pool = AsyncConnectionPool(self.address, max_connections=max_connections, timeout=timeout)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.pool.close()
+
+    async def list(self, prefix="", pattern=None, limit=None, after=None, detail=False):
+        return await self.request(list_header(prefix, pattern, limit, after, detail))
+
+    async def delete(self, name):
+        return await self.request({'cmd': 'DELETE', 'name': name})
+
+    async def stats(self):
+        return await self.request({'cmd': 'STATS'})
+
+    async def put(self, path, name=None):
+        return await self.request(upload_header(path, name, self.checksum), upload_path=path)
+
+    async def get(self, name, path=None):
+        header = {'cmd': 'GET', 'name': name}
+        if self.compression:
+            header['accept'] = available_codecs()
+        return await self.request(header, download_path=path or os.path.basename(name))
+
+    async def request(self, header, upload_path=None, download_path=None):
+        attempt = busy_retries = 0
+        while True:
+            try:
+                hasil = await self.exchange(header, upload_path, download_path)
+            except NotBinaryError as e:
+                return error_result(e)
+            except RETRYABLE_ERRORS as e:
+                attempt += 1
+                if attempt >= self.max_retries:
+                    logging.warning(f"{header['cmd']} failed after {attempt} attempts: {e!r}")
+                    return error_result(e)
+                await asyncio.sleep(backoff_delay(attempt - 1))
+                continue
+            if hasil['status'] != 'BUSY' or busy_retries >= BUSY_MAX_RETRIES:
+                return hasil
+            busy_retries += 1
+            await asyncio.sleep(busy_delay(hasil))
+
+    async def exchange(self, header, upload_path=None, download_path=None):
+        while True:
+            connection = await self.pool.acquire()
+            try:
+                hasil = await self.exchange_on(connection, header, upload_path, download_path)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                self.pool.discard(connection)
+                if connection.reused:
+                    continue
+                raise
+            except BaseException:
+                self.pool.discard(connection)
+                raise
+            if hasil['status'] == 'BUSY':
+                self.pool.discard(connection)
+            else:
+                self.pool.release(connection)
+            return hasil
+
+    async def step(self, awaitable):
+        return await asyncio.wait_for(awaitable, self.timeout)
+
+    async def exchange_on(self, connection, header, upload_path, download_path):
+        loop = asyncio.get_running_loop()
+        writer = connection.writer
+        try:
+            writer.write(encode_header(header))
+            if upload_path and header.get('checksum'):
+                await self.send_hashed(writer, upload_path, header['checksum'])
+            elif upload_path:
+                with open(upload_path, 'rb') as fp:
+                    await loop.sendfile(writer.transport, fp)
+            await self.step(writer.drain())
+        except OSError:
+            pass
+        reader = connection.reader
+        first = await self.step(reader.peek(len(MAGIC)))
+        if not first:
+            raise ConnectionError("Connection closed by server")
+        if first != MAGIC:
+            raise NotBinaryError("Server does not support binary frames")
+        hasil = await self.step(reader.read_frame_header())
+        chunks = reader.iter_exact(int(hasil.get('size', 0)))
+        if hasil.get('content') == 'json':
+            body = bytearray()
+            while True:
+                chunk = await self.next_chunk(chunks)
+                if chunk is None:
+                    return read_json_body(hasil, body)
+                body += chunk
+        if download_path is None or hasil['status'] != 'OK':
+            while await self.next_chunk(chunks) is not None:
+                pass
+            return hasil
+        decoder = StreamDecoder(hasil['encoding']) if hasil.get('encoding') else None
+        checksum = checksum_for(hasil.get('checksum'))
+        temp_path = part_path(download_path, id(asyncio.current_task()))
+        try:
+            with open(temp_path, 'wb') as fp:
+                while True:
+                    chunk = await self.next_chunk(chunks)
+                    if chunk is None:
+                        break
+                    data = b"".join(decoder.feed(chunk)) if decoder else chunk
+                    await loop.run_in_executor(None, write_hashed, fp, checksum, data)
+                if decoder:
+                    write_hashed(fp, checksum, b"".join(decoder.finish()))
+            if checksum is not None:
+                checksum.verify(hasil['checksum'], download_path)
+            os.replace(temp_path, download_path)
+        finally:
+            remove_quietly(temp_path)
+        hasil['size'] = hasil.get('total', hasil.get('size', 0))
+        return hasil
+
+    # Isi file dibaca dan di-hash di thread pool lalu ditulis ke socket, diakhiri frame trailer
+    async def send_hashed(self, writer, path, algorithm):
+        loop = asyncio.get_running_loop()
+        checksum = StreamChecksum(algorithm)
+        with open(path, 'rb') as fp:
+            while True:
+                chunk = await loop.run_in_executor(None, read_hashed, fp, checksum)
+                if not chunk:
+                    break
+                writer.write(chunk)
+                await self.step(writer.drain())
+        writer.write(trailer_frame(checksum.value(algorithm)))
+
+    async def next_chunk(self, chunks):
+        try:
+            return await self.step(anext(chunks))
+        except StopAsyncIteration:
+            return None
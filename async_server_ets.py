@@ -0,0 +1,453 @@
+import asyncio
+import json
+import base64
+import logging
+import os
+import socket
+from time import perf_counter
+from concurrent.futures import ThreadPoolExecutor
+from server_ets import FileServer
+from compression_ets import StreamDecoder
+from metrics_ets import set_command, add_phase, record_send
+from admission_ets import ServerBusy
+from checksum_ets import StreamChecksum, ChecksumMismatch, verify_checksum
+from scheduler_ets import QUANTUM
+from parser_ets import parse_stream_async
+from transport_ets import (MAGIC, TERMINATOR, BASE64_CHUNK_SIZE, ProtocolError, Base64StreamDecoder,
+                           AsyncReader, encode_header, json_body)
+
+
+async def decode_base64_async(chunks):
+    decoder = Base64StreamDecoder()
+    async for chunk in chunks:
+        started = perf_counter()
+        decoded = decoder.feed(chunk)
+        add_phase("decode", perf_counter() - started)
+        if decoded:
+            yield decoded
+    decoded = decoder.flush()
+    if decoded:
+        yield decoded
+
+
+# Engine asyncio: satu event loop melayani semua koneksi, I/O disk yang blocking
+# dilempar ke pool thread kecil sehingga jumlah koneksi tidak dibatasi jumlah worker.
+# Dengan storage di-shard, I/O milik satu file berjalan di pool shard-nya (lihat ShardedStorage)
+class AsyncFileServer(FileServer):
+    def __init__(self, host='0.0.0.0', port=8686, io_workers=4, **kwargs):
+        super().__init__(host=host, port=port, workers=io_workers, **kwargs)
+        self.io_pool = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="io")
+
+    def io_pool_for(self, name):
+        if name is not None and self.storage.sharded:
+            try:
+                return self.storage.pool(name)
+            except (ValueError, TypeError):
+                pass  # nama tidak valid, ditolak oleh func sendiri
+        return self.io_pool
+
+    # Waktu tunggu operasi di pool I/O dicatat ke fase phase (default disk) milik request saat ini.
+    # name: file yang disentuh func, menentukan pool shard
+    async def run_io(self, func, *args, phase="disk", name=None):
+        self.metrics.adjust("io_inflight", 1)
+        started = perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.io_pool_for(name), func, *args)
+        finally:
+            add_phase(phase, perf_counter() - started)
+            self.metrics.adjust("io_inflight", -1)
+
+    async def write_all(self, writer, data):
+        started = perf_counter()
+        writer.write(data)
+        await writer.drain()
+        record_send(len(data), perf_counter() - started)
+
+    async def send_frame(self, writer, header, body=b""):
+        header.setdefault("size", len(body))
+        await self.write_all(writer, encode_header(header) + body)
+
+    async def send_legacy(self, writer, response):
+        await self.write_all(writer, json.dumps(response).encode() + b"\r\n\r\n")
+
+    # Event loop sudah menggilir pengiriman antar koneksi; dengan batas bandwidth body besar (>= bulk_size)
+    # dikirim per quantum setelah kuotanya tersedia, body kecil hanya dicatat ke kuota (lihat scheduler_ets)
+    async def send_body(self, writer, fp, offset, size):
+        bulk = size >= self.bulk_size
+        client = writer.get_extra_info("peername", ("",))[0] if self.shaper.active else None
+        if not hasattr(fp, "segments"):
+            await self.send_range(writer, fp, offset, size, client, bulk)
+            return
+        # File dari storage dedup: tiap chunk dikirim dengan sendfile dari file chunk-nya
+        for path, segment_offset, length in fp.segments(offset, size):
+            segment = await self.run_io(open, path, 'rb')
+            try:
+                await self.send_range(writer, segment, segment_offset, length, client, bulk)
+            finally:
+                await self.run_io(segment.close)
+
+    async def send_range(self, writer, fp, offset, size, client, bulk):
+        loop = asyncio.get_running_loop()
+        step = QUANTUM if bulk and self.shaper.active else max(size, 1)
+        for start in range(offset, offset + size, step):
+            length = min(step, offset + size - start)
+            await self.pace(client, length, bulk)
+            started = perf_counter()
+            await loop.sendfile(writer.transport, fp, start, length)
+            record_send(length, perf_counter() - started)
+
+    async def pace(self, client, size, bulk):
+        if not self.shaper.active:
+            return
+        if not bulk:
+            self.shaper.charge(client, size)
+            return
+        delay = self.shaper.delay(client, size)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    # GET biner: header lalu isi file via loop.sendfile (zero-copy bila transport mendukung)
+    async def send_file(self, writer, filename, offset=0, length=None, accept=None):
+        fp, stat = await self.run_io(self.open_file, filename, name=filename)
+        if fp is None:
+            await self.send_frame(writer, {"status": "ERROR", "data": f"File {filename} not found"})
+            return False
+        try:
+            total = stat.st_size
+            size = self.range_size(total, offset, length)
+            if size is None:
+                await self.send_frame(writer, {"status": "ERROR", "data": f"Invalid range {offset}+{length} for {filename}"})
+                return False
+            compressed = await self.run_io(self.compressed_body, filename, fp, stat, accept, offset, length,
+                                           phase="decode", name=filename)
+            checksum = self.stored_checksum(filename, fp, stat) if size == total else None
+            if compressed is not None:
+                blob, codec, blob_size = compressed
+                try:
+                    await self.send_frame(writer, {"status": "OK", "data_namafile": filename, "size": blob_size,
+                                                   "offset": 0, "total": total, "encoding": codec,
+                                                   "checksum": checksum})
+                    await self.send_body(writer, blob, 0, blob_size)
+                finally:
+                    await self.run_io(blob.close)
+                return True
+            await self.send_frame(writer, {"status": "OK", "data_namafile": filename, "size": size,
+                                           "offset": offset, "total": total, "checksum": checksum})
+            if size:
+                await self.send_body(writer, fp, offset, size)
+        finally:
+            await self.run_io(fp.close)
+        return True
+
+    # Nilai checksum dari client berupa fungsi async: langsung dari header atau dibaca dari frame trailer
+    def client_checksum(self, header, reader, trailer=True):
+        algorithm, value = self.requested_checksum(header, trailer)
+        if algorithm is None:
+            return None, None
+
+        async def expected():
+            return value or (await reader.read_frame_header()).get("checksum")
+        return algorithm, expected
+
+    @staticmethod
+    def write_chunk(fd, checksum, chunk, offset):
+        checksum.update(chunk)
+        os.pwrite(fd, chunk, offset)
+
+    async def receive_chunk(self, reader, header):
+        algorithm, expected = self.client_checksum(header, reader)
+        checksum = StreamChecksum(algorithm, "crc32")
+        fd, offset = await self.run_io(self.open_chunk, header)
+        try:
+            async for chunk in reader.iter_exact(int(header.get("size", 0))):
+                await self.run_io(self.write_chunk, fd, checksum, chunk, offset)
+                offset += len(chunk)
+        finally:
+            await self.run_io(os.close, fd)
+        if algorithm is not None:
+            try:
+                verify_checksum(await expected(), checksum.value(algorithm), header.get("name", ""))
+            except ChecksumMismatch as e:
+                return {"status": "ERROR", "data": str(e)}
+        return await self.run_io(self.finish_chunk, header, self.chunk_crc32(checksum))
+
+    def read_base64_chunk(self, fp):
+        chunk = fp.read(BASE64_CHUNK_SIZE)
+        return base64.b64encode(chunk) if chunk else b""
+
+    # GET protokol lama: baca + base64 per chunk di pool I/O, tulis bertahap ke socket
+    async def get_file(self, writer, filename):
+        fp, stat = await self.run_io(self.open_file, filename, name=filename)
+        if fp is None:
+            await self.send_legacy(writer, {"status": "ERROR", "data": f"File {filename} not found"})
+            return False
+        try:
+            chunks = await self.run_io(self.cached_base64, filename, fp, stat, phase="decode", name=filename)
+            client = writer.get_extra_info("peername", ("",))[0] if self.shaper.active else None
+            bulk = stat.st_size >= self.bulk_size
+            await self.write_all(writer, f'{{"status": "OK", "data_namafile": {json.dumps(filename)}, "data_file": "'.encode())
+            if chunks is not None:
+                for encoded in chunks:
+                    await self.pace(client, len(encoded), bulk)
+                    await self.write_all(writer, encoded)
+            while chunks is None:
+                encoded = await self.run_io(self.read_base64_chunk, fp, phase="decode", name=filename)
+                if not encoded:
+                    break
+                await self.pace(client, len(encoded), bulk)
+                await self.write_all(writer, encoded)
+            await self.write_all(writer, b'"}\r\n\r\n')
+        finally:
+            await self.run_io(fp.close)
+        return True
+
+    @staticmethod
+    def write_pieces(writer, checksum, pieces):
+        for piece in pieces:
+            checksum.update(piece)
+            writer.write(piece)
+
+    # Tulis chunk yang datang lewat writer backend di pool I/O, commit setelah body lengkap.
+    # Body dengan encoding didekompresi di pool I/O juga, bukan di event loop. Checksum dihitung
+    # bersamaan dengan penulisan, sama seperti FileServer.write_file
+    async def write_file(self, filename, chunks, encoding=None, algorithm=None, expected=None):
+        checksum = StreamChecksum(self.checksum_algorithm, algorithm)
+        writer = await self.run_io(self.storage.writer, filename, name=filename)
+        decoder = StreamDecoder(encoding) if encoding else None
+        try:
+            async for chunk in chunks:
+                if decoder is None:
+                    await self.run_io(self.write_pieces, writer, checksum, (chunk,), name=filename)
+                else:
+                    await self.run_io(self.write_pieces, writer, checksum, decoder.feed(chunk), phase="decode",
+                                      name=filename)
+            if decoder is not None:
+                await self.run_io(self.write_pieces, writer, checksum, decoder.finish(), phase="decode",
+                                  name=filename)
+            if expected is not None:
+                verify_checksum(await expected(), checksum.value(algorithm), filename)
+            written = await self.run_io(writer.commit, checksum.value(self.checksum_algorithm), name=filename)
+        except BaseException:
+            writer.abort()
+            raise
+        await self.run_io(self.file_changed, filename, checksum.value(self.checksum_algorithm), writer.inode,
+                          name=filename)
+        return written, checksum.value(algorithm or self.checksum_algorithm)
+
+    async def receive_file(self, reader, header):
+        filename = header.get("name", "")
+        algorithm, expected = self.client_checksum(header, reader)
+        try:
+            _, checksum = await self.write_file(filename, reader.iter_exact(int(header.get("size", 0))),
+                                                header.get("encoding"), algorithm, expected)
+        except ChecksumMismatch as e:
+            return {"status": "ERROR", "data": str(e)}
+        return {"status": "OK", "data": f"File {filename} uploaded successfully", "checksum": checksum}
+
+    async def send_files(self, writer, names, accept=None):
+        await self.send_frame(writer, {"status": "OK", "count": len(names)})
+        success = True
+        for name in names:
+            try:
+                success = await self.send_file(writer, name, accept=accept) and success
+            except ValueError as e:
+                await self.send_frame(writer, {"status": "ERROR", "data": str(e)})
+                success = False
+        return success
+
+    async def receive_files(self, reader, count):
+        results = []
+        for _ in range(self.batch_count(count)):
+            header = await reader.read_frame_header()
+            filename = header.get("name", "")
+            chunks = reader.iter_exact(int(header.get("size", 0)))
+            try:
+                algorithm, expected = self.client_checksum(header, reader, trailer=False)
+                _, checksum = await self.write_file(filename, chunks, header.get("encoding"), algorithm, expected)
+                results.append({"status": "OK", "data": f"File {filename} uploaded successfully", "checksum": checksum})
+            except Exception as e:
+                async for _ in chunks:
+                    pass
+                results.append({"status": "ERROR", "data": str(e)})
+        return results
+
+    async def send_results(self, writer, results):
+        data, success = self.batch_frames(results)
+        await self.write_all(writer, data)
+        return success
+
+    async def process_binary(self, reader, writer):
+        header = await reader.read_frame_header()
+        command = str(header.get("cmd", "")).upper()
+        set_command(command)
+        response_body = b""
+        with self.admission.limit(command):
+            if command == "CONFIG":
+                response = self.configure(header.get("mode"), int(header.get("workers", 0)))
+            elif command == "LIST":
+                response = self.list_files(**self.list_params(header))
+                response_body = json_body(response)
+            elif command == "GET":
+                length = header.get("length")
+                return await self.send_file(writer, header.get("name", ""), int(header.get("offset", 0)),
+                                            None if length is None else int(length), header.get("accept"))
+            elif command == "UPLOAD":
+                response = await self.receive_file(reader, header)
+            elif command == "CODECS":
+                response = self.capabilities()
+            elif command == "MGET":
+                return await self.send_files(writer, self.batch_names(header), header.get("accept"))
+            elif command == "MPUT":
+                return await self.send_results(writer, await self.receive_files(reader, int(header.get("count", 0))))
+            elif command == "MDELETE":
+                return await self.send_results(writer, await self.run_io(self.delete_files, self.batch_names(header)))
+            elif command == "DELETE":
+                response = await self.run_io(self.delete_file, header.get("name", ""), name=header.get("name"))
+            elif command == "STATS":
+                response = self.stats()
+                response_body = json_body(response)
+            elif command == "PUTCHUNK":
+                response = await self.receive_chunk(reader, header)
+            elif command == "UPLOAD_STATUS":
+                response = await self.run_io(self.upload_status, header)
+            elif command == "COMMIT":
+                response = await self.run_io(self.commit_upload, header, name=header.get("name"))
+            elif command in ("DEDUP_CHECK", "PUTBLOB", "PUTMANIFEST"):
+                body = b"".join([chunk async for chunk in reader.iter_exact(self.dedup_body_size(header))])
+                response = await self.run_io(self.process_dedup, command, header, body)
+            else:
+                response = {"status": "ERROR", "data": "Invalid command"}
+            await self.send_frame(writer, response, response_body)
+        return response["status"] == "OK"
+
+    async def process_legacy(self, reader, writer):
+        request = await parse_stream_async(reader.iter_until(TERMINATOR))
+        command, args = request.command, request.args
+        if command:
+            set_command(f"LEGACY_{command}")
+        if not command:
+            response = {"status": "ERROR", "data": "Empty command"}
+        else:
+            with self.admission.limit(command):
+                if command == "UPLOAD":
+                    filename = args[0]
+                    written, _ = await self.write_file(filename, decode_base64_async(request.body))
+                    logging.warning(f"Uploaded {filename}: {written} bytes ({written / (1024 * 1024):.2f}MB)")
+                    response = {"status": "OK", "data": f"File {filename} uploaded successfully"}
+                elif command == "CONFIG":
+                    response = self.configure(args[0], int(args[1]))
+                elif command == "LIST":
+                    response = self.list_files()
+                elif command == "GET":
+                    return await self.get_file(writer, args[0])
+                elif command == "DELETE":
+                    response = await self.run_io(self.delete_file, args[0], name=args[0])
+                elif command == "STATS":
+                    response = self.stats()
+                else:
+                    response = {"status": "ERROR", "data": "Invalid command"}
+        await self.send_legacy(writer, response)
+        return True
+
+    # Tanpa antrean executor, batas max_pending di engine ini berlaku untuk request yang sedang berjalan
+    async def process_admitted(self, reader, writer, binary):
+        self.admission.enter()
+        try:
+            if binary:
+                return await self.process_binary(reader, writer)
+            return await self.process_legacy(reader, writer)
+        finally:
+            self.admission.leave()
+
+    # Koneksi biner dilayani berulang (keep-alive + pipelining) sampai client menutup
+    # koneksi atau menganggur lebih lama dari keepalive_timeout; protokol lama satu request saja
+    async def handle_client(self, stream, writer):
+        client_address = writer.get_extra_info("peername")
+        # Socket dari my_socket (proto 0) tidak otomatis diberi TCP_NODELAY oleh asyncio; tanpa itu body
+        # kecil setelah header tertahan Nagle sampai delayed ACK (~40 ms) seperti di engine thread
+        writer.get_extra_info("socket").setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        logging.warning(f"Connection from {client_address}")
+        self.metrics.connection_opened()
+        reader = AsyncReader(stream)
+        binary = False
+        stats = self.metrics.begin()
+        try:
+            # Koneksi yang tidak pernah mengirim request ditutup setelah keepalive_timeout, sama seperti
+            # koneksi keep-alive yang menganggur (engine thread: IdleWatcher)
+            try:
+                first = await asyncio.wait_for(reader.peek(len(MAGIC)), self.keepalive_timeout)
+            except asyncio.TimeoutError:
+                return
+            binary = first == MAGIC
+            if not binary:
+                set_command("LEGACY")
+                success = await self.process_admitted(reader, writer, False)
+                self.metrics.finish(stats, success)
+                stats = None
+                self.record_result(success)
+                return
+            while first == MAGIC:
+                success = await self.process_admitted(reader, writer, True)
+                self.metrics.finish(stats, success)
+                self.record_result(success)
+                stats = self.metrics.begin()
+                try:
+                    first = await asyncio.wait_for(reader.peek(len(MAGIC)), self.keepalive_timeout)
+                except asyncio.TimeoutError:
+                    first = b""
+                    break
+                # Waktu menunggu request berikutnya (idle) tidak dihitung sebagai latency request
+                stats.started = perf_counter()
+                stats.phases["recv"] = 0.0
+            if first:
+                raise ProtocolError("Not a binary frame")
+        except ServerBusy as e:
+            # Body request (bila ada) belum dibaca, koneksi ditutup setelah BUSY
+            set_command("BUSY")
+            self.metrics.finish(stats, False)
+            stats = None
+            try:
+                if binary:
+                    await self.send_frame(writer, e.response())
+                else:
+                    await self.send_legacy(writer, e.response())
+            except (OSError, ConnectionError):
+                pass
+        except Exception as e:
+            logging.warning(f"Error processing client {client_address}: {str(e)}")
+            self.record_result(False)
+            if stats is not None:
+                self.metrics.finish(stats, False)
+                stats = None
+            try:
+                if binary:
+                    await self.send_frame(writer, {"status": "ERROR", "data": str(e)})
+                else:
+                    await self.send_legacy(writer, {"status": "ERROR", "data": str(e)})
+            except (OSError, ConnectionError):
+                pass
+        finally:
+            if stats is not None:
+                self.metrics.cancel()
+            self.metrics.connection_closed()
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (OSError, ConnectionError):
+                pass
+
+    async def serve(self):
+        self.bind()
+        server = await asyncio.start_server(self.handle_client, sock=self.my_socket, backlog=self.backlog)
+        logging.warning(f"Server listening on {self.host}:{self.port} with asyncio engine ({self.workers} I/O workers)")
+        async with server:
+            await server.serve_forever()
+
+    def run(self):
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            logging.warning("Server shutting down")
+        finally:
+            self.io_pool.shutdown(wait=False)
+            self.my_socket.close()
@@ -0,0 +1,335 @@
+import os
+import sys
+import csv
+import json
+import time
+import socket
+import signal
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+
+# Benchmark file server: menjalankan server lokal sendiri (subprocess), lalu menjalankan
+# stress_test dari client_ets untuk setiap kombinasi engine server, mode client, jumlah client,
+# ukuran file dan operasi. Hasil (latency p50/p95/p99, MB/s agregat, CPU dan RSS server)
+# ditulis ke CSV/JSON; --baseline membandingkan dengan hasil JSON sebelumnya.
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVER_SCRIPT = os.path.join(PACKAGE_DIR, "server_ets.py")
+RESULT_FIELDS = ["engine", "server_workers", "processes", "storage", "data", "mode", "concurrency", "operation",
+                 "size_mb", "repeat", "successful", "failed", "total_time", "latency_mean", "latency_p50",
+                 "latency_p95", "latency_p99", "aggregate_mb_s", "server_cpu_seconds", "server_cpu_percent",
+                 "server_rss_peak_mb"]
+# Kolom yang menentukan kombinasi yang sama saat dibandingkan dengan baseline
+KEY_FIELDS = ["engine", "server_workers", "processes", "storage", "data", "mode", "concurrency", "operation",
+              "size_mb"]
+
+
+# Pemakaian CPU dan memori server dari /proc (Linux), termasuk proses worker anak (--processes).
+# Di sistem tanpa /proc semua nilai None.
+class ProcessMonitor:
+    def __init__(self, pid, interval=0.1):
+        self.pid = pid
+        self.interval = interval
+        self.available = os.path.exists(f"/proc/{pid}/stat")
+        self.clock_ticks = os.sysconf("SC_CLK_TCK") if self.available else 100
+        self.page_size = os.sysconf("SC_PAGE_SIZE") if self.available else 4096
+        self.stopped = threading.Event()
+
+    def tree(self):
+        pids = [self.pid]
+        for pid in pids:
+            try:
+                for tid in os.listdir(f"/proc/{pid}/task"):
+                    with open(f"/proc/{pid}/task/{tid}/children") as fp:
+                        pids.extend(int(child) for child in fp.read().split())
+            except OSError:
+                pass
+        return pids
+
+    def cpu_seconds(self):
+        total = 0
+        for pid in self.tree():
+            try:
+                with open(f"/proc/{pid}/stat") as fp:
+                    # Field setelah "(nama)": utime dan stime ada di posisi 14 dan 15
+                    fields = fp.read().rsplit(")", 1)[1].split()
+                total += int(fields[11]) + int(fields[12])
+            except (OSError, IndexError, ValueError):
+                pass
+        return total / self.clock_ticks
+
+    def rss_bytes(self):
+        total = 0
+        for pid in self.tree():
+            try:
+                with open(f"/proc/{pid}/statm") as fp:
+                    total += int(fp.read().split()[1]) * self.page_size
+            except (OSError, IndexError, ValueError):
+                pass
+        return total
+
+    def sample(self):
+        while not self.stopped.wait(self.interval):
+            self.peak_rss = max(self.peak_rss, self.rss_bytes())
+
+    def start(self):
+        if not self.available:
+            return
+        self.stopped.clear()
+        self.start_time = time.time()
+        self.start_cpu = self.cpu_seconds()
+        self.peak_rss = self.rss_bytes()
+        self.thread = threading.Thread(target=self.sample, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if not self.available:
+            return {"server_cpu_seconds": None, "server_cpu_percent": None, "server_rss_peak_mb": None}
+        self.stopped.set()
+        self.thread.join()
+        self.peak_rss = max(self.peak_rss, self.rss_bytes())
+        elapsed = time.time() - self.start_time
+        cpu = self.cpu_seconds() - self.start_cpu
+        return {"server_cpu_seconds": round(cpu, 3),
+                "server_cpu_percent": round(cpu / elapsed * 100, 1) if elapsed > 0 else 0,
+                "server_rss_peak_mb": round(self.peak_rss / (1024 * 1024), 1)}
+
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+# Server lokal di subprocess dengan direktori kerja sendiri (storedfiles ada di workdir)
+class LocalServer:
+    def __init__(self, workdir, engine, workers, processes, storage, cache_mb, port=0):
+        self.workdir = workdir
+        self.port = port or free_port()
+        self.command = [sys.executable, SERVER_SCRIPT, str(workers), "--engine", engine, "--port", str(self.port),
+                        "--processes", str(processes), "--storage", storage, "--cache-mb", str(cache_mb)]
+        self.log_path = os.path.join(workdir, f"server-{engine}-{self.port}.log")
+
+    def __enter__(self):
+        self.log = open(self.log_path, 'wb')
+        self.process = subprocess.Popen(self.command, cwd=self.workdir, stdout=self.log, stderr=subprocess.STDOUT)
+        deadline = time.time() + 15
+        while time.time() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Server exited with code {self.process.returncode}, see {self.log_path}")
+            try:
+                socket.create_connection(("127.0.0.1", self.port), timeout=1).close()
+                return self
+            except OSError:
+                time.sleep(0.1)
+        self.__exit__(None, None, None)
+        raise RuntimeError(f"Server did not start listening on port {self.port}")
+
+    def __exit__(self, *exc):
+        if self.process.poll() is None:
+            self.process.send_signal(signal.SIGINT)
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self.log.close()
+
+
+def write_text_file(path, size_mb):
+    # Data mirip log/CSV (mudah dikompresi), kebalikan dari os.urandom di create.py
+    size = size_mb * 1024 * 1024
+    line_number = 0
+    with open(path, 'w') as fp:
+        while fp.tell() < size:
+            lines = [f"{line_number + i},2025-05-{(line_number + i) % 28 + 1:02d}T12:00:00,INFO,"
+                     f"request {line_number + i} served in {(line_number + i) % 997} ms\n" for i in range(10000)]
+            fp.write("".join(lines))
+            line_number += 10000
+        fp.truncate(size)
+
+
+def prepare_file(client, size_mb, data):
+    import create
+    filename = f"dummy_{size_mb}mb_0.dat"
+    full_path = os.path.join(client.DUMMY_DIR, filename)
+    if not os.path.exists(full_path) or os.path.getsize(full_path) != size_mb * 1024 * 1024:
+        if data == "text":
+            write_text_file(full_path, size_mb)
+        else:
+            create.create_dummy_file(filename, size_mb)
+    return filename
+
+
+# Koneksi pool dan cache kemampuan server milik client_ets berlaku per alamat server
+def reset_client(client, port):
+    with client.connection_pools_lock:
+        for pool in client.connection_pools.values():
+            pool.close()
+        client.connection_pools.clear()
+    client.dedup_chunk_sizes.clear()
+    client.server_capability_lists.clear()
+    client.protocol_mode = 'binary'
+    client.server_address = ("127.0.0.1", port)
+
+
+def run_benchmark(args, workdir):
+    os.chdir(workdir)
+    sys.path.insert(0, PACKAGE_DIR)
+    import client_ets as client
+    client.transfer_parts = args.transfer_parts
+    results = []
+    for engine in args.engines:
+        with LocalServer(workdir, engine, args.server_workers, args.processes, args.storage, args.cache_mb,
+                         args.port) as server:
+            reset_client(client, server.port)
+            monitor = ProcessMonitor(server.process.pid)
+            for size_mb in args.sizes:
+                filename = prepare_file(client, size_mb, args.data)
+                for operation in args.operations:
+                    if operation == "download" and not client.remote_upload(filename)[0]:
+                        raise RuntimeError(f"Could not upload {filename} for download benchmark")
+                    for mode in args.modes:
+                        for concurrency in args.concurrency:
+                            for repeat in range(args.repeat):
+                                monitor.start()
+                                result = client.stress_test(mode, concurrency, operation, size_mb)
+                                usage = monitor.stop()
+                                if result is None:
+                                    raise RuntimeError(f"Stress test {operation} {size_mb}MB did not run")
+                                latencies = result['latencies']
+                                row = {"engine": engine, "server_workers": args.server_workers,
+                                       "processes": args.processes, "storage": args.storage, "data": args.data,
+                                       "mode": mode, "concurrency": concurrency, "operation": operation,
+                                       "size_mb": size_mb, "repeat": repeat,
+                                       "successful": result['successful_clients'],
+                                       "failed": result['failed_clients'],
+                                       "total_time": round(result['total_time'], 4),
+                                       "latency_mean": round(sum(latencies) / len(latencies), 4) if latencies else 0,
+                                       "latency_p50": round(result['latency_p50'], 4),
+                                       "latency_p95": round(result['latency_p95'], 4),
+                                       "latency_p99": round(result['latency_p99'], 4),
+                                       "aggregate_mb_s": round(result['aggregate_throughput'] / (1024 * 1024), 2),
+                                       **usage}
+                                print_row(row)
+                                results.append(row)
+            reset_client(client, server.port)
+    return results
+
+
+def print_row(row):
+    print(f"{row['engine']:>7} {row['mode']:>7} x{row['concurrency']:<4} {row['operation']:>8} {row['size_mb']:>5}MB "
+          f"ok={row['successful']:<4} fail={row['failed']:<3} p50={row['latency_p50']:.3f}s p95={row['latency_p95']:.3f}s "
+          f"p99={row['latency_p99']:.3f}s {row['aggregate_mb_s']:.1f}MB/s cpu={row['server_cpu_percent']}% "
+          f"rss={row['server_rss_peak_mb']}MB", flush=True)
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PACKAGE_DIR, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def write_csv(path, results):
+    with open(path, 'w', newline='') as fp:
+        writer = csv.DictWriter(fp, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def write_json(path, results, args):
+    meta = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "revision": git_revision(),
+            "python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+            "args": {key: value for key, value in vars(args).items() if key not in ("csv", "json", "baseline")}}
+    with open(path, 'w') as fp:
+        json.dump({"meta": meta, "results": results}, fp, indent=2)
+
+
+def summarize(results):
+    groups = {}
+    for row in results:
+        groups.setdefault(tuple(row[field] for field in KEY_FIELDS), []).append(row)
+    return {key: {"aggregate_mb_s": sum(row["aggregate_mb_s"] for row in rows) / len(rows),
+                  "latency_p99": sum(row["latency_p99"] for row in rows) / len(rows)}
+            for key, rows in groups.items()}
+
+
+# Bandingkan rata-rata per kombinasi dengan baseline: MB/s turun atau p99 naik lebih dari tolerance
+def compare_baseline(path, results, tolerance):
+    with open(path) as fp:
+        baseline = summarize(json.load(fp)["results"])
+    regressions = []
+    for key, current in summarize(results).items():
+        old = baseline.get(key)
+        if old is None:
+            continue
+        label = " ".join(f"{field}={value}" for field, value in zip(KEY_FIELDS, key))
+        if current["aggregate_mb_s"] < old["aggregate_mb_s"] * (1 - tolerance):
+            regressions.append(f"{label}: {old['aggregate_mb_s']:.1f} -> {current['aggregate_mb_s']:.1f} MB/s")
+        if current["latency_p99"] > old["latency_p99"] * (1 + tolerance):
+            regressions.append(f"{label}: p99 {old['latency_p99']:.3f} -> {current['latency_p99']:.3f} s")
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark file server dengan server lokal")
+    parser.add_argument("--engines", nargs="+", choices=["thread", "asyncio"], default=["thread"])
+    parser.add_argument("--server-workers", type=int, default=50, help="worker thread server (per proses)")
+    parser.add_argument("--processes", type=int, default=1, help="jumlah proses worker server")
+    parser.add_argument("--storage", choices=["flat", "dedup"], default="flat")
+    parser.add_argument("--cache-mb", type=int, default=0)
+    parser.add_argument("--port", type=int, default=0, help="port server, 0 = pilih port bebas")
+    parser.add_argument("--modes", nargs="+", choices=["thread", "process", "async"], default=["thread"],
+                        help="mode client")
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 5], help="jumlah client bersamaan")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10], help="ukuran file (MB)")
+    parser.add_argument("--operations", nargs="+", choices=["upload", "download"], default=["upload", "download"])
+    parser.add_argument("--data", choices=["random", "text"], default="random",
+                        help="isi file uji: random (tidak bisa dikompresi) atau text (mirip log/CSV)")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--transfer-parts", type=int, default=1, help="koneksi paralel per transfer file besar")
+    parser.add_argument("--workdir", help="direktori kerja (default direktori sementara yang dihapus setelah selesai)")
+    parser.add_argument("--csv", help="tulis hasil ke file CSV")
+    parser.add_argument("--json", help="tulis hasil dan metadata ke file JSON")
+    parser.add_argument("--baseline", help="file JSON hasil sebelumnya untuk deteksi regresi")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="batas regresi relatif (default 0.10)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="tampilkan log client")
+    args = parser.parse_args()
+    if min(args.concurrency + args.sizes + [args.server_workers, args.processes, args.repeat]) < 1:
+        parser.error("concurrency, sizes, workers, processes and repeat must be positive")
+
+    logging.basicConfig(level=logging.WARNING)
+    if not args.verbose:
+        logging.disable(logging.WARNING)
+    # Path keluaran relatif terhadap direktori saat benchmark dijalankan, bukan workdir
+    for option in ("csv", "json", "baseline"):
+        if getattr(args, option):
+            setattr(args, option, os.path.abspath(getattr(args, option)))
+    workdir = os.path.abspath(args.workdir) if args.workdir else tempfile.mkdtemp(prefix="bench_ets-")
+    os.makedirs(workdir, exist_ok=True)
+    try:
+        results = run_benchmark(args, workdir)
+    finally:
+        os.chdir(PACKAGE_DIR)
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.csv:
+        write_csv(args.csv, results)
+    if args.json:
+        write_json(args.json, results, args)
+    if args.baseline and compare_baseline(args.baseline, results, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+import threading
+from collections import OrderedDict
+
+
+# Cache payload file yang sering diminta (misalnya hasil base64 untuk GET protokol lama) dengan
+# batas total byte dan eviksi LRU. Setiap entry menyimpan validator (inode, ukuran, mtime) dari
+# fstat sehingga perubahan file dari luar langsung terdeteksi; UPLOAD/DELETE memanggil invalidate.
+# Saat banyak request meminta entry yang sama sekaligus hanya satu yang memuat (single-flight),
+# sisanya menunggu lalu memakai hasilnya.
+class FileCache:
+    def __init__(self, max_bytes, max_item_bytes=None):
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_item_bytes or max_bytes // 4
+        self.entries = OrderedDict()  # (nama file, jenis payload) -> (validator, chunks, ukuran)
+        self.loading = {}
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def validator(stat):
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def fits(self, size):
+        return size <= self.max_item_bytes
+
+    # Kembalikan (chunks, False) bila cache hit. Bila miss kembalikan (None, True):
+    # pemanggil wajib memuat payload lalu memanggil release() walaupun gagal.
+    def acquire(self, key, validator):
+        while True:
+            with self.lock:
+                entry = self.entries.get(key)
+                if entry is not None and entry[0] == validator:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1], False
+                event = self.loading.get(key)
+                if event is None:
+                    self.loading[key] = threading.Event()
+                    self.misses += 1
+                    return None, True
+            event.wait()
+
+    def release(self, key, validator, chunks=None):
+        with self.lock:
+            event = self.loading.pop(key, None)
+            if chunks is not None:
+                self._store(key, validator, chunks)
+        if event is not None:
+            event.set()
+
+    def _store(self, key, validator, chunks):
+        size = sum(len(chunk) for chunk in chunks)
+        if not self.fits(size):
+            return
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.current_bytes -= old[2]
+        while self.entries and self.current_bytes + size > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.current_bytes -= evicted[2]
+            self.evictions += 1
+        self.entries[key] = (validator, tuple(chunks), size)
+        self.current_bytes += size
+
+    def invalidate(self, filename):
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == filename]:
+                self.current_bytes -= self.entries.pop(key)[2]
+
+    def stats(self):
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "entries": len(self.entries), "bytes": self.current_bytes, "max_bytes": self.max_bytes}
@@ -0,0 +1,140 @@
+import zlib
+import hashlib
+
+# Checksum isi file yang dihitung sambil data mengalir (upload, download, kompresi), tanpa membaca
+# ulang file. Nilai ditulis "algoritma:hex", misalnya "crc32:1a2b3c4d", sehingga pemeriksa tahu
+# cara menghitungnya. crc32 dan sha256 selalu ada, xxh64 dan crc32c bila modulnya terpasang
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+try:
+    import crc32c as crc32c_module
+except ImportError:
+    crc32c_module = None
+
+
+class ChecksumMismatch(ValueError):
+    pass
+
+
+# Urutan preferensi algoritma yang tersedia di proses ini (tercepat lebih dulu)
+def available_checksums():
+    algorithms = []
+    if xxhash is not None:
+        algorithms.append("xxh64")
+    if crc32c_module is not None:
+        algorithms.append("crc32c")
+    algorithms += ["crc32", "sha256"]
+    return algorithms
+
+
+# Algoritma pertama (urutan preferensi lokal) yang juga didukung pihak lain, None bila tidak ada
+def choose_checksum(accepted):
+    for algorithm in available_checksums():
+        if algorithm in (accepted or ()):
+            return algorithm
+    return None
+
+
+# CRC berjalan dengan antarmuka hashlib (update/hexdigest)
+class Crc:
+    def __init__(self, func):
+        self.func = func
+        self.value = 0
+
+    def update(self, data):
+        self.value = self.func(data, self.value)
+
+    def hexdigest(self):
+        return f"{self.value:08x}"
+
+
+def make_hasher(algorithm):
+    if algorithm == "crc32":
+        return Crc(zlib.crc32)
+    if algorithm == "sha256":
+        return hashlib.sha256()
+    if algorithm == "xxh64" and xxhash is not None:
+        return xxhash.xxh64()
+    if algorithm == "crc32c" and crc32c_module is not None:
+        return Crc(crc32c_module.crc32c)
+    raise ValueError(f"Unsupported checksum {algorithm}")
+
+
+# Satu atau beberapa algoritma sekaligus atas aliran data yang sama (None diabaikan)
+class StreamChecksum:
+    def __init__(self, *algorithms):
+        self.hashers = {algorithm: make_hasher(algorithm) for algorithm in dict.fromkeys(algorithms) if algorithm}
+
+    def update(self, data):
+        for hasher in self.hashers.values():
+            hasher.update(data)
+
+    def value(self, algorithm):
+        return f"{algorithm}:{self.hashers[algorithm].hexdigest()}"
+
+    # Bandingkan dengan nilai "alg:hex" dari pihak lain (algoritmanya harus ikut dihitung)
+    def verify(self, expected, filename):
+        verify_checksum(expected, self.value(str(expected).partition(":")[0]), filename)
+
+
+# Penghitung untuk memeriksa nilai "alg:hex" dari pihak lain, None bila algoritmanya tidak tersedia di sini
+def checksum_for(value):
+    algorithm = str(value or "").partition(":")[0]
+    return StreamChecksum(algorithm) if algorithm in available_checksums() else None
+
+
+# "alg:hex" -> (alg, hex), "alg" -> (alg, None); algoritma yang tidak didukung ValueError
+def split_checksum(value):
+    algorithm, _, digest = str(value).partition(":")
+    if algorithm not in available_checksums():
+        raise ValueError(f"Unsupported checksum {algorithm}")
+    return algorithm, digest or None
+
+
+def verify_checksum(expected, actual, filename):
+    if expected != actual:
+        raise ChecksumMismatch(f"Checksum mismatch for {filename}: expected {expected}, got {actual}")
+
+
+# crc32 gabungan dari potongan berurutan [(crc32, panjang), ...] tanpa membaca ulang isinya
+# (algoritma crc32_combine zlib: operator GF(2) 32x32 untuk "menambah panjang byte nol").
+# Dipakai untuk checksum file yang diunggah per chunk; operator dihitung sekali per panjang
+def combine_crc32(parts):
+    value = 0
+    operators = {}
+    for crc, length in parts:
+        if length not in operators:
+            operators[length] = crc32_zeros_operator(length)
+        value = gf2_times(operators[length], value) ^ crc
+    return value
+
+
+def gf2_times(matrix, vector):
+    result = 0
+    row = 0
+    while vector:
+        if vector & 1:
+            result ^= matrix[row]
+        vector >>= 1
+        row += 1
+    return result
+
+
+def gf2_compose(first, second):
+    return [gf2_times(first, column) for column in second]
+
+
+def crc32_zeros_operator(length):
+    # Operator satu bit nol (polinom crc32 terbalik), dikuadratkan 3 kali menjadi satu byte nol
+    operator = [0xedb88320] + [1 << n for n in range(31)]
+    for _ in range(3):
+        operator = gf2_compose(operator, operator)
+    result = [1 << n for n in range(32)]
+    while length:
+        if length & 1:
+            result = gf2_compose(operator, result)
+        operator = gf2_compose(operator, operator)
+        length >>= 1
+    return result
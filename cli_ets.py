@@ -0,0 +1,105 @@
+from time import perf_counter
+
+started = perf_counter()
+
+import os
+import sys
+import argparse
+from fileclient_ets import FileClient, DEFAULT_TIMEOUT
+from checksum_ets import available_checksums
+
+# CLI ringan untuk pemakaian sekali jalan (cron, skrip): list/get/put/delete lewat FileClient.
+# Hanya mengimpor client blocking (tanpa asyncio, multiprocessing atau stress test di client_ets),
+# tidak membuat proses pembantu dan tidak mengirim CONFIG. Hanya mode biner.
+# Exit code 0 bila semua operasi OK, 1 bila ada yang gagal (pesan error ke stderr).
+# --timing menulis waktu start (import + parsing argumen) dan total ke stderr.
+DEFAULT_HOST = '172.16.16.101'
+DEFAULT_PORT = 8686
+
+
+def print_result(hasil):
+    if hasil['status'] != 'OK':
+        print(f"ERROR: {hasil.get('data', hasil['status'])}", file=sys.stderr)
+        return False
+    if isinstance(hasil.get('data'), str):
+        print(hasil['data'])
+    return True
+
+
+def run_list(client, args):
+    hasil = client.list(args.prefix, args.pattern, detail=args.detail)
+    if hasil['status'] != 'OK':
+        return print_result(hasil)
+    for entry in hasil['data']:
+        if args.detail:
+            print(f"{entry['name']}\t{entry['size']}\t{entry.get('checksum') or '-'}")
+        else:
+            print(entry)
+    return True
+
+
+def run_get(client, args):
+    path = args.dest or os.path.basename(args.name)
+    if os.path.isdir(path):
+        path = os.path.join(path, os.path.basename(args.name))
+    hasil = client.get(args.name, path)
+    if hasil['status'] == 'OK':
+        print(f"{args.name} -> {path} ({hasil.get('size', 0)} bytes)")
+        return True
+    return print_result(hasil)
+
+
+def run_put(client, args):
+    if not os.path.isfile(args.path):
+        print(f"ERROR: File {args.path} not found", file=sys.stderr)
+        return False
+    return print_result(client.put(args.path, args.name))
+
+
+def run_delete(client, args):
+    ok = True
+    for name in args.names:
+        ok = print_result(client.delete(name)) and ok
+    return ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CLI ringan untuk file server (mode biner)")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="timeout per langkah jaringan (detik)")
+    parser.add_argument("--no-compression", action="store_true", help="GET tanpa meminta body terkompresi")
+    parser.add_argument("--checksum", choices=available_checksums(), default=None,
+                        help="put membawa checksum dengan algoritma ini (diperiksa server sebelum file disimpan)")
+    parser.add_argument("--timing", action="store_true", help="tulis waktu start dan total ke stderr")
+    commands = parser.add_subparsers(dest="command", required=True)
+    list_parser = commands.add_parser("list", help="daftar file di server")
+    list_parser.add_argument("--prefix", default="")
+    list_parser.add_argument("--pattern", default=None, help="pola glob, misalnya '*.jpg'")
+    list_parser.add_argument("--detail", action="store_true", help="tampilkan ukuran dan checksum")
+    list_parser.set_defaults(run=run_list)
+    get_parser = commands.add_parser("get", help="unduh file")
+    get_parser.add_argument("name")
+    get_parser.add_argument("dest", nargs="?", help="path atau direktori tujuan (default nama yang sama)")
+    get_parser.set_defaults(run=run_get)
+    put_parser = commands.add_parser("put", help="unggah file")
+    put_parser.add_argument("path")
+    put_parser.add_argument("name", nargs="?", help="nama di server (default nama file lokal)")
+    put_parser.set_defaults(run=run_put)
+    delete_parser = commands.add_parser("delete", help="hapus file")
+    delete_parser.add_argument("names", nargs="+")
+    delete_parser.set_defaults(run=run_delete)
+    args = parser.parse_args(argv)
+
+    ready = perf_counter()
+    with FileClient(args.host, args.port, timeout=args.timeout, compression=not args.no_compression,
+                    checksum=args.checksum) as client:
+        ok = args.run(client, args)
+    if args.timing:
+        print(f"startup {(ready - started) * 1000:.1f} ms, total {(perf_counter() - started) * 1000:.1f} ms",
+              file=sys.stderr)
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,24 +1,95 @@
 import socket
+import asyncio
+import argparse
 import json
 import base64
 import logging
-import shlex
 import os
 import time
 from concurrent.futures import ThreadPoolExecutor
-from multiprocessing import Pool, Manager
 import sys
-import random
+import threading
+import hashlib
+import fnmatch
+import tempfile
+from transport_ets import (MAGIC, TERMINATOR, MAX_HEADER_SIZE, BASE64_CHUNK_SIZE, NotBinaryError, ConnectionPool,
+                           SocketReader, encode_header, read_frame_header, read_json_body, decode_base64_stream,
+                           mmap_windows)
+from compression_ets import (available_codecs, choose_codec, looks_incompressible, compress_to_file,
+                             decompress_stream, MIN_RATIO)
+from fileclient_ets import (BUSY_MAX_RETRIES, backoff_delay, busy_delay, exchange_pooled, send_hashed, trailer_frame,
+                            write_hashed, remove_quietly)
+from async_fileclient_ets import AsyncFileClient
+from checksum_ets import StreamChecksum, ChecksumMismatch, choose_checksum, checksum_for
 
 server_address = ('172.16.16.101', 8686)
 
+# Mode protokol: 'binary' (frame biner, default) atau 'legacy' (JSON + base64)
+# Otomatis turun ke 'legacy' bila server hanya mengerti protokol lama
+protocol_mode = 'binary'
+
+# Transfer file besar (mode biner): file >= CHUNKED_THRESHOLD diunggah per chunk sehingga bisa dilanjutkan,
+# transfer_parts > 1 membagi satu file ke beberapa koneksi paralel
+TRANSFER_CHUNK_SIZE = 8 * 1024 * 1024  # 8 MB
+CHUNKED_THRESHOLD = 32 * 1024 * 1024  # 32 MB
+transfer_parts = 1
+# Identitas client yang tetap antar restart, bagian dari upload_id supaya upload bertahap yang terputus
+# dilanjutkan setelah client di-restart tanpa tertukar dengan sesi client lain
+CLIENT_ID_PATH = os.path.join(os.path.expanduser("~"), ".ets_client_id")
+# Ronde UPLOAD_STATUS -> PUTCHUNK -> COMMIT; COMMIT bisa melaporkan chunk hilang bila upload file yang sama
+# (upload_id sama) dari thread/proses lain lebih dulu di-commit
+CHUNKED_MAX_ROUNDS = 3
+client_id_value = None
+
+# Upload dengan deduplikasi (server dengan --storage dedup): hash chunk dikirim lebih dulu,
+# hanya chunk yang belum ada di server yang ditransfer. Ukuran chunk diminta sekali per server
+DEDUP_MIN_SIZE = 1024 * 1024  # 1 MB
+dedup_chunk_sizes = {}
+
+# Kompresi per transfer (mode biner): GET seluruh file mengirim daftar codec yang diterima,
+# UPLOAD dikompresi bila server mendukung codec yang sama dan file tidak terlihat acak
+compression_enabled = True
+server_capability_lists = {}
+
+# Checksum end-to-end (mode biner): upload membawa checksum yang dihitung sambil mengirim (diperiksa server
+# sebelum file di-commit), download seluruh file diperiksa dengan checksum dari server sebelum rename.
+# Algoritma dipilih dari daftar server (CODECS); server lama tanpa checksum dilayani seperti sebelumnya.
+# Download lanjutan/paralel (range) tidak diperiksa karena checksum hanya ada untuk seluruh file
+checksum_enabled = True
+
+# Batch (mode biner): banyak file dalam satu request MGET/MPUT/MDELETE. Satu batch dibatasi jumlah file,
+# total panjang nama (daftar nama ada di header frame) dan total isi file MPUT.
+# File >= BATCH_FILE_LIMIT tetap diunggah sendiri (chunked/dedup/kompresi)
+BATCH_MAX_FILES = 1000
+BATCH_MAX_NAME_BYTES = 32 * 1024  # 32 KB
+BATCH_MAX_BYTES = 64 * 1024 * 1024  # 64 MB
+BATCH_FILE_LIMIT = 4 * 1024 * 1024  # 4 MB
+
+# Retry dengan exponential backoff + jitter dan balasan BUSY (server kelebihan beban) yang diulang setelah
+# retry_after dari server, maksimal BUSY_MAX_RETRIES kali: konstanta dan jeda dari fileclient_ets
+
+# Pool koneksi keep-alive per (alamat server, pid), dipakai bersama semua thread worker
+connection_pools = {}
+connection_pools_lock = threading.Lock()
+
 # Direktori untuk menyimpan file dummy dan file yang diunduh
 DUMMY_DIR = "dummyfiles"
 if not os.path.exists(DUMMY_DIR):
     os.makedirs(DUMMY_DIR)
 
 # Fungsi untuk mengirim perintah ke server
-def send_command(command_str=""):
+# body: fungsi yang menghasilkan potongan bytes setelah command_str (isi file di-stream, bisa diulang saat BUSY)
+# receive: fungsi(reader) untuk membaca balasan besar secara bertahap (GET), selain itu balasan JSON kecil
+def send_command(command_str="", body=None, receive=None):
+    for _ in range(BUSY_MAX_RETRIES):
+        hasil = send_command_once(command_str, body, receive)
+        if hasil.get('status') != 'BUSY':
+            return hasil
+        logging.warning(f"Server busy, retrying in {hasil.get('retry_after')}s")
+        time.sleep(busy_delay(hasil))
+    return send_command_once(command_str, body, receive)
+
+def send_command_once(command_str, body=None, receive=None):
     global server_address
     sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     try:
@@ -26,20 +97,29 @@ def send_command(command_str=""):
         logging.warning(f"Connecting to {server_address}")
         logging.warning(f"Sending command: {command_str[:50]}...")  # Log hanya 50 karakter pertama
         sock.sendall(command_str.encode())
-        data_received = ""
+        if body:
+            try:
+                for chunk in body():
+                    sock.sendall(chunk)
+            except OSError:
+                # Server bisa menolak (BUSY) dan menutup koneksi sebelum body selesai, balasannya tetap dibaca
+                pass
+        if receive:
+            return receive(SocketReader(sock))
+        data_received = bytearray()
         loading_dots = 0
         while True:
             data = sock.recv(1048576)
             if data:
-                data_received += data.decode()
+                data_received += data
                 loading_dots = (loading_dots + 1) % 4
                 print(f"\rLoading{'.' * loading_dots}", end="", flush=True)
-                if "\r\n\r\n" in data_received:
+                if TERMINATOR in data_received[-len(data) - len(TERMINATOR):]:
                     break
             else:
                 break
         print("\rDone          ")  # Bersihkan baris dan hapus loading dots
-        logging.warning(f"Received raw: {data_received[:50]}...")  # Log hanya 50 karakter pertama
+        logging.warning(f"Received raw: {bytes(data_received[:50])}...")  # Log hanya 50 byte pertama
         hasil = json.loads(data_received)
         return hasil
     except Exception as e:
@@ -48,19 +128,194 @@ def send_command(command_str=""):
     finally:
         sock.close()
 
+def get_pool():
+    key = (server_address, os.getpid())
+    with connection_pools_lock:
+        if key not in connection_pools:
+            connection_pools[key] = ConnectionPool(server_address)
+        return connection_pools[key]
+
+# upload_range/download_offset dipakai untuk transfer sebagian file (chunk/range)
+# body: isi request kecil yang sudah ada di memori (misalnya daftar hash)
+# batch_names: request batch, balasannya dibaca dengan read_batch (upload_files/download_dir untuk MPUT/MGET)
+# checksum: algoritma untuk upload; header berisi nama algoritma saja dan nilainya dikirim di frame trailer
+def exchange_frame(connection, header, upload_path=None, download_path=None, upload_range=None, download_offset=None,
+                   body=b"", upload_files=(), batch_names=None, download_dir=None, checksum=None):
+    reader = connection.reader
+    if checksum and upload_path:
+        header = dict(header, checksum=checksum)
+    try:
+        connection.sock.sendall(encode_header(header) + body)
+        if upload_path:
+            offset, count = upload_range or (0, None)
+            if checksum:
+                value = send_hashed(connection.sock, upload_path, checksum, offset, count)
+                connection.sock.sendall(trailer_frame(value))
+            else:
+                with open(upload_path, 'rb') as fp:
+                    connection.sock.sendfile(fp, offset, count)
+        # File kecil MPUT dibaca utuh lalu dikirim sebagai frame sendiri (header + isi dalam satu sendall),
+        # checksum-nya sudah diketahui sehingga langsung ditaruh di header
+        for filename, path in upload_files:
+            with open(path, 'rb') as fp:
+                data = fp.read()
+            item = {'name': filename, 'size': len(data)}
+            if checksum:
+                digest = StreamChecksum(checksum)
+                digest.update(data)
+                item['checksum'] = digest.value(checksum)
+            connection.sock.sendall(encode_header(item) + data)
+    except OSError:
+        # Server lama bisa menutup koneksi di tengah upload, cek dulu balasannya
+        pass
+    first = reader.peek(len(MAGIC))
+    if not first:
+        raise ConnectionError("Connection closed by server")
+    if first != MAGIC:
+        raise NotBinaryError("Server does not support binary frames")
+    hasil = read_frame_header(reader)
+    if hasil.get('content') == 'json':
+        return read_json_body(hasil, reader.read_exact(int(hasil['size'])))
+    if batch_names is not None and hasil['status'] == 'OK':
+        return read_batch(reader, hasil, batch_names, download_dir)
+    if download_path and hasil['status'] == 'OK':
+        size = int(hasil.get('size', 0))
+        # Range ke file yang sudah dialokasikan penuh (download paralel) diterima langsung ke jendela mmap.
+        # Download biasa/lanjutan tetap ditulis berurutan karena ukuran .part menjadi offset untuk melanjutkan
+        if download_offset is not None and not hasil.get('encoding') and \
+                os.path.getsize(download_path) >= download_offset + size:
+            with open(download_path, 'r+b') as fp:
+                for view in mmap_windows(fp, download_offset, size, write=True):
+                    reader.readinto_exact(view)
+            return hasil
+        digest = checksum_for(hasil.get('checksum')) if download_offset is None else None
+        with open(download_path, 'wb' if download_offset is None else 'r+b') as fp:
+            if download_offset:
+                fp.seek(download_offset)
+            chunks = reader.iter_exact(size)
+            if hasil.get('encoding'):
+                chunks = decompress_stream(chunks, hasil['encoding'])
+            for chunk in chunks:
+                write_hashed(fp, digest, chunk)
+        if digest is not None:
+            return verified(hasil, digest, download_path)
+    return hasil
+
+# File hasil download yang checksum-nya tidak cocok dibuang (termasuk .part supaya tidak dilanjutkan)
+def verified(hasil, digest, path):
+    try:
+        digest.verify(hasil['checksum'], hasil.get('data_namafile', path))
+    except ChecksumMismatch as e:
+        logging.warning(str(e))
+        remove_quietly(path)
+        return dict(hasil, status='ERROR', data=str(e))
+    return hasil
+
+# Baca frame per file setelah frame utama balasan batch. Isi file MGET yang berhasil disimpan
+# ke download_dir lewat file .part lalu rename
+def read_batch(reader, hasil, names, download_dir=None):
+    files = []
+    for filename in names[:int(hasil.get('count', 0))]:
+        item = read_frame_header(reader)
+        item['name'] = filename
+        chunks = reader.iter_exact(int(item.get('size', 0)))
+        if download_dir is not None and item['status'] == 'OK':
+            full_path = os.path.join(download_dir, os.path.basename(filename))
+            part_path = f"{full_path}.{os.getpid()}-{threading.get_ident()}.part"
+            if item.get('encoding'):
+                chunks = decompress_stream(chunks, item['encoding'])
+            digest = checksum_for(item.get('checksum'))
+            with open(part_path, 'wb') as fp:
+                for chunk in chunks:
+                    write_hashed(fp, digest, chunk)
+            item = verified(item, digest, part_path) if digest is not None else item
+            if item['status'] == 'OK':
+                os.replace(part_path, full_path)
+                item['size'] = item.get('total', item.get('size', 0))
+        else:
+            for _ in chunks:
+                pass
+        files.append(item)
+    hasil['files'] = files
+    hasil['failed'] = sum(1 for item in files if item['status'] != 'OK')
+    return hasil
+
+# Fungsi untuk mengirim perintah dalam frame biner lewat koneksi keep-alive dari pool
+# Isi file dikirim/diterima langsung dari/ke disk tanpa base64
+def send_frame_command(header, **kwargs):
+    pool = get_pool()
+    logging.warning(f"Sending binary command: {header.get('cmd')} {header.get('name', '')}")
+    busy_retries = 0
+    while True:
+        hasil = exchange_pooled(pool, lambda connection: exchange_frame(connection, header, **kwargs))
+        if hasil['status'] != 'BUSY':
+            return hasil
+        busy_retries += 1
+        if busy_retries > BUSY_MAX_RETRIES:
+            return hasil
+        logging.warning(f"Server busy, retrying {header.get('cmd')} in {hasil.get('retry_after')}s")
+        time.sleep(busy_delay(hasil))
+
+# Kirim beberapa perintah tanpa body sekaligus (pipelining) dalam satu koneksi,
+# balasan dibaca berurutan; body balasan (bila ada) disimpan di key 'body'
+def send_pipelined(headers):
+    pool = get_pool()
+    connection = pool.acquire()
+    try:
+        connection.sock.sendall(b"".join(encode_header(header) for header in headers))
+        results = []
+        for _ in headers:
+            hasil = read_frame_header(connection.reader)
+            size = int(hasil.get('size', 0))
+            if size and hasil.get('content') == 'json':
+                read_json_body(hasil, connection.reader.read_exact(size))
+            elif size:
+                hasil['body'] = connection.reader.read_exact(size)
+            results.append(hasil)
+    except BaseException:
+        connection.close()
+        raise
+    pool.release(connection)
+    return results
+
+# Coba kirim dalam mode biner, turun ke protokol lama bila server belum mendukung
+def send_binary_or_legacy(binary_call, legacy_call):
+    global protocol_mode
+    if protocol_mode == 'binary':
+        try:
+            return binary_call()
+        except NotBinaryError:
+            logging.warning("Server does not support binary frames, falling back to legacy protocol")
+            protocol_mode = 'legacy'
+        except Exception as e:
+            logging.warning(f"Error during binary transfer: {str(e)}")
+            return {'status': 'ERROR', 'data': str(e)}
+    return legacy_call()
+
 # Fungsi untuk mengirim konfigurasi ke server
 def send_config(mode, workers):
     command_str = f"CONFIG {mode} {workers}\r\n\r\n"
-    result = send_command(command_str)
+    result = send_binary_or_legacy(lambda: send_frame_command({'cmd': 'CONFIG', 'mode': mode, 'workers': workers}),
+                                   lambda: send_command(command_str))
     if result['status'] != 'OK':
         logging.warning(f"Failed to configure server: {result['data']}")
         sys.exit(1)
     logging.warning("Server configured successfully")
 
 # Fungsi untuk operasi LIST
-def remote_list():
+# prefix/pattern (glob) dan limit diproses di server pada mode biner, di client pada protokol lama
+def remote_list(prefix="", pattern=None, limit=None):
     command_str = "LIST\r\n\r\n"  # Pastikan ada \r\n\r\n untuk konsistensi protokol
-    hasil = send_command(command_str)
+    header = {'cmd': 'LIST', 'prefix': prefix, 'pattern': pattern, 'limit': limit}
+
+    def list_legacy():
+        hasil = send_command(command_str)
+        if hasil['status'] == 'OK':
+            names = [f for f in hasil['data'] if f.startswith(prefix) and (not pattern or fnmatch.fnmatchcase(f, pattern))]
+            hasil['data'] = sorted(names)[:limit]
+        return hasil
+
+    hasil = send_binary_or_legacy(lambda: send_frame_command(header), list_legacy)
     if hasil['status'] == 'OK':
         logging.warning("Daftar file:")
         for nmfile in hasil['data']:
@@ -70,21 +325,112 @@ def remote_list():
         logging.warning(f"Gagal: {hasil['data']}")
         return False
 
+# Fungsi untuk operasi DELETE
+def remote_delete(filename=""):
+    command_str = f"DELETE {filename}\r\n\r\n"
+    hasil = send_binary_or_legacy(lambda: send_frame_command({'cmd': 'DELETE', 'name': filename}),
+                                  lambda: send_command(command_str))
+    if hasil['status'] == 'OK':
+        logging.warning(f"Deleted: {filename}")
+        return True
+    logging.warning(f"Failed to delete {filename}: {hasil['data']}")
+    return False
+
+# Balasan GET protokol lama: {"status": "OK", "data_namafile": ..., "data_file": "<base64>"}. Bagian sebelum
+# data_file di-parse sendiri dan base64 di-decode per potongan langsung ke file, sehingga balasan tidak
+# pernah ditampung utuh. Balasan tanpa data_file (ERROR/BUSY) kecil dan di-parse utuh
+LEGACY_FILE_FIELD = b'"data_file": "'
+
+def receive_legacy_file(reader, full_path):
+    received = -1
+    while LEGACY_FILE_FIELD not in reader.buffer:
+        if len(reader.buffer) == received or TERMINATOR in reader.buffer or len(reader.buffer) > MAX_HEADER_SIZE:
+            return json.loads(reader.take())
+        received = len(reader.buffer)
+        reader.peek(received + 1)
+    hasil = json.loads(reader.read_until(LEGACY_FILE_FIELD) + LEGACY_FILE_FIELD + b'"}')
+    part_path = f"{full_path}.{os.getpid()}-{threading.get_ident()}.part"
+    try:
+        with open(part_path, 'wb') as fp:
+            decoded = decode_base64_stream(reader.iter_until(b'"'))
+            hasil['size'] = sum(fp.write(chunk) for chunk in decoded)
+        # Sisa balasan ('}' dan terminator) memastikan isi file tidak terpotong
+        reader.read_until(TERMINATOR)
+        os.replace(part_path, full_path)
+    finally:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+    del hasil['data_file']
+    return hasil
+
+# Fungsi untuk operasi GET (download) dengan protokol lama (JSON + base64)
+def remote_get_legacy(filename="", full_path=None):
+    full_path = full_path or os.path.join(DUMMY_DIR, f"downloaded_{filename}")
+    return send_command(f"GET {filename}\r\n\r\n", receive=lambda reader: receive_legacy_file(reader, full_path))
+
+# Download satu range file ke posisinya di file lokal yang sudah ada, diulang dengan backoff bila gagal
+def download_range(filename, local_path, offset, length, max_retries=3):
+    for attempt in range(max_retries):
+        try:
+            hasil = send_frame_command({'cmd': 'GET', 'name': filename, 'offset': offset, 'length': length},
+                                       download_path=local_path, download_offset=offset)
+            if hasil['status'] == 'OK' or attempt == max_retries - 1:
+                return hasil
+        except (ConnectionError, OSError):
+            if attempt == max_retries - 1:
+                raise
+        retry_sleep(attempt)
+
+# Download paralel: file dibagi menjadi transfer_parts range, tiap range lewat koneksi sendiri
+def download_parallel(filename, part_path, total):
+    with open(part_path, 'wb') as fp:
+        fp.truncate(total)
+    part_size = -(-total // transfer_parts)
+    ranges = [(offset, min(part_size, total - offset)) for offset in range(0, total, part_size)]
+    with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+        results = list(executor.map(lambda r: download_range(filename, part_path, r[0], r[1]), ranges))
+    failed = [hasil for hasil in results if hasil['status'] != 'OK']
+    return failed[0] if failed else {'status': 'OK', 'data_namafile': filename, 'size': total}
+
+# Download biner yang bisa dilanjutkan: data ditulis ke file .part, percobaan berikutnya
+# meminta sisa file mulai dari ukuran .part saat ini. File .part milik satu thread/proses
+# sehingga client lain yang mengunduh file yang sama tidak ikut menulis ke dalamnya
+def download_binary(filename, full_path):
+    part_path = f"{full_path}.{os.getpid()}-{threading.get_ident()}.part"
+    if transfer_parts > 1:
+        probe = send_frame_command({'cmd': 'GET', 'name': filename, 'offset': 0, 'length': 0})
+        if probe['status'] != 'OK':
+            return probe
+        if probe['total'] >= CHUNKED_THRESHOLD:
+            hasil = download_parallel(filename, part_path, probe['total'])
+            if hasil['status'] == 'OK':
+                os.replace(part_path, full_path)
+            return hasil
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    header = {'cmd': 'GET', 'name': filename, 'offset': offset}
+    if compression_enabled and not offset:
+        header['accept'] = available_codecs()
+    hasil = send_frame_command(header, download_path=part_path, download_offset=offset if offset else None)
+    if hasil['status'] != 'OK' and offset:
+        # File di server berubah/lebih kecil dari .part, ulang dari awal
+        os.remove(part_path)
+        return download_binary(filename, full_path)
+    if hasil['status'] == 'OK':
+        os.replace(part_path, full_path)
+        hasil['size'] = hasil['total']
+    return hasil
+
 # Fungsi untuk operasi GET (download)
 def remote_get(filename=""):
     start_time = time.time()
-    command_str = f"GET {filename}\r\n\r\n"
     logging.warning(f"Attempting to download: {filename}")
-    hasil = send_command(command_str)
+    full_path = os.path.join(DUMMY_DIR, f"downloaded_{filename}")
+    hasil = send_binary_or_legacy(lambda: download_binary(filename, full_path),
+                                  lambda: remote_get_legacy(filename))
     end_time = time.time()
     if hasil['status'] == 'OK':
-        namafile = hasil['data_namafile']
-        isifile = base64.b64decode(hasil['data_file'])
-        full_path = os.path.join(DUMMY_DIR, f"downloaded_{namafile}")
-        with open(full_path, 'wb') as fp:
-            fp.write(isifile)
         total_time = end_time - start_time
-        file_size = len(isifile)
+        file_size = int(hasil.get('size', 0))
         throughput = file_size / total_time if total_time > 0 else 0
         logging.warning(f"Successfully downloaded: {full_path}")
         logging.warning(f"Downloaded file size: {file_size} bytes ({file_size / (1024 * 1024):.2f}MB)")
@@ -93,20 +439,175 @@ def remote_get(filename=""):
         logging.warning(f"Failed to download {filename}: {hasil['data']}")
         return False, end_time - start_time, 0
 
+# Isi file untuk UPLOAD protokol lama: dibaca lewat jendela mmap dan di-base64 per BASE64_CHUNK_SIZE,
+# tanpa salinan seluruh file. Alfabet base64 tidak memuat spasi/tanda kutip sehingga tidak perlu
+# shlex.quote (file kosong tetap dikirim sebagai '' seperti sebelumnya)
+def legacy_upload_body(full_path):
+    empty = True
+    with open(full_path, 'rb') as fp:
+        for view in mmap_windows(fp):
+            for start in range(0, len(view), BASE64_CHUNK_SIZE):
+                empty = False
+                yield base64.b64encode(view[start:start + BASE64_CHUNK_SIZE])
+    yield (b"''" if empty else b"") + TERMINATOR
+
+# Fungsi untuk operasi UPLOAD dengan protokol lama (JSON + base64)
+def remote_upload_legacy(full_path, filename):
+    return send_command(f"UPLOAD {filename} ", body=lambda: legacy_upload_body(full_path))
+
+def client_id():
+    global client_id_value
+    if client_id_value is None:
+        try:
+            with open(CLIENT_ID_PATH) as fp:
+                client_id_value = fp.read().strip()
+        except OSError:
+            pass
+        if not client_id_value:
+            client_id_value = os.urandom(8).hex()
+            try:
+                with open(CLIENT_ID_PATH, 'w') as fp:
+                    fp.write(client_id_value)
+            except OSError:
+                # Tidak bisa disimpan: tetap unik per proses, upload hanya bisa dilanjutkan oleh proses ini
+                pass
+    return client_id_value
+
+# Upload per chunk yang bisa dilanjutkan: server mencatat chunk yang sudah diterima,
+# percobaan berikutnya (upload_id sama) hanya mengirim chunk yang belum ada, lalu COMMIT.
+# upload_id hanya dari nilai yang tetap (client, nama, ukuran, mtime) sehingga tetap sama setelah restart
+def upload_chunked(full_path, filename, file_size):
+    stat = os.stat(full_path)
+    key = f"{client_id()}:{filename}:{file_size}:{stat.st_mtime_ns}"
+    upload_id = hashlib.sha1(key.encode()).hexdigest()
+    count = max(1, -(-file_size // TRANSFER_CHUNK_SIZE))
+    session = {'name': filename, 'upload_id': upload_id, 'count': count}
+
+    def send_chunk(index):
+        offset = index * TRANSFER_CHUNK_SIZE
+        size = min(TRANSFER_CHUNK_SIZE, file_size - offset)
+        header = {'cmd': 'PUTCHUNK', **session, 'index': index, 'chunk_size': TRANSFER_CHUNK_SIZE, 'size': size}
+        return send_frame_command(header, upload_path=full_path, upload_range=(offset, size),
+                                  checksum=server_checksum())
+
+    for _ in range(CHUNKED_MAX_ROUNDS):
+        status = send_frame_command({'cmd': 'UPLOAD_STATUS', **session})
+        if status['status'] != 'OK':
+            return status
+        with ThreadPoolExecutor(max_workers=transfer_parts) as executor:
+            results = list(executor.map(send_chunk, status['missing']))
+        failed = [hasil for hasil in results if hasil['status'] != 'OK']
+        if failed:
+            return failed[0]
+        hasil = send_frame_command({'cmd': 'COMMIT', **session, 'total': file_size})
+        if hasil['status'] == 'OK' or not hasil.get('missing'):
+            return hasil
+        logging.warning(f"Chunks of {filename} missing at commit, resending {len(hasil['missing'])} chunks")
+    return hasil
+
+def dedup_chunk_size():
+    if server_address not in dedup_chunk_sizes:
+        hasil = send_frame_command({'cmd': 'DEDUP_CHECK'})
+        dedup_chunk_sizes[server_address] = hasil.get('chunk_size', 0) if hasil['status'] == 'OK' else 0
+    return dedup_chunk_sizes[server_address]
+
+def hash_chunks(full_path, chunk_size):
+    hashes = []
+    with open(full_path, 'rb') as fp:
+        while True:
+            data = fp.read(chunk_size)
+            if not data:
+                break
+            hashes.append(hashlib.sha256(data).hexdigest())
+    return hashes
+
+def upload_dedup(full_path, filename, file_size, chunk_size):
+    hashes = hash_chunks(full_path, chunk_size)
+    body = json.dumps(hashes).encode()
+    check = send_frame_command({'cmd': 'DEDUP_CHECK', 'size': len(body)}, body=body)
+    if check['status'] != 'OK':
+        return check
+    logging.warning(f"Dedup upload {filename}: {len(check['missing'])}/{len(hashes)} chunks missing on server")
+
+    def send_blob(index):
+        offset = index * chunk_size
+        size = min(chunk_size, file_size - offset)
+        return send_frame_command({'cmd': 'PUTBLOB', 'hash': hashes[index], 'size': size},
+                                  upload_path=full_path, upload_range=(offset, size))
+
+    with ThreadPoolExecutor(max_workers=transfer_parts) as executor:
+        results = list(executor.map(send_blob, check['missing']))
+    failed = [hasil for hasil in results if hasil['status'] != 'OK']
+    if failed:
+        return failed[0]
+    return send_frame_command({'cmd': 'PUTMANIFEST', 'name': filename, 'total': file_size, 'size': len(body)},
+                              body=body)
+
+# Balasan CODECS (codec kompresi dan algoritma checksum yang didukung) diminta sekali per server
+def server_capabilities():
+    if server_address not in server_capability_lists:
+        hasil = send_frame_command({'cmd': 'CODECS'})
+        server_capability_lists[server_address] = hasil if hasil['status'] == 'OK' else {}
+    return server_capability_lists[server_address]
+
+def server_codecs():
+    return server_capabilities().get('codecs', [])
+
+def server_checksum():
+    return choose_checksum(server_capabilities().get('checksums')) if checksum_enabled else None
+
+# Upload utuh dengan kompresi: file dikompresi bertahap ke file sementara (ukuran body harus
+# diketahui sebelum dikirim), dipakai hanya bila hasilnya cukup kecil
+def upload_compressed(full_path, filename, file_size):
+    codec = choose_codec(server_codecs())
+    if codec is None:
+        return None
+    with open(full_path, 'rb') as fp:
+        if looks_incompressible(fp, file_size):
+            return None
+        fd, temp_path = tempfile.mkstemp(suffix=f".{codec}")
+        os.close(fd)
+        algorithm = server_checksum()
+        digest = StreamChecksum(algorithm)
+        try:
+            size = compress_to_file(fp, temp_path, codec, digest)
+            if size >= file_size * MIN_RATIO:
+                return None
+            logging.warning(f"Uploading {filename} compressed with {codec}: {file_size} -> {size} bytes")
+            # Checksum isi asli sudah dihitung saat kompresi, server memeriksanya setelah dekompresi
+            header = {'cmd': 'UPLOAD', 'name': filename, 'size': size, 'encoding': codec}
+            if algorithm:
+                header['checksum'] = digest.value(algorithm)
+            return send_frame_command(header, upload_path=temp_path)
+        finally:
+            os.remove(temp_path)
+
+def upload_binary(full_path, filename, file_size):
+    if file_size >= DEDUP_MIN_SIZE:
+        chunk_size = dedup_chunk_size()
+        if chunk_size:
+            return upload_dedup(full_path, filename, file_size, chunk_size)
+    if file_size >= CHUNKED_THRESHOLD:
+        return upload_chunked(full_path, filename, file_size)
+    if compression_enabled:
+        hasil = upload_compressed(full_path, filename, file_size)
+        if hasil is not None:
+            return hasil
+    return send_frame_command({'cmd': 'UPLOAD', 'name': filename, 'size': file_size}, upload_path=full_path,
+                              checksum=server_checksum())
+
 # Fungsi untuk operasi UPLOAD
 def remote_upload(filename=""):
     start_time = time.time()
     try:
         full_path = os.path.join(DUMMY_DIR, filename)
-        with open(full_path, 'rb') as fp:
-            filecontent = base64.b64encode(fp.read()).decode()
-        command_str = f"UPLOAD {filename} {shlex.quote(filecontent)}\r\n\r\n"
-        logging.warning(f"Starting upload for: {filename} (size: {os.path.getsize(full_path)} bytes)")
-        hasil = send_command(command_str)
+        file_size = os.path.getsize(full_path)
+        logging.warning(f"Starting upload for: {filename} (size: {file_size} bytes)")
+        hasil = send_binary_or_legacy(lambda: upload_binary(full_path, filename, file_size),
+                                      lambda: remote_upload_legacy(full_path, filename))
         end_time = time.time()
         if hasil['status'] == 'OK':
             logging.warning(f"Upload completed: {filename}")
-            file_size = os.path.getsize(full_path)
             total_time = end_time - start_time
             throughput = file_size / total_time if total_time > 0 else 0
             return True, total_time, throughput
@@ -118,8 +619,150 @@ def remote_upload(filename=""):
         end_time = time.time()
         return False, end_time - start_time, 0
 
-# Fungsi untuk menjalankan operasi (digunakan oleh thread/process) dengan retry
-def run_operation(op_type, filename, success_counter=None, failure_counter=None, max_retries=3):
+# Bagi items menjadi batch menurut jumlah file dan total bobot (panjang nama atau ukuran file)
+def split_batches(items, weight, max_weight):
+    batch, total = [], 0
+    for item in items:
+        size = weight(item)
+        if batch and (len(batch) >= BATCH_MAX_FILES or total + size > max_weight):
+            yield batch
+            batch, total = [], 0
+        batch.append(item)
+        total += size
+    if batch:
+        yield batch
+
+# Jalankan send_batch per batch; server tanpa perintah batch (atau protokol lama) dilayani
+# send_one per file. Hasil digabung: files berisi status per file (dengan name)
+def run_batches(batches, names, send_batch, send_one):
+    files = []
+    for batch in batches:
+        hasil = send_binary_or_legacy(lambda: send_batch(batch), lambda: None)
+        if hasil is None or hasil.get('data') == 'Invalid command':
+            hasil = {'status': 'OK', 'files': [dict(send_one(item), name=name) for item, name in zip(batch, names(batch))]}
+        elif hasil['status'] != 'OK':
+            hasil['files'] = [{'name': name, 'status': 'ERROR', 'data': hasil['data']} for name in names(batch)]
+        files.extend(hasil['files'])
+    failed = [item['name'] for item in files if item['status'] != 'OK']
+    if failed:
+        logging.warning(f"Batch failed for {len(failed)} of {len(files)} files: {', '.join(failed[:10])}")
+    return {'status': 'ERROR' if failed else 'OK', 'files': files, 'failed': len(failed),
+            'data': f"{len(failed)} of {len(files)} files failed"}
+
+def name_batches(names):
+    return split_batches(names, lambda name: len(name.encode()) + 4, BATCH_MAX_NAME_BYTES)
+
+# Download banyak file ke download_dir (nama file sama dengan di server)
+def remote_mget(names, download_dir=DUMMY_DIR):
+    def send_batch(batch):
+        header = {'cmd': 'MGET', 'names': batch}
+        if compression_enabled:
+            header['accept'] = available_codecs()
+        return send_frame_command(header, batch_names=batch, download_dir=download_dir)
+
+    def send_one(filename):
+        full_path = os.path.join(download_dir, filename)
+        return send_binary_or_legacy(lambda: download_binary(filename, full_path),
+                                     lambda: remote_get_legacy(filename, full_path))
+
+    return run_batches(name_batches(names), lambda batch: batch, send_batch, send_one)
+
+# Upload banyak file lokal (paths), nama di server = nama file lokal. File kecil dikirim per batch MPUT,
+# file besar satu per satu lewat upload_binary
+def remote_mput(paths):
+    sizes = {path: os.path.getsize(path) for path in paths}
+    small = [path for path in paths if sizes[path] < BATCH_FILE_LIMIT]
+    large = [[path] for path in paths if sizes[path] >= BATCH_FILE_LIMIT]
+
+    def names(batch):
+        return [os.path.basename(path) for path in batch]
+
+    def send_batch(batch):
+        if sizes[batch[0]] >= BATCH_FILE_LIMIT:
+            return {'status': 'OK', 'files': [dict(send_one(batch[0]), name=names(batch)[0])]}
+        return send_frame_command({'cmd': 'MPUT', 'count': len(batch)}, upload_files=list(zip(names(batch), batch)),
+                                  batch_names=names(batch), checksum=server_checksum())
+
+    def send_one(path):
+        filename = os.path.basename(path)
+        return send_binary_or_legacy(lambda: upload_binary(path, filename, sizes[path]),
+                                     lambda: remote_upload_legacy(path, filename))
+
+    batches = list(split_batches(small, lambda path: sizes[path], BATCH_MAX_BYTES)) + large
+    return run_batches(batches, names, send_batch, send_one)
+
+def remote_mdelete(names):
+    def send_batch(batch):
+        return send_frame_command({'cmd': 'MDELETE', 'names': batch}, batch_names=batch)
+
+    def send_one(filename):
+        return send_binary_or_legacy(lambda: send_frame_command({'cmd': 'DELETE', 'name': filename}),
+                                     lambda: send_command(f"DELETE {filename}\r\n\r\n"))
+
+    return run_batches(name_batches(names), lambda batch: batch, send_batch, send_one)
+
+# Metadata file di server per nama (LIST detail per halaman); protokol lama hanya memberi nama (metadata None)
+def remote_entries(prefix=""):
+    def list_binary():
+        entries, after = {}, None
+        while True:
+            hasil = send_frame_command({'cmd': 'LIST', 'prefix': prefix, 'after': after, 'limit': 1000, 'detail': True})
+            if hasil['status'] != 'OK':
+                return hasil
+            entries.update((entry['name'], entry) for entry in hasil['data'])
+            after = hasil.get('next')
+            if after is None:
+                return {'status': 'OK', 'data': entries}
+
+    def list_legacy():
+        hasil = send_command("LIST\r\n\r\n")
+        if hasil['status'] == 'OK':
+            hasil['data'] = {name: None for name in hasil['data'] if name.startswith(prefix)}
+        return hasil
+
+    return send_binary_or_legacy(list_binary, list_legacy)
+
+# Sinkronkan file biasa di tingkat teratas local_dir (nama diawali prefix) ke server: file yang belum ada,
+# berbeda ukuran, atau lebih baru dari salinan di server diunggah (file kecil per batch).
+# delete=True juga menghapus file di server (dengan prefix yang sama) yang tidak ada di lokal.
+# LIST protokol lama tidak memuat ukuran/mtime, sehingga di mode itu semua file selalu diunggah
+def sync_directory(local_dir, prefix="", delete=False):
+    local = {}
+    for entry in os.scandir(local_dir):
+        if entry.is_file() and entry.name.startswith(prefix) and not entry.name.startswith('.') \
+                and not entry.name.endswith('.part'):
+            local[entry.name] = entry.stat()
+    remote = remote_entries(prefix)
+    if remote['status'] != 'OK':
+        return remote
+    remote = remote['data']
+    changed = sorted(name for name, stat in local.items()
+                     if remote.get(name) is None or remote[name]['size'] != stat.st_size
+                     or stat.st_mtime > remote[name]['mtime'])
+    result = {'status': 'OK', 'uploaded': [], 'deleted': [], 'unchanged': len(local) - len(changed), 'failed': []}
+    if changed:
+        hasil = remote_mput([os.path.join(local_dir, name) for name in changed])
+        result['uploaded'] = [item['name'] for item in hasil['files'] if item['status'] == 'OK']
+        result['failed'] += [item['name'] for item in hasil['files'] if item['status'] != 'OK']
+    extra = sorted(name for name in remote if name not in local)
+    if delete and extra:
+        hasil = remote_mdelete(extra)
+        result['deleted'] = [item['name'] for item in hasil['files'] if item['status'] == 'OK']
+        result['failed'] += [item['name'] for item in hasil['files'] if item['status'] != 'OK']
+    if result['failed']:
+        result['status'] = 'ERROR'
+        result['data'] = f"{len(result['failed'])} files failed to sync"
+    logging.warning(f"Synced {local_dir}: {len(result['uploaded'])} uploaded, {len(result['deleted'])} deleted, "
+                    f"{result['unchanged']} unchanged, {len(result['failed'])} failed")
+    return result
+
+def retry_sleep(attempt):
+    time.sleep(backoff_delay(attempt))
+
+# Fungsi untuk menjalankan operasi (digunakan oleh thread/process) dengan retry.
+# Mengembalikan (berhasil, waktu total termasuk retry, throughput)
+def run_operation(op_type, filename, max_retries=3):
+    start_time = time.time()
     for attempt in range(max_retries):
         try:
             if op_type == "upload":
@@ -128,24 +771,51 @@ def run_operation(op_type, filename, success_counter=None, failure_counter=None,
                 success, total_time, throughput = remote_get(filename)
             else:
                 raise ValueError(f"Unknown operation: {op_type}")
-            
             if success:
-                if success_counter is not None:
-                    success_counter.value += 1  # Hapus get_lock(), gunakan value langsung
-                return total_time, throughput
-            else:
-                if failure_counter is not None and attempt == max_retries - 1:
-                    failure_counter.value += 1  # Hapus get_lock(), gunakan value langsung
-                time.sleep(1)  # Tunggu sebelum mencoba ulang
+                # Throughput dihitung ulang terhadap waktu total supaya retry ikut diperhitungkan
+                elapsed = time.time() - start_time
+                return True, elapsed, throughput * total_time / elapsed if elapsed > 0 else 0
         except Exception as e:
             logging.warning(f"Error in {op_type} for {filename} (attempt {attempt + 1}/{max_retries}): {e}")
-            if failure_counter is not None and attempt == max_retries - 1:
-                failure_counter.value += 1  # Hapus get_lock(), gunakan value langsung
-            time.sleep(1)  # Tunggu sebelum mencoba ulang
-    return time.time() - time.time(), 0
+        if attempt < max_retries - 1:
+            retry_sleep(attempt)  # Tunggu sebelum mencoba ulang, transfer dilanjutkan dari yang sudah terkirim
+    return False, time.time() - start_time, 0
+
+# Stress test mode 'async': semua client berjalan di satu event loop lewat satu AsyncFileClient,
+# koneksi keep-alive dipakai ulang antar operasi. connections membatasi socket yang terbuka
+# (None = satu koneksi per client); retry dan backoff ditangani AsyncFileClient
+async def async_run_operation(client, op_type, filename):
+    start_time = time.time()
+    if op_type == "upload":
+        full_path = os.path.join(DUMMY_DIR, filename)
+        size = os.path.getsize(full_path)
+        hasil = await client.put(full_path, filename)
+    else:
+        hasil = await client.get(filename, os.path.join(DUMMY_DIR, f"downloaded_{filename}"))
+        size = hasil.get('size', 0)
+    total_time = time.time() - start_time
+    if hasil['status'] != 'OK':
+        logging.warning(f"{op_type} failed for {filename}: {hasil['data']}")
+        return False, total_time, 0
+    return True, total_time, size / total_time if total_time > 0 else 0
+
+async def async_stress(op_type, filename, workers, connections=None, checksum=None):
+    async with AsyncFileClient(*server_address, max_connections=connections or workers,
+                               compression=compression_enabled, checksum=checksum) as client:
+        return await asyncio.gather(*[async_run_operation(client, op_type, filename) for _ in range(workers)])
+
+# Persentil dengan interpolasi linear, values boleh tidak terurut
+def percentile(values, p):
+    if not values:
+        return 0
+    values = sorted(values)
+    rank = (len(values) - 1) * p / 100
+    low = int(rank)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (rank - low)
 
 # Fungsi untuk stress test
-def stress_test(mode, workers, op_type, file_size_mb, num_files=1):
+def stress_test(mode, workers, op_type, file_size_mb, num_files=1, connections=None):
     filenames = []
     if op_type == "upload":
         for i in range(num_files):
@@ -157,103 +827,93 @@ def stress_test(mode, workers, op_type, file_size_mb, num_files=1):
                 logging.warning(f"File {full_path} not found. Please create dummy files using create_dummy.py first.")
                 return None
     else:
-        list_result = remote_list()
+        # Cukup satu nama file yang cocok, penyaringan dilakukan di server
+        list_result = remote_list(prefix='dummy_', pattern=f"dummy_{file_size_mb}mb_*", limit=1)
         if list_result and 'data' in list_result:
-            filenames = [f for f in list_result['data'] if f.startswith('dummy_') and str(file_size_mb).lower() + 'mb' in f.lower()]
+            filenames = list_result['data']
             if not filenames:
                 logging.warning(f"No files available for download with size {file_size_mb}MB. Please upload files first.")
                 return None
-            filenames = [filenames[0]] * workers if filenames else []
         else:
             logging.warning("Failed to get file list from server.")
             return None
 
-    manager = Manager()
-    success_counter = manager.Value('i', 0)
-    failure_counter = manager.Value('i', 0)
-
-    total_times = []
-    throughputs = []
-
     start_time = time.time()
     logging.warning(f"Starting {op_type} operation with {workers} {mode} workers for {file_size_mb}MB file(s)")
 
+    # Hasil tiap client dikembalikan langsung (tanpa counter bersama lewat Manager)
     if mode == 'thread':
         with ThreadPoolExecutor(max_workers=workers) as executor:
-            futures = []
-            for _ in range(workers):
-                futures.append(executor.submit(run_operation, op_type, filenames[0], success_counter, failure_counter))
-            for future in futures:
-                total_time, throughput = future.result()
-                total_times.append(total_time)
-                throughputs.append(throughput)
-
+            futures = [executor.submit(run_operation, op_type, filenames[0]) for _ in range(workers)]
+            results = [future.result() for future in futures]
     elif mode == 'process':
+        # Diimpor di sini saja: hanya mode process yang membutuhkannya
+        from multiprocessing import Pool
         with Pool(processes=workers) as pool:
-            results = []
-            for _ in range(workers):
-                results.append(pool.apply_async(run_operation, (op_type, filenames[0], success_counter, failure_counter)))
-            for r in results:
-                total_time, throughput = r.get()
-                total_times.append(total_time)
-                throughputs.append(throughput)
-
+            results = pool.starmap(run_operation, [(op_type, filenames[0])] * workers)
+    elif mode == 'async':
+        checksum = server_checksum() if op_type == "upload" else None
+        results = asyncio.run(async_stress(op_type, filenames[0], workers, connections, checksum))
     else:
-        raise ValueError("Mode must be 'thread' or 'process'")
+        raise ValueError("Mode must be 'thread', 'process' or 'async'")
 
-    end_time = time.time()
-    total_duration = end_time - start_time
-    avg_time = sum(total_times) / len(total_times) if total_times else 0
-    avg_throughput = sum(throughputs) / len(throughputs) if throughputs and sum(throughputs) > 0 else 0
+    total_duration = time.time() - start_time
+    total_times = [total_time for _, total_time, _ in results]
+    latencies = [total_time for success, total_time, _ in results if success]
+    throughputs = [throughput for success, _, throughput in results if success]
+    # Throughput agregat: total byte yang berhasil ditransfer dibagi durasi seluruh run
+    transferred = sum(throughput * total_time for success, total_time, throughput in results if success)
 
     return {
         'total_time': total_duration,
-        'avg_time_per_client': avg_time,
-        'avg_throughput_per_client': avg_throughput,
-        'successful_clients': success_counter.value,
-        'failed_clients': failure_counter.value
+        'avg_time_per_client': sum(total_times) / len(total_times) if total_times else 0,
+        'avg_throughput_per_client': sum(throughputs) / len(throughputs) if throughputs else 0,
+        'aggregate_throughput': transferred / total_duration if total_duration > 0 else 0,
+        'latency_p50': percentile(latencies, 50),
+        'latency_p95': percentile(latencies, 95),
+        'latency_p99': percentile(latencies, 99),
+        'latencies': latencies,
+        'successful_clients': len(latencies),
+        'failed_clients': len(results) - len(latencies)
     }
 
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"{value} must be a positive integer")
+    return number
+
 def main():
-    import logging  # Impor logging di sini untuk memastikan tersedia
+    global server_address
     logging.basicConfig(level=logging.WARNING)
-    if len(sys.argv) != 5:
-        print("Usage: python client.py <mode: thread/process> <workers: 1/5/50> <operation: upload/download> <file_size_mb: 10/50/100>")
-        sys.exit(1)
-
-    mode = sys.argv[1].lower()
-    workers = int(sys.argv[2])
-    op_type = sys.argv[3].lower()
-    file_size_mb = int(sys.argv[4])
-
-    if mode not in ["thread", "process"]:
-        print("Mode must be 'thread' or 'process'")
-        sys.exit(1)
-    if workers not in [1, 5, 50]:
-        print("Workers must be 1, 5, or 50")
-        sys.exit(1)
-    if op_type not in ["upload", "download"]:
-        print("Operation must be 'upload' or 'download'")
-        sys.exit(1)
-    if file_size_mb not in [10, 50, 100]:
-        print("File size must be 10, 50, or 100 MB")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Stress test client untuk file server")
+    parser.add_argument("mode", choices=["thread", "process", "async"])
+    parser.add_argument("workers", type=positive_int, help="jumlah client bersamaan")
+    parser.add_argument("operation", choices=["upload", "download"])
+    parser.add_argument("file_size_mb", type=positive_int, help="ukuran file dummy (MB)")
+    parser.add_argument("--host", default=server_address[0])
+    parser.add_argument("--port", type=int, default=server_address[1])
+    parser.add_argument("--connections", type=positive_int, default=None,
+                        help="mode async: batas koneksi terbuka bersamaan (default satu per client)")
+    args = parser.parse_args()
+    server_address = (args.host, args.port)
 
     # Kirim konfigurasi ke server (meskipun diabaikan, untuk kompatibilitas)
-    send_config(mode, workers)
+    send_config(args.mode, args.workers)
 
-    num_files = 1
-    result = stress_test(mode, workers, op_type, file_size_mb, num_files)
+    result = stress_test(args.mode, args.workers, args.operation, args.file_size_mb, connections=args.connections)
     if result:
-        print(f"Task: {op_type}")
-        print(f"File Size: {file_size_mb}MB")
-        print(f"Mode: {mode}")
-        print(f"Workers: {workers}")
+        print(f"Task: {args.operation}")
+        print(f"File Size: {args.file_size_mb}MB")
+        print(f"Mode: {args.mode}")
+        print(f"Workers: {args.workers}")
         print(f"Total Time: {result['total_time']:.2f} seconds")
         print(f"Average Time per Client: {result['avg_time_per_client']:.2f} seconds")
+        print(f"Latency p50/p95/p99: {result['latency_p50']:.2f}/{result['latency_p95']:.2f}/{result['latency_p99']:.2f} seconds")
         print(f"Average Throughput per Client: {result['avg_throughput_per_client']:.2f} bytes/second")
+        print(f"Aggregate Throughput: {result['aggregate_throughput'] / (1024 * 1024):.2f} MB/second")
         print(f"Successful Clients: {result['successful_clients']}")
         print(f"Failed Clients: {result['failed_clients']}")
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,241 @@
+import os
+import math
+import zlib
+import hashlib
+import threading
+from collections import Counter
+from transport_ets import CHUNK_SIZE, ProtocolError
+from time import perf_counter
+from metrics_ets import timed, add_phase
+
+# Codec opsional, dipakai hanya bila modulnya terpasang
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+try:
+    import lz4.frame as lz4frame
+except ImportError:
+    lz4frame = None
+
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 3
+# Sampel untuk memperkirakan entropi (bit per byte); data acak/sudah terkompresi mendekati 8
+SAMPLE_SIZE = 64 * 1024  # 64 KB
+ENTROPY_THRESHOLD = 7.5
+# File kecil tidak dikompresi, hasil kompresi dipakai hanya bila ukurannya < MIN_RATIO x aslinya
+MIN_COMPRESS_SIZE = 4096
+MIN_RATIO = 0.9
+# Jumlah lock CompressedBlobStore (lock striping per nama file)
+LOCK_STRIPES = 64
+
+
+# Urutan preferensi codec yang tersedia di proses ini
+def available_codecs():
+    codecs = []
+    if zstandard is not None:
+        codecs.append("zstd")
+    if lz4frame is not None:
+        codecs.append("lz4")
+    codecs.append("zlib")
+    return codecs
+
+
+# Codec pertama (urutan preferensi lokal) yang juga diterima pihak lain, None bila tidak ada
+def choose_codec(accepted):
+    for codec in available_codecs():
+        if codec in (accepted or ()):
+            return codec
+    return None
+
+
+class Lz4Compressor:
+    def __init__(self):
+        self.compressor = lz4frame.LZ4FrameCompressor()
+        self.started = False
+
+    def compress(self, data):
+        prefix = b"" if self.started else self.compressor.begin()
+        self.started = True
+        return prefix + self.compressor.compress(data)
+
+    def flush(self):
+        prefix = b"" if self.started else self.compressor.begin()
+        self.started = True
+        return prefix + self.compressor.flush()
+
+
+def make_compressor(codec):
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+    if codec == "lz4":
+        return Lz4Compressor()
+    if codec == "zlib":
+        return zlib.compressobj(ZLIB_LEVEL)
+    raise ValueError(f"Unsupported encoding {codec}")
+
+
+# Decoder bertahap dengan antarmuka sama untuk semua codec: feed() dan finish() menghasilkan
+# potongan data asli. Untuk zlib keluaran per potongan dibatasi CHUNK_SIZE sehingga body kecil
+# yang mengembang sangat besar tidak ditampung sekaligus di memori
+class StreamDecoder:
+    def __init__(self, codec):
+        self.codec = codec
+        if codec == "zstd":
+            self.decoder = zstandard.ZstdDecompressor().decompressobj()
+        elif codec == "lz4":
+            self.decoder = lz4frame.LZ4FrameDecompressor()
+        elif codec == "zlib":
+            self.decoder = zlib.decompressobj()
+        else:
+            raise ValueError(f"Unsupported encoding {codec}")
+
+    def feed(self, data):
+        if self.codec != "zlib":
+            decoded = self.decoder.decompress(data)
+            if decoded:
+                yield decoded
+            return
+        while data:
+            decoded = self.decoder.decompress(data, CHUNK_SIZE)
+            if decoded:
+                yield decoded
+            data = self.decoder.unconsumed_tail
+
+    def finish(self):
+        if self.codec == "zlib":
+            decoded = self.decoder.flush()
+            if decoded:
+                yield decoded
+            if not self.decoder.eof:
+                raise ProtocolError("Compressed body is incomplete")
+        elif self.codec == "lz4" and not self.decoder.eof:
+            raise ProtocolError("Compressed body is incomplete")
+
+
+# Waktu yang dihabiskan decoder dicatat ke fase decode, per potongan agar memori tetap kecil
+def timed_pieces(pieces):
+    while True:
+        started = perf_counter()
+        piece = next(pieces, None)
+        add_phase("decode", perf_counter() - started)
+        if piece is None:
+            return
+        yield piece
+
+
+def decompress_stream(chunks, codec):
+    decoder = StreamDecoder(codec)
+    for chunk in chunks:
+        yield from timed_pieces(decoder.feed(chunk))
+    yield from timed_pieces(decoder.finish())
+
+
+def byte_entropy(data):
+    if not data:
+        return 0.0
+    total = len(data)
+    return -sum(count / total * math.log2(count / total) for count in Counter(data).values())
+
+
+# Perkiraan murah apakah kompresi percuma: sampel di awal, tengah dan akhir file
+def looks_incompressible(fp, size):
+    if size < MIN_COMPRESS_SIZE:
+        return True
+    samples = []
+    for offset in sorted({0, max(0, size // 2 - SAMPLE_SIZE // 2), max(0, size - SAMPLE_SIZE)}):
+        fp.seek(offset)
+        samples.append(fp.read(SAMPLE_SIZE))
+    fp.seek(0)
+    return byte_entropy(b"".join(samples)) > ENTROPY_THRESHOLD
+
+
+# Kompresi bertahap dari file object ke dest_path, mengembalikan ukuran hasil
+# checksum (opsional, StreamChecksum) ikut dihitung dari isi asli selama kompresi
+def compress_to_file(src, dest_path, codec, checksum=None):
+    compressor = make_compressor(codec)
+    with open(dest_path, 'wb') as out:
+        while True:
+            chunk = src.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            if checksum is not None:
+                checksum.update(chunk)
+            out.write(compressor.compress(chunk))
+        out.write(compressor.flush())
+        return out.tell()
+
+
+# Penyimpanan hasil kompresi file untuk GET, sehingga file populer tidak dikompresi ulang setiap
+# kali diminta. Nama blob memuat hash nama file + inode/ukuran/mtime_ns file asli, jadi blob
+# versi lama otomatis tidak terpakai begitu file berubah (juga dari proses worker lain).
+# File yang ternyata tidak bisa dikompresi ditandai dengan file .skip kosong.
+class CompressedBlobStore:
+    def __init__(self, root, temp_dir):
+        self.root = root
+        self.temp_dir = temp_dir
+        os.makedirs(root, exist_ok=True)
+        # Lock striping: hanya satu thread yang mengompresi/menghapus blob file yang sama,
+        # jumlah lock tetap berapa pun banyaknya nama file
+        self.locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+    # Blob satu file disimpan di subdirektori sendiri (sha1 nama file) sehingga menghapus versi lama
+    # hanya membaca direktori file itu, bukan seluruh .compressed
+    def blob_dir(self, filename):
+        return os.path.join(self.root, hashlib.sha1(filename.encode()).hexdigest())
+
+    def blob_path(self, filename, stat, codec):
+        version = f"{stat.st_ino}-{stat.st_size}-{stat.st_mtime_ns}"
+        return os.path.join(self.blob_dir(filename), f"{version}.{codec}")
+
+    def lock_for(self, filename):
+        return self.locks[zlib.crc32(filename.encode()) % LOCK_STRIPES]
+
+    # Kembalikan (file object blob, ukuran blob), atau None bila file sebaiknya dikirim apa adanya
+    def open(self, filename, fp, stat, codec):
+        path = self.blob_path(filename, stat, codec)
+        with self.lock_for(filename):
+            if os.path.exists(path + ".skip"):
+                return None
+            try:
+                blob = open(path, 'rb')
+                return blob, os.fstat(blob.fileno()).st_size
+            except FileNotFoundError:
+                pass
+            self.remove_blobs(filename)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if looks_incompressible(fp, stat.st_size):
+                open(path + ".skip", 'wb').close()
+                return None
+            # os.urandom, bukan uuid: modul uuid memuat platform dan memperlambat start client
+            temp_path = os.path.join(self.temp_dir, f"{os.urandom(16).hex()}.{codec}.tmp")
+            with timed("decode"):
+                size = compress_to_file(fp, temp_path, codec)
+            fp.seek(0)
+            if size >= stat.st_size * MIN_RATIO:
+                os.remove(temp_path)
+                open(path + ".skip", 'wb').close()
+                return None
+            os.replace(temp_path, path)
+            blob = open(path, 'rb')
+            return blob, size
+
+    def remove(self, filename):
+        with self.lock_for(filename):
+            self.remove_blobs(filename)
+
+    def remove_blobs(self, filename):
+        directory = self.blob_dir(filename)
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return
+        for name in names:
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass
+        try:
+            os.rmdir(directory)
+        except OSError:
+            pass
@@ -0,0 +1,222 @@
+import os
+import time
+import random
+import logging
+import threading
+from transport_ets import (MAGIC, CHUNK_SIZE, ProtocolError, NotBinaryError, ConnectionPool, encode_header,
+                           read_frame_header, read_json_body, mmap_windows)
+from compression_ets import available_codecs, decompress_stream
+from checksum_ets import StreamChecksum, ChecksumMismatch, checksum_for, split_checksum
+
+# Library client protokol biner yang bisa dipakai ulang (stress test, aplikasi lain), tanpa state global:
+# setiap FileClient/AsyncFileClient punya alamat server, pool koneksi keep-alive, timeout dan retry sendiri.
+#   FileClient       blocking, aman dipakai bersama banyak thread
+#   AsyncFileClient  asyncio (async_fileclient_ets, terpisah supaya modul ini tidak mengimpor asyncio),
+#                    ribuan operasi bersamaan dari satu proses; max_connections membatasi
+#                    socket yang terbuka sehingga operasi lain menunggu koneksi dari pool
+# Download ditulis bertahap ke file .part lalu rename, isi file tidak pernah ditampung utuh di memori.
+# Semua method mengembalikan dict balasan server (status/data); error jaringan diulang dengan exponential
+# backoff sampai max_retries percobaan, BUSY diulang setelah retry_after dari server.
+# Download diperiksa dengan checksum dari server (bila ada) sebelum rename; checksum=<algoritma> membuat upload
+# membawa checksum yang dihitung sambil mengirim (algoritma harus didukung server, lihat CODECS).
+# Hanya mode biner (server protokol lama dilayani fungsi-fungsi di client_ets).
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_MAX_RETRIES = 3
+RETRY_BASE_DELAY = 0.2
+RETRY_MAX_DELAY = 5.0
+BUSY_MAX_RETRIES = 10
+
+# Error yang layak diulang: koneksi putus/timeout, frame terpotong (asyncio.IncompleteReadError adalah
+# EOFError), isi download rusak
+RETRYABLE_ERRORS = (OSError, ProtocolError, EOFError, ChecksumMismatch)
+
+
+def backoff_delay(attempt):
+    delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** attempt))
+    return delay * random.uniform(0.5, 1.0)
+
+
+# Jitter supaya client yang ditolak BUSY tidak kembali bersamaan
+def busy_delay(hasil):
+    delay = min(RETRY_MAX_DELAY, float(hasil.get('retry_after', RETRY_BASE_DELAY)))
+    return delay * random.uniform(1.0, 1.5)
+
+
+# Satu request lewat koneksi dari pool: exchange(connection) mengembalikan balasan server.
+# Koneksi dikembalikan ke pool kecuali error atau BUSY (server menutup koneksi setelah BUSY)
+def exchange_pooled(pool, exchange):
+    while True:
+        connection = pool.acquire()
+        try:
+            hasil = exchange(connection)
+        except ConnectionError:
+            connection.close()
+            # Koneksi lama dari pool mungkin sudah ditutup server karena idle, ulangi dengan koneksi baru
+            if connection.reused:
+                continue
+            raise
+        except BaseException:
+            connection.close()
+            raise
+        if hasil['status'] == 'BUSY':
+            connection.close()
+        else:
+            pool.release(connection)
+        return hasil
+
+
+def error_result(error):
+    return {'status': 'ERROR', 'data': str(error)}
+
+
+def list_header(prefix, pattern, limit, after, detail):
+    return {'cmd': 'LIST', 'prefix': prefix, 'pattern': pattern, 'limit': limit, 'after': after, 'detail': detail}
+
+
+def part_path(path, owner):
+    return f"{path}.{os.getpid()}-{owner}.part"
+
+
+def remove_quietly(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+# Frame setelah body UPLOAD/PUTCHUNK berisi nilai checksum yang dihitung selama body dikirim
+def trailer_frame(value):
+    return encode_header({'checksum': value, 'size': 0})
+
+
+# Kirim isi file (atau range-nya) lewat jendela mmap sambil menghitung checksum, tanpa membaca file dua kali
+def send_hashed(sock, path, algorithm, offset=0, count=None):
+    checksum = StreamChecksum(algorithm)
+    with open(path, 'rb') as fp:
+        for view in mmap_windows(fp, offset, count):
+            checksum.update(view)
+            sock.sendall(view)
+    return checksum.value(algorithm)
+
+
+def read_hashed(fp, checksum):
+    chunk = fp.read(CHUNK_SIZE)
+    checksum.update(chunk)
+    return chunk
+
+
+def write_hashed(fp, checksum, data):
+    if checksum is not None:
+        checksum.update(data)
+    fp.write(data)
+
+
+def upload_header(path, name, checksum):
+    header = {'cmd': 'UPLOAD', 'name': name or os.path.basename(path), 'size': os.path.getsize(path)}
+    if checksum:
+        header['checksum'] = checksum
+    return header
+
+
+class FileClient:
+    def __init__(self, host='127.0.0.1', port=8686, timeout=DEFAULT_TIMEOUT, max_retries=DEFAULT_MAX_RETRIES,
+                 max_idle=64, compression=True, checksum=None):
+        self.address = (host, port)
+        self.max_retries = max_retries
+        self.compression = compression
+        self.checksum = checksum and split_checksum(checksum)[0]
+        self.pool = ConnectionPool(self.address, max_idle=max_idle, timeout=timeout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.pool.close()
+
+    def list(self, prefix="", pattern=None, limit=None, after=None, detail=False):
+        return self.request(list_header(prefix, pattern, limit, after, detail))
+
+    def delete(self, name):
+        return self.request({'cmd': 'DELETE', 'name': name})
+
+    def stats(self):
+        return self.request({'cmd': 'STATS'})
+
+    # Unggah file lokal path dengan nama name (default nama file lokal)
+    def put(self, path, name=None):
+        return self.request(upload_header(path, name, self.checksum), upload_path=path)
+
+    # Unduh name ke path (default nama yang sama di direktori kerja)
+    def get(self, name, path=None):
+        header = {'cmd': 'GET', 'name': name}
+        if self.compression:
+            header['accept'] = available_codecs()
+        return self.request(header, download_path=path or os.path.basename(name))
+
+    def request(self, header, upload_path=None, download_path=None):
+        attempt = busy_retries = 0
+        while True:
+            try:
+                hasil = self.exchange(header, upload_path, download_path)
+            except NotBinaryError as e:
+                return error_result(e)
+            except RETRYABLE_ERRORS as e:
+                attempt += 1
+                if attempt >= self.max_retries:
+                    logging.warning(f"{header['cmd']} failed after {attempt} attempts: {e}")
+                    return error_result(e)
+                time.sleep(backoff_delay(attempt - 1))
+                continue
+            if hasil['status'] != 'BUSY' or busy_retries >= BUSY_MAX_RETRIES:
+                return hasil
+            busy_retries += 1
+            time.sleep(busy_delay(hasil))
+
+    def exchange(self, header, upload_path=None, download_path=None):
+        return exchange_pooled(self.pool, lambda connection:
+                               self.exchange_on(connection, header, upload_path, download_path))
+
+    def exchange_on(self, connection, header, upload_path, download_path):
+        try:
+            connection.sock.sendall(encode_header(header))
+            if upload_path and header.get('checksum'):
+                value = send_hashed(connection.sock, upload_path, header['checksum'])
+                connection.sock.sendall(trailer_frame(value))
+            elif upload_path:
+                with open(upload_path, 'rb') as fp:
+                    connection.sock.sendfile(fp)
+        except OSError:
+            # Server bisa menutup koneksi di tengah upload (misalnya BUSY), cek dulu balasannya
+            pass
+        reader = connection.reader
+        first = reader.peek(len(MAGIC))
+        if not first:
+            raise ConnectionError("Connection closed by server")
+        if first != MAGIC:
+            raise NotBinaryError("Server does not support binary frames")
+        hasil = read_frame_header(reader)
+        chunks = reader.iter_exact(int(hasil.get('size', 0)))
+        if hasil.get('content') == 'json':
+            return read_json_body(hasil, b"".join(chunks))
+        if download_path is None or hasil['status'] != 'OK':
+            for _ in chunks:
+                pass
+            return hasil
+        if hasil.get('encoding'):
+            chunks = decompress_stream(chunks, hasil['encoding'])
+        checksum = checksum_for(hasil.get('checksum'))
+        temp_path = part_path(download_path, threading.get_ident())
+        try:
+            with open(temp_path, 'wb') as fp:
+                for chunk in chunks:
+                    write_hashed(fp, checksum, chunk)
+            if checksum is not None:
+                checksum.verify(hasil['checksum'], download_path)
+            os.replace(temp_path, download_path)
+        finally:
+            remove_quietly(temp_path)
+        hasil['size'] = hasil.get('total', hasil.get('size', 0))
+        return hasil
@@ -0,0 +1,116 @@
+import os
+import bisect
+import fnmatch
+import logging
+import threading
+import time
+
+
+# Index metadata file di memori (nama, ukuran, mtime, checksum opsional) supaya LIST
+# tidak perlu os.listdir + stat setiap kali. Diperbarui langsung oleh UPLOAD/DELETE;
+# refresh_interval > 0 menyalakan thread yang memantau mtime direktori (perubahan dari
+# luar server atau dari proses worker lain) dan menyinkronkan index bila berubah.
+# storage adalah backend penyimpanan (storage_ets) yang menyediakan scan(), stat() dan watch_paths().
+class FileIndex:
+    def __init__(self, storage, refresh_interval=0):
+        self.storage = storage
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.names = []  # nama file terurut, untuk filter prefix dan pagination
+        self.dir_mtime = None
+        self.refresh()
+        if refresh_interval > 0:
+            threading.Thread(target=self.watch, args=(refresh_interval,), name="index-refresh", daemon=True).start()
+
+    @staticmethod
+    def make_entry(name, stat, checksum=None):
+        return {"name": name, "size": stat.st_size, "mtime": stat.st_mtime, "inode": stat.st_ino, "checksum": checksum}
+
+    # Sinkronkan index dengan isi direktori. File yang inode-nya sama tidak di-stat ulang,
+    # karena setiap upload menulis file baru lalu rename (inode selalu berganti)
+    def refresh(self):
+        self.dir_mtime = self.watch_state()
+        with self.lock:
+            known = dict(self.entries)
+        entries = {}
+        for name, inode, stat in self.storage.scan():
+            old = known.get(name)
+            if old is not None and old["inode"] == inode:
+                entries[name] = old
+            else:
+                entries[name] = self.make_entry(name, stat(), self.storage.checksum(name))
+        with self.lock:
+            self.entries = entries
+            self.names = sorted(entries)
+
+    # mtime semua direktori yang dipantau (beberapa bila storage di-shard)
+    def watch_state(self):
+        return tuple(os.stat(path).st_mtime_ns for path in self.storage.watch_paths())
+
+    def watch(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                if self.watch_state() != self.dir_mtime:
+                    self.refresh()
+            except OSError as e:
+                logging.warning(f"Index refresh failed: {str(e)}")
+
+    # inode: versi file yang checksum-nya dihitung. Bila file sudah diganti upload lain sebelum index
+    # diperbarui, checksum diambil dari file yang sekarang ada (milik upload pemenang)
+    def update(self, name, checksum=None, inode=None):
+        stat = self.storage.stat(name)
+        if inode is not None and stat.st_ino != inode:
+            checksum = self.storage.checksum(name)
+        entry = self.make_entry(name, stat, checksum)
+        with self.lock:
+            if name not in self.entries:
+                bisect.insort(self.names, name)
+            self.entries[name] = entry
+
+    def remove(self, name):
+        with self.lock:
+            if self.entries.pop(name, None) is not None:
+                del self.names[bisect.bisect_left(self.names, name)]
+
+    def get(self, name):
+        with self.lock:
+            return self.entries.get(name)
+
+    # prefix dan pattern (glob) menyaring nama, after + limit untuk pagination:
+    # halaman berikutnya diminta dengan after = nilai "next" dari halaman sebelumnya
+    def list(self, prefix="", pattern=None, after=None, limit=None, detail=False):
+        if pattern:
+            # Bagian literal di depan glob dipakai sebagai prefix agar pencarian tidak memindai semua nama
+            literal = pattern
+            for i, ch in enumerate(pattern):
+                if ch in "*?[":
+                    literal = pattern[:i]
+                    break
+            if literal.startswith(prefix):
+                prefix = literal
+            elif not prefix.startswith(literal):
+                return [], None
+        if limit is not None:
+            limit = max(1, limit)
+        with self.lock:
+            start = bisect.bisect_left(self.names, prefix)
+            if after is not None:
+                start = max(start, bisect.bisect_right(self.names, after))
+            result = []
+            next_name = None
+            for i in range(start, len(self.names)):
+                name = self.names[i]
+                if not name.startswith(prefix):
+                    break
+                if pattern and not fnmatch.fnmatchcase(name, pattern):
+                    continue
+                if limit is not None and len(result) >= limit:
+                    next_name = result[-1]["name"] if detail else result[-1]
+                    break
+                result.append(self.public_entry(self.entries[name]) if detail else name)
+            return result, next_name
+
+    @staticmethod
+    def public_entry(entry):
+        return {key: entry[key] for key in ("name", "size", "mtime", "checksum")}
@@ -1,16 +1,21 @@
 import os
 import json
 import base64
-from glob import glob
+from glob import glob, escape as glob_escape
 
 
+# Semua path dihitung dari root secara eksplisit (tanpa os.chdir), sehingga beberapa
+# FileInterface dengan root berbeda bisa dipakai dalam satu proses
 class FileInterface:
-    def __init__(self):
-        os.chdir('files/')
+    def __init__(self, root='files'):
+        self.root = os.path.abspath(root)
+
+    def path(self, filename):
+        return os.path.join(self.root, filename)
 
     def list(self, params=[]):
         try:
-            filelist = glob('*.*')
+            filelist = [os.path.basename(path) for path in glob(os.path.join(glob_escape(self.root), '*.*'))]
             return dict(status='OK', data=filelist)
         except Exception as e:
             return dict(status='ERROR', data=str(e))
@@ -20,7 +25,7 @@ class FileInterface:
             filename = params[0]
             if filename == '':
                 return None
-            with open(f"{filename}", 'rb') as fp:
+            with open(self.path(filename), 'rb') as fp:
                 isifile = base64.b64encode(fp.read()).decode()
             return dict(status='OK', data_namafile=filename, data_file=isifile)
         except Exception as e:
@@ -32,7 +37,7 @@ class FileInterface:
             filecontent = params[1]
             if filename == '':
                 return dict(status='ERROR', data='Filename cannot be empty')
-            with open(f"{filename}", 'wb') as fp:
+            with open(self.path(filename), 'wb') as fp:
                 fp.write(base64.b64decode(filecontent))
             return dict(status='OK', data=f"File {filename} uploaded successfully")
         except Exception as e:
@@ -43,9 +48,9 @@ class FileInterface:
             filename = params[0]
             if filename == '':
                 return dict(status='ERROR', data='Filename cannot be empty')
-            if not os.path.exists(filename):
+            if not os.path.exists(self.path(filename)):
                 return dict(status='ERROR', data=f"File {filename} does not exist")
-            os.remove(filename)
+            os.remove(self.path(filename))
             return dict(status='OK', data=f"File {filename} deleted successfully")
         except Exception as e:
             return dict(status='ERROR', data=str(e))
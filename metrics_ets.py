@@ -0,0 +1,179 @@
+import os
+import time
+import bisect
+import threading
+import contextvars
+from time import perf_counter
+
+# Metrik server di memori proses (tanpa IPC): jumlah request per perintah, histogram latency,
+# byte masuk/keluar, koneksi aktif, antrean executor dan pembagian waktu per fase:
+#   recv   menunggu/menerima data dari socket
+#   decode CPU untuk parsing header, base64 dan kompresi (encode maupun decode)
+#   disk   baca/tulis storage, index dan file sementara
+#   send   mengirim data ke socket (termasuk sendfile)
+# Fase dicatat ke request yang sedang berjalan lewat contextvar, sehingga bekerja untuk thread
+# worker maupun task asyncio; di luar request (misalnya di client) pencatatan diabaikan.
+PHASES = ("recv", "decode", "disk", "send")
+# Batas atas bucket histogram latency (detik)
+LATENCY_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float("inf"))
+
+# Key metrik per perintah hanya dari daftar tetap ini; perintah lain dari client dicatat sebagai INVALID
+# sehingga jumlah key (dan ukuran STATS) tidak bisa ditambah client
+BINARY_COMMANDS = ("CONFIG", "LIST", "GET", "UPLOAD", "CODECS", "MGET", "MPUT", "MDELETE", "DELETE", "STATS",
+                   "PUTCHUNK", "UPLOAD_STATUS", "COMMIT", "DEDUP_CHECK", "PUTBLOB", "PUTMANIFEST")
+LEGACY_COMMANDS = ("UPLOAD", "CONFIG", "LIST", "GET", "DELETE", "STATS")
+COMMANDS = frozenset(BINARY_COMMANDS + tuple(f"LEGACY_{command}" for command in LEGACY_COMMANDS) +
+                     ("LEGACY", "BUSY", "UNKNOWN"))
+
+current_request = contextvars.ContextVar("current_request", default=None)
+
+
+class RequestStats:
+    __slots__ = ("command", "started", "phases", "bytes_in", "bytes_out")
+
+    def __init__(self):
+        self.command = "UNKNOWN"
+        self.started = perf_counter()
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+
+def set_command(command):
+    stats = current_request.get()
+    if stats is not None:
+        stats.command = command if command in COMMANDS else "INVALID"
+
+
+def add_phase(phase, seconds):
+    stats = current_request.get()
+    if stats is not None:
+        stats.phases[phase] += seconds
+
+
+def record_recv(size, seconds):
+    stats = current_request.get()
+    if stats is not None:
+        stats.phases["recv"] += seconds
+        stats.bytes_in += size
+
+
+def record_send(size, seconds):
+    stats = current_request.get()
+    if stats is not None:
+        stats.phases["send"] += seconds
+        stats.bytes_out += size
+
+
+# Context manager ringan untuk mengukur satu blok ke fase tertentu
+class timed:
+    __slots__ = ("phase", "started")
+
+    def __init__(self, phase):
+        self.phase = phase
+
+    def __enter__(self):
+        self.started = perf_counter()
+
+    def __exit__(self, *exc):
+        add_phase(self.phase, perf_counter() - self.started)
+
+
+class CommandMetrics:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.latency_sum = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    # Perkiraan persentil dari histogram (batas atas bucket)
+    def percentile(self, p):
+        if not self.count:
+            return 0
+        target = self.count * p / 100
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.buckets):
+            seen += count
+            if seen >= target:
+                return bound
+        return LATENCY_BUCKETS[-1]
+
+    def snapshot(self):
+        return {"count": self.count, "errors": self.errors,
+                "latency_avg": self.latency_sum / self.count if self.count else 0,
+                "latency_p50": self.percentile(50), "latency_p95": self.percentile(95),
+                "latency_p99": self.percentile(99),
+                "latency_buckets": {("+Inf" if bound == float("inf") else f"{bound:g}"): count
+                                    for bound, count in zip(LATENCY_BUCKETS, self.buckets)},
+                "phases": {phase: round(seconds, 6) for phase, seconds in self.phases.items()},
+                "bytes_in": self.bytes_in, "bytes_out": self.bytes_out}
+
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.commands = {}
+        self.active_connections = 0
+        self.total_connections = 0
+        self.queued = 0  # request menunggu thread worker
+        self.in_progress = 0  # request sedang diproses
+        self.io_inflight = 0  # operasi disk di pool I/O (engine asyncio)
+
+    def adjust(self, name, delta):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + delta)
+
+    def connection_opened(self):
+        with self.lock:
+            self.active_connections += 1
+            self.total_connections += 1
+
+    def connection_closed(self):
+        self.adjust("active_connections", -1)
+
+    # Mulai mencatat satu request di context saat ini; pasangannya finish()
+    def begin(self):
+        stats = RequestStats()
+        current_request.set(stats)
+        self.adjust("in_progress", 1)
+        return stats
+
+    # Batalkan request yang ternyata tidak ada (koneksi keep-alive ditutup client)
+    def cancel(self):
+        current_request.set(None)
+        self.adjust("in_progress", -1)
+
+    def finish(self, stats, success):
+        current_request.set(None)
+        latency = perf_counter() - stats.started
+        with self.lock:
+            self.in_progress -= 1
+            metrics = self.commands.get(stats.command)
+            if metrics is None:
+                metrics = self.commands[stats.command] = CommandMetrics()
+            metrics.count += 1
+            if not success:
+                metrics.errors += 1
+            metrics.latency_sum += latency
+            metrics.buckets[bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+            for phase, seconds in stats.phases.items():
+                metrics.phases[phase] += seconds
+            metrics.bytes_in += stats.bytes_in
+            metrics.bytes_out += stats.bytes_out
+
+    def snapshot(self):
+        with self.lock:
+            commands = {command: metrics.snapshot() for command, metrics in self.commands.items()}
+            phases = {phase: round(sum(metrics.phases[phase] for metrics in self.commands.values()), 6)
+                      for phase in PHASES}
+            return {"pid": os.getpid(), "uptime": round(time.time() - self.started, 3),
+                    "connections": {"active": self.active_connections, "total": self.total_connections},
+                    "queue": {"queued": self.queued, "in_progress": self.in_progress,
+                              "io_inflight": self.io_inflight},
+                    "bytes": {"in": sum(metrics["bytes_in"] for metrics in commands.values()),
+                              "out": sum(metrics["bytes_out"] for metrics in commands.values())},
+                    "phases": phases, "commands": commands}
@@ -0,0 +1,100 @@
+import re
+from collections import namedtuple
+from transport_ets import MAX_HEADER_SIZE, ProtocolError
+
+# Parser request protokol lama (teks): "CMD arg1 arg2 ... [body]". Dipakai server_ets,
+# async_server_ets dan protocol_ets. Hanya token header yang dipisah dan di-decode; body
+# (isi file base64 pada UPLOAD) tidak pernah disalin ke string atau di-log, melainkan
+# dikembalikan sebagai memoryview ke data asli (potongan pertama) lalu potongan berikutnya apa adanya.
+
+# Perintah yang membawa body: nama perintah -> jumlah argumen sebelum body
+BODY_COMMANDS = {"UPLOAD": 1}
+TOKEN = re.compile(rb"\S+")
+
+Request = namedtuple("Request", ["command", "args", "body"])
+
+
+class RequestParser:
+    def __init__(self, max_header=MAX_HEADER_SIZE):
+        self.max_header = max_header
+        self.pending = b""  # token yang mungkin terpotong di akhir potongan sebelumnya
+        self.header_size = 0
+        self.tokens = []
+
+    # Kembalikan None selama header belum lengkap, atau memoryview sisa potongan (awal body)
+    # begitu semua token header perintah yang membawa body sudah terbaca
+    def feed(self, data, final=False):
+        view = memoryview(self.pending + data if self.pending else data)
+        self.pending = b""
+        pos = 0
+        while True:
+            match = TOKEN.search(view, pos)
+            if match is None:
+                break
+            # Token yang menyentuh akhir potongan bisa berlanjut di potongan berikutnya
+            if match.end() == len(view) and not final:
+                self.pending = bytes(view[match.start():])
+                break
+            self.tokens.append(bytes(view[match.start():match.end()]).decode())
+            pos = match.end()
+            nargs = BODY_COMMANDS.get(self.tokens[0].upper())
+            if nargs is not None and len(self.tokens) > nargs:
+                # Body dimulai setelah satu karakter pemisah
+                return view[pos + 1:]
+        self.header_size += pos if self.pending else len(view)
+        if self.header_size + len(self.pending) > self.max_header:
+            raise ProtocolError("Header too large")
+        return None
+
+    def finish(self):
+        if self.pending:
+            self.feed(b"", final=True)
+
+    def request(self, body):
+        command = self.tokens[0] if self.tokens else ""
+        return Request(command, self.tokens[1:], body)
+
+
+def chain_body(rest, chunks):
+    if rest:
+        yield rest
+    yield from chunks
+
+
+async def chain_body_async(rest, chunks):
+    if rest:
+        yield rest
+    async for chunk in chunks:
+        yield chunk
+
+
+# Parse request dari iterator potongan (misalnya SocketReader.iter_until). Header dibaca sampai lengkap,
+# body berupa iterator yang melanjutkan iterator potongan yang sama sehingga tetap dibaca bertahap
+def parse_stream(chunks, max_header=MAX_HEADER_SIZE):
+    parser = RequestParser(max_header)
+    chunks = iter(chunks)
+    for chunk in chunks:
+        rest = parser.feed(chunk)
+        if rest is not None:
+            return parser.request(chain_body(rest, chunks))
+    parser.finish()
+    return parser.request(iter(()))
+
+
+async def parse_stream_async(chunks, max_header=MAX_HEADER_SIZE):
+    parser = RequestParser(max_header)
+    async for chunk in chunks:
+        rest = parser.feed(chunk)
+        if rest is not None:
+            return parser.request(chain_body_async(rest, chunks))
+    parser.finish()
+    return parser.request(chain_body_async(b"", chunks))
+
+
+# Parse request yang sudah utuh di memori (str atau bytes), body berupa memoryview (bisa kosong)
+def parse_request(data, max_header=MAX_HEADER_SIZE):
+    if isinstance(data, str):
+        data = data.encode()
+    parser = RequestParser(max_header)
+    rest = parser.feed(data, final=True)
+    return parser.request(rest if rest is not None else memoryview(b""))
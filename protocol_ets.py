@@ -1,22 +1,24 @@
 import json
 import logging
 
-from file_interface import FileInterface
+from interface_ets import FileInterface
+from parser_ets import parse_request
 
 class FileProtocol:
-    def __init__(self):
-        self.filehandler = FileInterface()
+    def __init__(self, root='files'):
+        self.filehandler = FileInterface(root)
 
+    # string_datamasuk boleh str atau bytes; hanya header yang di-parse dan di-log, body UPLOAD tidak
     def proses_string(self, string_datamasuk=''):
-        logging.warning(f"string diproses: {string_datamasuk}")
-
         if not string_datamasuk:
             return json.dumps(dict(status='ERROR', data='Empty command'))
 
-        tokens = string_datamasuk.strip().split(" ", 2)
-        command = tokens[0].upper()
-
         try:
+            request = parse_request(string_datamasuk)
+            command = request.command.upper()
+            tokens = [command] + request.args
+            logging.warning(f"string diproses: {' '.join(tokens)}")
+
             if command == "LIST":
                 result = self.filehandler.list()
                 if result['status'] == 'OK':
@@ -40,11 +42,10 @@ class FileProtocol:
                 return json.dumps(result)
 
             elif command == "UPLOAD":
-                if len(tokens) < 3:
+                if len(tokens) < 2 or not request.body:
                     return json.dumps(dict(status='ERROR', data='UPLOAD format salah'))
                 filename = tokens[1]
-                filedata = tokens[2]
-                result = self.filehandler.upload([filename, filedata])
+                result = self.filehandler.upload([filename, request.body])
                 return json.dumps(result)
 
             else:
@@ -0,0 +1,280 @@
+import os
+import socket
+import logging
+import selectors
+import threading
+import time
+from collections import deque, OrderedDict
+from time import perf_counter
+
+# Penjadwalan pengiriman body besar dan pembatasan bandwidth.
+#   BandwidthShaper  token bucket global dan per client (alamat IP), 0 = tanpa batas. Kuota boleh
+#                    "berhutang": pengiriman kecil (request metadata, GET kecil) hanya dicatat dan
+#                    tidak pernah menunggu, yang menunggu adalah transfer besar berikutnya
+#   SendScheduler    (engine thread) body GET >= bulk_size diserahkan ke satu thread pengirim sehingga
+#                    thread worker langsung bebas untuk request lain. Transfer dikirim bergiliran per
+#                    quantum dengan sendfile non-blocking: round-robin antar client, lalu antar transfer
+#                    milik client yang sama, sehingga satu client dengan banyak koneksi tidak mendominasi
+# Batas bandwidth berlaku per proses worker.
+QUANTUM = 256 * 1024  # 256 KB per giliran
+DEFAULT_BULK_SIZE = 1024 * 1024  # 1 MB
+# Kuota yang boleh terkumpul saat idle, dalam detik pada rate penuh
+BURST_SECONDS = 0.25
+# Transfer yang tidak maju (client berhenti membaca) selama ini dibatalkan
+STALL_TIMEOUT = 60.0
+# Bucket client yang sudah penuh dan tidak dipakai selama ini dibuang
+IDLE_BUCKET_TIMEOUT = 60.0
+
+
+def client_key(sock):
+    try:
+        return sock.getpeername()[0]
+    except (OSError, IndexError, TypeError):
+        return None
+
+
+class TokenBucket:
+    def __init__(self, rate):
+        self.rate = rate  # byte/detik
+        self.burst = max(rate * BURST_SECONDS, QUANTUM)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    # Pesan size byte; kembalikan berapa detik lagi pesanan ini boleh dikirim (saldo boleh negatif,
+    # sehingga pemesan berikutnya mengantre di belakangnya)
+    def reserve(self, size):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= size
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def idle(self, now):
+        return self.tokens >= self.burst and now - self.updated > IDLE_BUCKET_TIMEOUT
+
+
+class BandwidthShaper:
+    def __init__(self, rate=0, client_rate=0):
+        self.rate = rate
+        self.client_rate = client_rate
+        self.bucket = TokenBucket(rate) if rate else None
+        self.clients = {}
+        self.lock = threading.Lock()
+        self.pruned = time.monotonic()
+
+    @property
+    def active(self):
+        return bool(self.rate or self.client_rate)
+
+    def client_bucket(self, client):
+        with self.lock:
+            now = time.monotonic()
+            if now - self.pruned > IDLE_BUCKET_TIMEOUT:
+                self.clients = {key: bucket for key, bucket in self.clients.items() if not bucket.idle(now)}
+                self.pruned = now
+            bucket = self.clients.get(client)
+            if bucket is None:
+                bucket = self.clients[client] = TokenBucket(self.client_rate)
+            return bucket
+
+    # Detik yang harus ditunggu sebelum size byte untuk client boleh dikirim
+    def delay(self, client, size):
+        delay = 0.0
+        if self.bucket is not None:
+            delay = self.bucket.reserve(size)
+        if self.client_rate:
+            delay = max(delay, self.client_bucket(client).reserve(size))
+        return delay
+
+    # Catat pengiriman yang tidak ditunda (prioritas request kecil)
+    def charge(self, client, size):
+        if self.active:
+            self.delay(client, size)
+
+    def wait(self, client, size):
+        if self.active:
+            delay = self.delay(client, size)
+            if delay > 0:
+                time.sleep(delay)
+
+    def stats(self):
+        with self.lock:
+            clients = len(self.clients)
+        return {"rate": self.rate, "client_rate": self.client_rate, "clients": clients}
+
+
+# Body yang dikirim SendScheduler. pieces: daftar (fd milik transfer atau path file, offset, panjang);
+# path (chunk storage dedup) baru dibuka saat gilirannya tiba
+class Transfer:
+    def __init__(self, sock, pieces, size):
+        self.sock = sock
+        self.client = client_key(sock)
+        self.pieces = deque(pieces)
+        self.remaining = size
+        self.sent = 0
+        self.send_time = 0.0
+        self.credit = 0  # byte yang sudah dipesan dari shaper tapi belum terkirim
+        self.ready_at = 0.0
+        self.blocked = False
+        self.progress = time.monotonic()
+        self.done = None
+        self.slot = None  # slot admission (--limit) yang ditahan sampai body selesai dikirim
+
+    def current(self):
+        source, offset, length = self.pieces[0]
+        if isinstance(source, str):
+            source = os.open(source, os.O_RDONLY)
+            self.pieces[0] = (source, offset, length)
+        return source, offset, length
+
+    def advance(self, sent):
+        source, offset, length = self.pieces[0]
+        self.sent += sent
+        self.remaining -= sent
+        self.progress = time.monotonic()
+        if sent < length:
+            self.pieces[0] = (source, offset + sent, length - sent)
+        else:
+            self.pieces.popleft()
+            os.close(source)
+
+    def close(self):
+        for source, _, _ in self.pieces:
+            if not isinstance(source, str):
+                os.close(source)
+        self.pieces.clear()
+
+
+class SendScheduler:
+    def __init__(self, shaper, quantum=QUANTUM, stall_timeout=STALL_TIMEOUT):
+        self.shaper = shaper
+        self.quantum = quantum
+        self.stall_timeout = stall_timeout
+        self.selector = selectors.DefaultSelector()
+        self.lock = threading.Lock()
+        self.incoming = []
+        self.clients = OrderedDict()  # client -> deque transfer, urutan giliran round-robin
+        self.active = 0
+        self.completed = 0
+        self.aborted = 0
+        self.bytes_sent = 0
+        self.wake_reader, self.wake_writer = socket.socketpair()
+        self.wake_reader.setblocking(False)
+        self.selector.register(self.wake_reader, selectors.EVENT_READ, None)
+        threading.Thread(target=self.run, name="send-scheduler", daemon=True).start()
+
+    # done(transfer, success) dipanggil di thread scheduler setelah body selesai/gagal dikirim,
+    # socket sudah kembali blocking
+    def add(self, transfer, done):
+        transfer.done = done
+        with self.lock:
+            self.incoming.append(transfer)
+        self.wake_writer.send(b"\0")
+
+    def run(self):
+        while True:
+            timeout = self.serve_round()
+            for key, _ in self.selector.select(timeout):
+                if key.data is None:
+                    try:
+                        self.wake_reader.recv(4096)
+                    except BlockingIOError:
+                        pass
+                    continue
+                self.selector.unregister(key.fileobj)
+                key.data.blocked = False
+            with self.lock:
+                incoming, self.incoming = self.incoming, []
+            for transfer in incoming:
+                self.active += 1
+                transfer.sock.setblocking(False)
+                self.clients.setdefault(transfer.client, deque()).append(transfer)
+
+    # Satu putaran: setiap client mengirim satu quantum dari transfer berikutnya yang siap. Transfer yang
+    # menunggu kuota bandwidth tetap di depan antrean client-nya, sehingga tiap client hanya memegang satu
+    # pesanan kuota dan mendapat bagian yang sama berapa pun jumlah koneksinya.
+    # Kembalikan timeout select: 0 bila masih ada yang bisa langsung dikirim
+    def serve_round(self):
+        now = time.monotonic()
+        timeout = None
+        for client in list(self.clients):
+            transfers = self.clients[client]
+            for _ in range(len(transfers)):
+                if not transfers:
+                    break
+                transfer = transfers[0]
+                if transfer.blocked:
+                    transfers.rotate(-1)
+                    if now - transfer.progress > self.stall_timeout:
+                        self.finish(transfer, False, "stalled")
+                    continue
+                if transfer.ready_at <= now:
+                    self.send_quantum(transfer)
+                    if transfer.ready_at <= now:
+                        if transfers and transfers[0] is transfer:
+                            transfers.rotate(-1)
+                        timeout = 0
+                        break
+                wait = transfer.ready_at - now
+                timeout = wait if timeout is None else min(timeout, wait)
+                break
+            if not transfers:
+                del self.clients[client]
+        # Transfer yang menunggu socket bisa ditulis tetap dicek stall-nya secara berkala
+        if timeout is None and self.clients:
+            timeout = 1.0
+        return timeout
+
+    def send_quantum(self, transfer):
+        if not transfer.credit:
+            size = min(self.quantum, transfer.remaining)
+            delay = self.shaper.delay(transfer.client, size) if self.shaper.active else 0
+            transfer.credit = size
+            if delay > 0:
+                transfer.ready_at = time.monotonic() + delay
+                return
+        try:
+            source, offset, length = transfer.current()
+            started = perf_counter()
+            sent = os.sendfile(transfer.sock.fileno(), source, offset, min(transfer.credit, length))
+            transfer.send_time += perf_counter() - started
+        except BlockingIOError:
+            transfer.blocked = True
+            self.selector.register(transfer.sock, selectors.EVENT_WRITE, transfer)
+            return
+        except OSError as e:
+            self.finish(transfer, False, str(e))
+            return
+        if not sent:
+            self.finish(transfer, False, "file is shorter than expected")
+            return
+        transfer.credit -= sent
+        transfer.advance(sent)
+        self.bytes_sent += sent
+        if not transfer.remaining:
+            self.finish(transfer, True)
+
+    def finish(self, transfer, success, reason=None):
+        if transfer.blocked:
+            self.selector.unregister(transfer.sock)
+        transfer.close()
+        transfers = self.clients.get(transfer.client)
+        if transfers is not None and transfer in transfers:
+            transfers.remove(transfer)
+        self.active -= 1
+        if success:
+            self.completed += 1
+        else:
+            self.aborted += 1
+            logging.warning(f"Transfer to {transfer.client} aborted after {transfer.sent} bytes: {reason}")
+        try:
+            transfer.sock.setblocking(True)
+        except OSError:
+            pass
+        transfer.done(transfer, success)
+
+    def stats(self):
+        return {"active": self.active, "completed": self.completed, "aborted": self.aborted,
+                "bytes_sent": self.bytes_sent}
@@ -3,26 +3,133 @@ import json
 import base64
 import logging
 import os
-import sys
+import argparse
+import signal
+import selectors
+import threading
+import time
+import re
+import hashlib
+import struct
 from concurrent.futures import ThreadPoolExecutor
-from multiprocessing import Manager
-from io import BufferedWriter
+import multiprocessing
+from index_ets import FileIndex
+from cache_ets import FileCache
+from storage_ets import make_storage
+from compression_ets import CompressedBlobStore, available_codecs, choose_codec, decompress_stream
+from metrics_ets import Metrics, set_command, timed
+from checksum_ets import (StreamChecksum, ChecksumMismatch, available_checksums, split_checksum,
+                          verify_checksum, combine_crc32)
+from parser_ets import parse_stream
+from admission_ets import (AdmissionControl, ServerBusy, DEFAULT_BACKLOG, DEFAULT_MAX_PENDING, DEFAULT_RETRY_AFTER,
+                           parse_limit)
+from scheduler_ets import BandwidthShaper, SendScheduler, Transfer, QUANTUM, DEFAULT_BULK_SIZE, client_key
+from transport_ets import (MAGIC, BASE64_CHUNK_SIZE, TERMINATOR, SocketReader, send_frame, send_all, encode_header,
+                           read_frame_header, json_body, send_file_body, decode_base64_stream)
+
+DEFAULT_STORAGE_DIR = "./storedfiles"
+
+# Koneksi keep-alive yang sedang menganggur diparkir di sini (bukan di thread worker),
+# begitu ada request berikutnya koneksi dikembalikan ke executor lewat on_ready
+class IdleWatcher:
+    def __init__(self, on_ready, timeout=15, on_close=None):
+        self.on_ready = on_ready
+        self.on_close = on_close or (lambda connection: connection.close())
+        self.timeout = timeout
+        self.selector = selectors.DefaultSelector()
+        self.lock = threading.Lock()
+        self.pending = []
+        self.wake_reader, self.wake_writer = socket.socketpair()
+        self.selector.register(self.wake_reader, selectors.EVENT_READ, None)
+        threading.Thread(target=self.run, name="idle-watcher", daemon=True).start()
+
+    def add(self, connection, reader):
+        with self.lock:
+            self.pending.append((connection, reader))
+        self.wake_writer.send(b"\0")
+
+    def run(self):
+        while True:
+            for key, _ in self.selector.select(timeout=1.0):
+                if key.data is None:
+                    self.wake_reader.recv(4096)
+                    continue
+                self.selector.unregister(key.fileobj)
+                connection, reader, _ = key.data
+                self.on_ready(connection, reader)
+            with self.lock:
+                pending, self.pending = self.pending, []
+            deadline = time.monotonic() + self.timeout
+            for connection, reader in pending:
+                self.selector.register(connection, selectors.EVENT_READ, (connection, reader, deadline))
+            now = time.monotonic()
+            for key in list(self.selector.get_map().values()):
+                if key.data is not None and key.data[2] < now:
+                    self.selector.unregister(key.fileobj)
+                    self.on_close(key.fileobj)
+
+
+UPLOAD_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+# Upload bertahap: catatan per chunk di file .chunks (diterima, ukuran chunk ini, chunk_size sesi, crc32 isinya)
+CHUNK_RECORD = struct.Struct("<B3xIII")
+MAX_UPLOAD_CHUNKS = 1 << 20
+# Sisa upload bertahap yang tidak disentuh selama ini (detik) dihapus saat server mulai (lihat sweep_uploads)
+DEFAULT_UPLOAD_TTL = 24 * 3600
+
+# Batas body DEDUP_CHECK/PUTBLOB/PUTMANIFEST yang ditampung di memori
+DEDUP_BODY_LIMIT = 16 * 1024 * 1024  # 16 MB
+# Jumlah file maksimal dalam satu request MGET/MPUT/MDELETE
+BATCH_MAX_FILES = 1000
+
 
 class FileServer:
-    def __init__(self, host='0.0.0.0', port=8686, workers=1):
+    def __init__(self, host='0.0.0.0', port=8686, workers=1, reuse_port=False, listen_socket=None, counters=None,
+                 keepalive_timeout=15, index_refresh=0, cache_bytes=0, storage="flat", backlog=DEFAULT_BACKLOG,
+                 max_pending=DEFAULT_MAX_PENDING, limits=None, retry_after=DEFAULT_RETRY_AFTER, checksum=None,
+                 max_rate=0, client_rate=0, bulk_size=DEFAULT_BULK_SIZE, storage_dirs=None):
         self.host = host
         self.port = port
-        self.my_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.keepalive_timeout = keepalive_timeout
+        self.backlog = backlog
+        # listen_socket: socket yang sudah bind/listen dari proses induk (mode multi-proses tanpa SO_REUSEPORT)
+        self.listening = listen_socket is not None
+        self.my_socket = listen_socket or socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.my_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if reuse_port:
+            self.my_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
         self.my_socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 65536)  # 64 KB
         self.my_socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 65536)  # 64 KB
-        self.storage_dir = "./storedfiles"
-        if not os.path.exists(self.storage_dir):
-            os.makedirs(self.storage_dir)
+        # Direktori penyimpanan (path absolut, tidak bergantung cwd); lebih dari satu berarti storage di-shard
+        storage_dirs = [os.path.abspath(path) for path in storage_dirs or [DEFAULT_STORAGE_DIR]]
+        self.storage_dir = storage_dirs[0]
+        # Backend penyimpanan: "flat" (satu file per nama) atau "dedup" (chunk unik + manifest)
+        self.storage = make_storage(storage, storage_dirs, io_workers=workers)
+        # File sementara upload, berada di filesystem yang sama agar rename bersifat atomik
+        self.temp_dir = self.storage.temp_dir
+        self.index = FileIndex(self.storage, refresh_interval=index_refresh)
+        # Checksum isi file yang dihitung saat upload dan disimpan di index (lihat checksum_ets)
+        self.checksum_algorithm = split_checksum(checksum or available_checksums()[0])[0]
+        # Hasil kompresi untuk GET biner yang meminta encoding (lihat compressed_body)
+        self.blobs = CompressedBlobStore(os.path.join(self.storage_dir, ".compressed"), self.temp_dir)
+        # Cache payload base64 untuk GET protokol lama (opsional, cache_bytes=0 berarti mati).
+        # GET biner tidak memakai cache ini karena sendfile sudah melayani langsung dari page cache kernel
+        self.cache = FileCache(cache_bytes) if cache_bytes > 0 else None
         self.workers = workers
-        self.manager = Manager()
-        self.successful_operations = self.manager.Value('i', 0)
-        self.failed_operations = self.manager.Value('i', 0)
+        # Counter di shared memory (bukan proxy Manager), dibagi ke semua proses worker. Konteks fork supaya
+        # lock-nya tidak didaftarkan ke proses resource tracker (default forkserver di Python baru)
+        if counters is None:
+            context = multiprocessing.get_context("fork")
+            counters = (context.Value('i', 0), context.Value('i', 0))
+        self.successful_operations, self.failed_operations = counters
+        # Metrik detail per proses (lihat metrics_ets), dilaporkan lewat STATS
+        self.metrics = Metrics()
+        # Batas antrean dan request bersamaan per perintah, kelebihannya dibalas BUSY (lihat admission_ets)
+        self.admission = AdmissionControl(max_pending, limits, retry_after)
+        # Batas bandwidth (byte/detik, 0 = tanpa batas) dan body besar (>= bulk_size) yang dikirim
+        # bergiliran oleh SendScheduler, dibuat di run() (lihat scheduler_ets)
+        self.shaper = BandwidthShaper(max_rate, client_rate)
+        self.bulk_size = bulk_size
+        self.scheduler = None
         logging.basicConfig(level=logging.WARNING)
 
     def configure(self, mode, workers):
@@ -30,97 +137,704 @@ class FileServer:
         logging.warning(f"Configuration ignored, workers set to {self.workers} at startup")
         return {"status": "OK", "data": f"Configuration accepted with {self.workers} workers"}
 
-    def list_files(self):
-        files = [f for f in os.listdir(self.storage_dir) if os.path.isfile(os.path.join(self.storage_dir, f))]
-        return {"status": "OK", "data": files}
+    # Kembalikan (file object, stat) dari backend, (None, None) bila file tidak ada
+    def open_file(self, filename):
+        try:
+            with timed("disk"):
+                return self.storage.open_read(filename)
+        except (FileNotFoundError, IsADirectoryError):
+            return None, None
+
+    # LIST dari index di memori; prefix/pattern menyaring, after + limit untuk pagination
+    def list_files(self, prefix="", pattern=None, after=None, limit=None, detail=False):
+        files, next_name = self.index.list(prefix or "", pattern, after, limit, detail)
+        response = {"status": "OK", "data": files}
+        if limit is not None:
+            response["next"] = next_name
+        return response
+
+    def delete_file(self, filename):
+        try:
+            with timed("disk"):
+                self.storage.delete(filename)
+        except FileNotFoundError:
+            return {"status": "ERROR", "data": f"File {filename} does not exist"}
+        self.file_removed(filename)
+        return {"status": "OK", "data": f"File {filename} deleted successfully"}
+
+    # Dipanggil setiap kali isi file berubah/hilang supaya index dan cache tetap konsisten.
+    # checksum/inode: checksum isi baru dan inode file yang ditulis (lihat FileIndex.update)
+    def file_changed(self, filename, checksum=None, inode=None):
+        with timed("disk"):
+            self.index.update(filename, checksum, inode)
+            self.blobs.remove(filename)
+        if self.cache is not None:
+            self.cache.invalidate(filename)
+
+    def file_removed(self, filename):
+        self.index.remove(filename)
+        with timed("disk"):
+            self.blobs.remove(filename)
+        if self.cache is not None:
+            self.cache.invalidate(filename)
+
+    def stats(self):
+        return {"status": "OK", "data": {"cache": self.cache.stats() if self.cache is not None else None,
+                                         "operations": {"successful": self.successful_operations.value,
+                                                        "failed": self.failed_operations.value},
+                                         "admission": self.admission.stats(),
+                                         "scheduler": dict(self.shaper.stats(), **(self.scheduler.stats()
+                                                                                   if self.scheduler else {})),
+                                         "metrics": self.metrics.snapshot()}}
+
+    def encode_chunks(self, fp):
+        while True:
+            with timed("disk"):
+                chunk = fp.read(BASE64_CHUNK_SIZE)
+            if not chunk:
+                break
+            with timed("decode"):
+                encoded = base64.b64encode(chunk)
+            yield encoded
+
+    # Ambil payload base64 dari cache, atau encode seluruh file sekali lalu simpan di cache.
+    # None berarti cache tidak dipakai (mati atau file terlalu besar) dan pemanggil meng-encode sambil mengirim
+    def cached_base64(self, filename, fp, stat):
+        if self.cache is None:
+            return None
+        if not self.cache.fits((stat.st_size + 2) // 3 * 4):
+            return None
+        key = (filename, "base64")
+        validator = FileCache.validator(stat)
+        chunks, loading = self.cache.acquire(key, validator)
+        if not loading:
+            return chunks
+        chunks = None
+        try:
+            chunks = list(self.encode_chunks(fp))
+        finally:
+            self.cache.release(key, validator, chunks)
+        return chunks
+
+    # GET protokol lama: JSON ditulis bertahap, isi file di-base64 per chunk
+    # sehingga respons tidak pernah ditampung utuh di memori
+    def get_file(self, connection, filename):
+        fp, stat = self.open_file(filename)
+        if fp is None:
+            response = {"status": "ERROR", "data": f"File {filename} not found"}
+            send_all(connection, json.dumps(response).encode() + b"\r\n\r\n")
+            return False
+        with fp:
+            chunks = self.cached_base64(filename, fp, stat)
+            client = client_key(connection) if self.shaper.active else None
+            bulk = stat.st_size >= self.bulk_size
+            send_all(connection, f'{{"status": "OK", "data_namafile": {json.dumps(filename)}, "data_file": "'.encode())
+            for encoded in (chunks if chunks is not None else self.encode_chunks(fp)):
+                self.pace(client, len(encoded), bulk)
+                send_all(connection, encoded)
+            send_all(connection, b'"}\r\n\r\n')
+        return True
+
+    # Tulis chunk lewat writer backend (file sementara/chunk), baru terlihat setelah commit
+    # sehingga file lama tetap utuh bila upload gagal. Checksum dihitung sambil menulis (algoritma server
+    # untuk index, ditambah algorithm permintaan client); expected dipanggil setelah body habis dan
+    # nilainya harus sama sebelum commit. Kembalikan (ukuran, checksum dengan algoritma client/server)
+    def write_file(self, filename, chunks, algorithm=None, expected=None):
+        checksum = StreamChecksum(self.checksum_algorithm, algorithm)
+        writer = self.storage.writer(filename)
+        try:
+            for chunk in chunks:
+                with timed("decode"):
+                    checksum.update(chunk)
+                with timed("disk"):
+                    writer.write(chunk)
+            if expected is not None:
+                verify_checksum(expected(), checksum.value(algorithm), filename)
+            with timed("disk"):
+                written = writer.commit(checksum.value(self.checksum_algorithm))
+        except BaseException:
+            writer.abort()
+            raise
+        self.file_changed(filename, checksum.value(self.checksum_algorithm), writer.inode)
+        return written, checksum.value(algorithm or self.checksum_algorithm)
+
+    # Checksum dari client lewat header "checksum": "alg:hex" (nilai sudah diketahui sebelum body) atau
+    # "alg" (nilai dikirim dalam frame trailer setelah body, hanya bila trailer=True).
+    # Kembalikan (algoritma, fungsi yang mengembalikan nilai dari client) atau (None, None)
+    def client_checksum(self, header, reader, trailer=True):
+        algorithm, value = self.requested_checksum(header, trailer)
+        if algorithm is None:
+            return None, None
+        return algorithm, lambda: value or read_frame_header(reader).get("checksum")
+
+    # (algoritma, "alg:hex" atau None bila nilainya menyusul di trailer), (None, None) tanpa checksum
+    @staticmethod
+    def requested_checksum(header, trailer=True):
+        if not header.get("checksum"):
+            return None, None
+        algorithm, digest = split_checksum(header["checksum"])
+        if digest is None and not trailer:
+            raise ValueError(f"Checksum for {header.get('name', '')} must include its value")
+        return algorithm, digest and f"{algorithm}:{digest}"
+
+    # Checksum yang dihitung saat upload: dari index bila entri milik versi file yang sedang dibuka,
+    # selain itu (misalnya diunggah lewat proses worker lain) dari metadata file yang dibuka
+    def stored_checksum(self, filename, fp, stat):
+        entry = self.index.get(filename)
+        if entry is not None and entry["inode"] == stat.st_ino and entry["size"] == stat.st_size:
+            return entry["checksum"]
+        return self.storage.checksum(filename, fp)
+
+    # UPLOAD protokol lama: base64 di-decode dan ditulis ke disk sambil diterima
+    def upload_file(self, filename, chunks):
+        written, _ = self.write_file(filename, decode_base64_stream(chunks))
+        logging.warning(f"Uploaded {filename}: {written} bytes ({written / (1024 * 1024):.2f}MB)")
+        return {"status": "OK", "data": f"File {filename} uploaded successfully"}
 
-    def get_file(self, filename):
-        full_path = os.path.join(self.storage_dir, filename)
-        if os.path.isfile(full_path):
-            with open(full_path, 'rb') as fp:
-                file_content = base64.b64encode(fp.read()).decode()
-            return {"status": "OK", "data_namafile": filename, "data_file": file_content}
+    # Kompresi dinegosiasikan per GET: client mengirim daftar codec yang diterima (accept), server memilih
+    # codec bila file layak dikompresi. Hanya untuk GET seluruh file, GET sebagian selalu tanpa kompresi.
+    # Kembalikan (file object blob, codec, ukuran blob) atau None
+    def compressed_body(self, filename, fp, stat, accept, offset, length):
+        codec = choose_codec(accept) if offset == 0 and length is None else None
+        if codec is None:
+            return None
+        blob = self.blobs.open(filename, fp, stat, codec)
+        return None if blob is None else (blob[0], codec, blob[1])
+
+    # Kirim file dalam mode biner: header berisi ukuran, lalu isi file langsung dari disk ke socket.
+    # offset/length opsional untuk mengambil sebagian file (resume dan download paralel).
+    # schedule=True: body besar dikembalikan sebagai Transfer untuk SendScheduler (lihat send_body)
+    def send_file(self, connection, filename, offset=0, length=None, accept=None, schedule=False):
+        fp, stat = self.open_file(filename)
+        if fp is None:
+            send_frame(connection, {"status": "ERROR", "data": f"File {filename} not found"})
+            return False
+        with fp:
+            total = stat.st_size
+            size = self.range_size(total, offset, length)
+            if size is None:
+                send_frame(connection, {"status": "ERROR", "data": f"Invalid range {offset}+{length} for {filename}"})
+                return False
+            compressed = self.compressed_body(filename, fp, stat, accept, offset, length)
+            checksum = self.stored_checksum(filename, fp, stat) if size == total else None
+            if compressed is not None:
+                blob, codec, blob_size = compressed
+                with blob:
+                    send_frame(connection, {"status": "OK", "data_namafile": filename, "size": blob_size,
+                                            "offset": 0, "total": total, "encoding": codec, "checksum": checksum})
+                    return self.send_body(connection, blob, 0, blob_size, schedule)
+            send_frame(connection, {"status": "OK", "data_namafile": filename, "size": size,
+                                    "offset": offset, "total": total, "checksum": checksum})
+            if size:
+                return self.send_body(connection, fp, offset, size, schedule)
+        return True
+
+    # Body besar diserahkan ke SendScheduler bila boleh (fd di-dup karena fp ditutup pemanggil),
+    # selain itu dikirim thread ini: body kecil hanya dicatat ke kuota bandwidth tanpa menunggu
+    # (prioritas request kecil), body besar menunggu kuota per quantum
+    def send_body(self, connection, fp, offset, size, schedule=False):
+        bulk = size >= self.bulk_size
+        if bulk and schedule and self.scheduler is not None:
+            if hasattr(fp, "segments"):
+                return Transfer(connection, list(fp.segments(offset, size)), size)
+            return Transfer(connection, [(os.dup(fp.fileno()), offset, size)], size)
+        if not self.shaper.active:
+            send_file_body(connection, fp, offset, size)
+            return True
+        client = client_key(connection)
+        step = QUANTUM if bulk else max(size, 1)
+        for start in range(offset, offset + size, step):
+            length = min(step, offset + size - start)
+            self.pace(client, length, bulk)
+            send_file_body(connection, fp, start, length)
+        return True
+
+    def pace(self, client, size, bulk):
+        if bulk:
+            self.shaper.wait(client, size)
         else:
-            return {"status": "ERROR", "data": f"File {filename} not found"}
-
-    def upload_file(self, filename, filecontent):
-        full_path = os.path.join(self.storage_dir, filename)
-        total_size = len(base64.b64decode(filecontent))
-        chunk_size = 4 * 1024 * 1024  # 4 MB chunks
-        decoded_content = base64.b64decode(filecontent)
-
-        with open(full_path, 'wb') as fp:
-            buffered_fp = BufferedWriter(fp, buffer_size=8192 * 1024)  # 8 MB buffer
-            for i in range(0, total_size, chunk_size):
-                chunk = decoded_content[i:i + chunk_size]
-                buffered_fp.write(chunk)
-                progress = min((i + len(chunk)) / total_size * 100, 100)
-                bar_length = 50
-                filled_length = int(bar_length * progress / 100)
-                bar = '#' * filled_length + '-' * (bar_length - filled_length)
-                print(f'\rUploading {filename}: [{bar}] {progress:.1f}%', end='', flush=True)
-            buffered_fp.flush()
-        print()
+            self.shaper.charge(client, size)
+
+    @staticmethod
+    def range_size(total, offset, length):
+        if offset < 0 or offset > total or (length is not None and length < 0):
+            return None
+        return total - offset if length is None else min(length, total - offset)
+
+    # Terima file dalam mode biner: body mentah langsung ditulis ke disk per chunk,
+    # body dengan encoding (hasil negosiasi CODECS) didekompresi sambil diterima.
+    # Checksum yang tidak cocok membatalkan upload, file lama tetap utuh
+    def receive_file(self, reader, header):
+        filename, encoding = header.get("name", ""), header.get("encoding")
+        algorithm, expected = self.client_checksum(header, reader)
+        chunks = reader.iter_exact(int(header.get("size", 0)))
+        try:
+            _, checksum = self.write_file(filename, decompress_stream(chunks, encoding) if encoding else chunks,
+                                          algorithm, expected)
+        except ChecksumMismatch as e:
+            return {"status": "ERROR", "data": str(e)}
+        return {"status": "OK", "data": f"File {filename} uploaded successfully", "checksum": checksum}
+
+    # Upload bertahap: chunk ke-index dari count ditulis langsung ke posisinya di file .part,
+    # chunk yang sudah diterima dicatat di file .chunks (CHUNK_RECORD per chunk) sehingga status upload
+    # tetap benar walau chunk datang dari koneksi/proses berbeda atau server di-restart
+    def upload_paths(self, upload_id):
+        if not UPLOAD_ID_PATTERN.match(str(upload_id)):
+            raise ValueError(f"Invalid upload_id {upload_id}")
+        base = os.path.join(self.temp_dir, f"upload-{upload_id}")
+        return base + ".part", base + ".chunks"
+
+    @staticmethod
+    def chunk_count(header):
+        count = int(header.get("count", 0))
+        if not 0 < count <= MAX_UPLOAD_CHUNKS:
+            raise ValueError(f"Invalid chunk count {count}")
+        return count
+
+    def open_chunk(self, header):
+        part_path, map_path = self.upload_paths(header.get("upload_id"))
+        index, count = int(header.get("index", -1)), self.chunk_count(header)
+        chunk_size, size = int(header.get("chunk_size", 0)), int(header.get("size", 0))
+        if not 0 <= index < count or not 0 < chunk_size < 2 ** 32 or not 0 <= size <= chunk_size or \
+                (index < count - 1 and size != chunk_size):
+            raise ValueError(f"Invalid chunk {index}/{count} of size {size}")
+        fd = os.open(part_path, os.O_WRONLY | os.O_CREAT, 0o644)
+        return fd, index * chunk_size
+
+    def finish_chunk(self, header, crc):
+        _, map_path = self.upload_paths(header.get("upload_id"))
+        record = CHUNK_RECORD.pack(1, int(header["size"]), int(header["chunk_size"]), crc)
+        fd = os.open(map_path, os.O_WRONLY | os.O_CREAT, 0o644)
+        try:
+            os.pwrite(fd, record, int(header["index"]) * CHUNK_RECORD.size)
+        finally:
+            os.close(fd)
+        return {"status": "OK", "data": f"Chunk {header['index']} of {header.get('name', '')} received"}
+
+    # Chunk dengan checksum yang tidak cocok tidak ditandai diterima, sehingga dikirim ulang client.
+    # crc32 tiap chunk selalu dihitung untuk checksum file saat COMMIT
+    def receive_chunk(self, reader, header):
+        algorithm, expected = self.client_checksum(header, reader)
+        checksum = StreamChecksum(algorithm, "crc32")
+        fd, offset = self.open_chunk(header)
+        try:
+            for chunk in reader.iter_exact(int(header.get("size", 0))):
+                with timed("decode"):
+                    checksum.update(chunk)
+                with timed("disk"):
+                    os.pwrite(fd, chunk, offset)
+                offset += len(chunk)
+        finally:
+            os.close(fd)
+        return self.verify_chunk(header, algorithm, expected, checksum)
+
+    def verify_chunk(self, header, algorithm, expected, checksum):
+        if algorithm is not None:
+            try:
+                verify_checksum(expected(), checksum.value(algorithm), header.get("name", ""))
+            except ChecksumMismatch as e:
+                return {"status": "ERROR", "data": str(e)}
+        return self.finish_chunk(header, self.chunk_crc32(checksum))
+
+    @staticmethod
+    def chunk_crc32(checksum):
+        return int(checksum.value("crc32").partition(":")[2], 16)
+
+    # Catatan (diterima, size, chunk_size) chunk 0..count-1; chunk yang belum diterima bernilai diterima=0
+    def chunk_records(self, upload_id, count):
+        _, map_path = self.upload_paths(upload_id)
+        data = b""
+        if os.path.exists(map_path):
+            with open(map_path, 'rb') as fp:
+                data = fp.read(count * CHUNK_RECORD.size)
+        data = data.ljust(count * CHUNK_RECORD.size, b"\0")
+        return list(CHUNK_RECORD.iter_unpack(data))
+
+    def missing_chunks(self, upload_id, count):
+        return [i for i, record in enumerate(self.chunk_records(upload_id, count)) if record[0] != 1]
+
+    def upload_status(self, header):
+        missing = self.missing_chunks(header.get("upload_id"), self.chunk_count(header))
+        return {"status": "OK", "missing": missing}
+
+    # Selesaikan upload bertahap: semua chunk harus ada dengan chunk_size yang sama, total harus sama dengan
+    # ukuran dari catatan chunk; file .part dipotong ke ukuran total lalu di-rename.
+    # Checksum file adalah crc32 gabungan crc32 chunk, tanpa membaca ulang file
+    def commit_upload(self, header):
+        filename = header.get("name", "")
+        count, total = self.chunk_count(header), int(header.get("total", 0))
+        part_path, map_path = self.upload_paths(header.get("upload_id"))
+        records = self.chunk_records(header.get("upload_id"), count)
+        missing = [i for i, record in enumerate(records) if record[0] != 1]
+        if missing:
+            return {"status": "ERROR", "data": f"Upload of {filename} incomplete", "missing": missing}
+        chunk_size = records[0][2]
+        if any(record[2] != chunk_size or record[1] != chunk_size for record in records[:-1]) or \
+                records[-1][2] != chunk_size:
+            return {"status": "ERROR", "data": f"Chunks of {filename} have inconsistent sizes"}
+        received = (count - 1) * chunk_size + records[-1][1]
+        if total != received:
+            return {"status": "ERROR", "data": f"Size {total} of {filename} does not match {received} bytes received"}
+        checksum = f"crc32:{combine_crc32((record[3], record[1]) for record in records):08x}"
+        try:
+            os.truncate(part_path, total)
+            inode = self.storage.commit_file(part_path, filename, checksum)
+        except FileNotFoundError:
+            # COMMIT lain dengan upload_id yang sama (file dan isi yang sama, misalnya thread lain di client
+            # yang sama) sudah menyelesaikan sesi ini lebih dulu
+            return {"status": "OK", "data": f"File {filename} uploaded successfully"}
+        try:
+            os.remove(map_path)
+        except FileNotFoundError:
+            pass
+        self.file_changed(filename, checksum, inode)
         return {"status": "OK", "data": f"File {filename} uploaded successfully"}
 
-    def process_request(self, connection):
-        data_received = ""
-        while True:
-            data = connection.recv(1048576)  # 16 KB buffer
-            if data:
-                data_received += data.decode()
-                if "\r\n\r\n" in data_received:
-                    break
+    # Deduplikasi (hanya backend dedup): client mengirim daftar hash chunk lebih dulu,
+    # DEDUP_CHECK menjawab chunk mana yang belum ada, PUTBLOB mengirim chunk tersebut,
+    # PUTMANIFEST menyusun file dari daftar hash. Upload ulang file identik tanpa transfer data.
+    @staticmethod
+    def dedup_body_size(header):
+        size = int(header.get("size", 0))
+        if not 0 <= size <= DEDUP_BODY_LIMIT:
+            raise ValueError(f"Invalid body size {size}")
+        return size
+
+    def process_dedup(self, command, header, body):
+        if not self.storage.dedup:
+            return {"status": "ERROR", "data": "Deduplication not supported by storage backend"}
+        hashes = json.loads(body) if command != "PUTBLOB" and body else []
+        if command == "DEDUP_CHECK":
+            missing = [i for i, digest in enumerate(hashes) if not self.storage.has_chunk(digest)]
+            return {"status": "OK", "chunk_size": self.storage.chunk_size, "missing": missing}
+        if command == "PUTBLOB":
+            digest = str(header.get("hash", ""))
+            if len(body) > self.storage.chunk_size or hashlib.sha256(body).hexdigest() != digest:
+                return {"status": "ERROR", "data": f"Chunk {digest} does not match its hash"}
+            self.storage.put_chunk(digest, body)
+            return {"status": "OK", "data": f"Chunk {digest} stored"}
+        filename = header.get("name", "")
+        missing = [i for i, digest in enumerate(hashes) if not self.storage.has_chunk(digest)]
+        if missing:
+            return {"status": "ERROR", "data": f"Upload of {filename} incomplete", "missing": missing}
+        checksum, inode = self.storage.commit_manifest(filename, hashes, int(header.get("total", 0)))
+        self.file_changed(filename, checksum, inode)
+        return {"status": "OK", "data": f"File {filename} uploaded successfully"}
+
+    # Batch (mode biner): banyak file dalam satu request supaya sinkronisasi banyak file kecil tidak
+    # didominasi round-trip. Balasan berupa frame utama (count) diikuti satu frame per file berisi
+    # status masing-masing; frame file MGET sama dengan balasan GET (termasuk kompresi)
+    @staticmethod
+    def batch_count(count):
+        if not 0 <= count <= BATCH_MAX_FILES:
+            raise ValueError(f"Batch of {count} files exceeds limit of {BATCH_MAX_FILES}")
+        return count
+
+    @classmethod
+    def batch_names(cls, header):
+        names = header.get("names")
+        if not isinstance(names, list) or not all(isinstance(name, str) for name in names):
+            raise ValueError("names must be a list of filenames")
+        cls.batch_count(len(names))
+        return names
+
+    def send_files(self, connection, names, accept=None):
+        send_frame(connection, {"status": "OK", "count": len(names)})
+        success = True
+        for name in names:
+            try:
+                success = self.send_file(connection, name, accept=accept) and success
+            except ValueError as e:
+                send_frame(connection, {"status": "ERROR", "data": str(e)})
+                success = False
+        return success
+
+    # Setiap file MPUT dikirim sebagai frame sendiri (name, size, encoding dan checksum "alg:hex" opsional).
+    # File yang gagal disimpan tetap dibaca habis isinya supaya frame berikutnya tidak bergeser
+    def receive_files(self, reader, count):
+        results = []
+        for _ in range(self.batch_count(count)):
+            header = read_frame_header(reader)
+            filename, encoding = header.get("name", ""), header.get("encoding")
+            chunks = reader.iter_exact(int(header.get("size", 0)))
+            try:
+                algorithm, expected = self.client_checksum(header, reader, trailer=False)
+                _, checksum = self.write_file(filename, decompress_stream(chunks, encoding) if encoding else chunks,
+                                              algorithm, expected)
+                results.append({"status": "OK", "data": f"File {filename} uploaded successfully", "checksum": checksum})
+            except Exception as e:
+                for _ in chunks:
+                    pass
+                results.append({"status": "ERROR", "data": str(e)})
+        return results
+
+    def delete_files(self, names):
+        results = []
+        for name in names:
+            try:
+                results.append(self.delete_file(name))
+            except ValueError as e:
+                results.append({"status": "ERROR", "data": str(e)})
+        return results
+
+    # Hasil MPUT/MDELETE dikirim setelah semua file selesai, dalam satu kali kirim
+    @staticmethod
+    def batch_frames(results):
+        failed = sum(1 for result in results if result["status"] != "OK")
+        frames = [{"status": "OK", "count": len(results), "failed": failed}] + results
+        return b"".join(encode_header({**frame, "size": 0}) for frame in frames), not failed
+
+    def send_results(self, connection, results):
+        data, success = self.batch_frames(results)
+        send_all(connection, data)
+        return success
+
+    # Jawaban CODECS: codec kompresi dan algoritma checksum yang didukung server
+    def capabilities(self):
+        return {"status": "OK", "codecs": available_codecs(), "checksums": available_checksums(),
+                "checksum": self.checksum_algorithm}
+
+    @staticmethod
+    def list_params(header):
+        limit = header.get("limit")
+        return {"prefix": header.get("prefix", ""), "pattern": header.get("pattern"), "after": header.get("after"),
+                "limit": None if limit is None else int(limit), "detail": bool(header.get("detail", False))}
+
+    def process_binary(self, connection, reader):
+        header = read_frame_header(reader)
+        command = str(header.get("cmd", "")).upper()
+        set_command(command)
+        response_body = b""
+        with self.admission.limit(command) as slot:
+            if command == "CONFIG":
+                response = self.configure(header.get("mode"), int(header.get("workers", 0)))
+            elif command == "LIST":
+                response = self.list_files(**self.list_params(header))
+                response_body = json_body(response)
+            elif command == "GET":
+                length = header.get("length")
+                result = self.send_file(connection, header.get("name", ""), int(header.get("offset", 0)),
+                                        None if length is None else int(length), header.get("accept"), schedule=True)
+                # Body besar dikirim SendScheduler setelah fungsi ini selesai; slot --limit GET ikut ditahan
+                # sampai transfer selesai sehingga batas berlaku untuk transfer, bukan hanya persiapannya
+                if isinstance(result, Transfer):
+                    result.slot = slot.keep()
+                return result
+            elif command == "UPLOAD":
+                response = self.receive_file(reader, header)
+            elif command == "CODECS":
+                response = self.capabilities()
+            elif command == "MGET":
+                return self.send_files(connection, self.batch_names(header), header.get("accept"))
+            elif command == "MPUT":
+                return self.send_results(connection, self.receive_files(reader, int(header.get("count", 0))))
+            elif command == "MDELETE":
+                return self.send_results(connection, self.delete_files(self.batch_names(header)))
+            elif command == "DELETE":
+                response = self.delete_file(header.get("name", ""))
+            elif command == "STATS":
+                response = self.stats()
+                response_body = json_body(response)
+            elif command == "PUTCHUNK":
+                response = self.receive_chunk(reader, header)
+            elif command == "UPLOAD_STATUS":
+                with timed("disk"):
+                    response = self.upload_status(header)
+            elif command == "COMMIT":
+                with timed("disk"):
+                    response = self.commit_upload(header)
+            elif command in ("DEDUP_CHECK", "PUTBLOB", "PUTMANIFEST"):
+                body = reader.read_exact(self.dedup_body_size(header))
+                with timed("disk"):
+                    response = self.process_dedup(command, header, body)
             else:
-                break
+                response = {"status": "ERROR", "data": "Invalid command"}
+            send_frame(connection, response, response_body)
+        return response["status"] == "OK"
+
+    # Satu panggilan memproses satu request. Koneksi biner tetap dibuka (keep-alive):
+    # request berikutnya yang sudah ada di buffer (pipelining) langsung diantrikan ke executor,
+    # selain itu koneksi diparkir di IdleWatcher sampai client mengirim request lagi
+    def process_request(self, connection, reader=None):
+        self.metrics.adjust("queued", -1)
+        self.admission.leave()
+        continuation = reader is not None
+        reader = reader or SocketReader(connection)
+        stats = self.metrics.begin()
+        success = False
+        try:
+            try:
+                first = reader.peek(len(MAGIC))
+            except OSError:
+                first = b""
+            if continuation and not first:
+                # Client menutup koneksi keep-alive, bukan request
+                stats = None
+                self.metrics.cancel()
+                self.close_connection(connection)
+                return None
+            if first != MAGIC:
+                set_command("LEGACY")
+                success = self.process_legacy(connection, reader)
+                return success
+            try:
+                success = self.process_binary(connection, reader)
+            except ServerBusy as e:
+                # Body request (bila ada) belum dibaca, koneksi ditutup setelah BUSY
+                set_command("BUSY")
+                self.send_busy(connection, e, binary=True)
+                self.close_connection(connection)
+                return None
+            except Exception as e:
+                logging.warning(f"Error processing client {connection.getpeername()}: {str(e)}")
+                try:
+                    send_frame(connection, {"status": "ERROR", "data": str(e)})
+                except OSError:
+                    pass
+                self.close_connection(connection)
+                return False
+            if isinstance(success, Transfer):
+                # Body dikirim SendScheduler; request baru selesai (metrik, keep-alive) setelah body terkirim
+                self.scheduler.add(success, lambda transfer, ok, stats=stats:
+                                   self.transfer_done(connection, reader, stats, transfer, ok))
+                stats = None
+                return None
+            self.keep_alive(connection, reader)
+            return success
+        finally:
+            if stats is not None:
+                self.metrics.finish(stats, success)
+
+    def transfer_done(self, connection, reader, stats, transfer, success):
+        if transfer.slot is not None:
+            transfer.slot.release()
+        stats.phases["send"] += transfer.send_time
+        stats.bytes_out += transfer.sent
+        self.metrics.finish(stats, success)
+        self.record_result(success)
+        if success:
+            self.keep_alive(connection, reader)
+        else:
+            self.close_connection(connection)
+
+    def close_connection(self, connection):
+        connection.close()
+        self.metrics.connection_closed()
+
+    def keep_alive(self, connection, reader):
+        if reader.buffer:
+            self.submit(connection, reader)
+        else:
+            self.idle_watcher.add(connection, reader)
 
+    def submit(self, connection, reader=None):
         try:
-            command = data_received.strip().split()
-            response = {"status": "ERROR", "data": "Unknown command"}
+            self.admission.enter()
+        except ServerBusy:
+            self.reject(connection, reader)
+            return None
+        self.metrics.adjust("queued", 1)
+        future = self.executor.submit(self.process_request, connection, reader)
+        future.add_done_callback(self.update_counters)
+        return future
+
+    def send_busy(self, connection, busy, binary):
+        try:
+            if binary:
+                send_frame(connection, busy.response())
+            else:
+                send_all(connection, json.dumps(busy.response()).encode() + b"\r\n\r\n")
+        except OSError:
+            pass
+
+    # Tolak koneksi saat antrean penuh: balas BUSY dengan format protokol yang dipakai client lalu tutup.
+    # Dipanggil di thread IdleWatcher, jadi pembacaan dibatasi waktu
+    def reject(self, connection, reader=None):
+        reader = reader or SocketReader(connection)
+        try:
+            connection.settimeout(1.0)
+            first = reader.peek(len(MAGIC))
+        except OSError:
+            first = b""
+        if first:
+            self.send_busy(connection, self.admission.busy("Server busy, request queue is full"), first == MAGIC)
+        self.close_connection(connection)
+
+    # Hanya token header yang di-parse (parser_ets), body UPLOAD tetap berupa aliran potongan
+    # yang di-decode sambil ditulis ke disk
+    def process_legacy(self, connection, reader):
+        try:
+            request = parse_stream(reader.iter_until(TERMINATOR))
+            command, args = request.command, request.args
+            if command:
+                set_command(f"LEGACY_{command}")
 
             if not command:
                 response = {"status": "ERROR", "data": "Empty command"}
-            elif command[0] == "CONFIG":
-                response = self.configure(command[1], int(command[2]))
-            elif command[0] == "LIST":
-                response = self.list_files()
-            elif command[0] == "GET":
-                response = self.get_file(command[1])
-            elif command[0] == "UPLOAD":
-                filename = command[1]
-                filecontent = " ".join(command[2:]).strip()
-                response = self.upload_file(filename, filecontent)
             else:
-                response = {"status": "ERROR", "data": "Invalid command"}
+                with self.admission.limit(command):
+                    if command == "UPLOAD":
+                        response = self.upload_file(args[0], request.body)
+                    elif command == "CONFIG":
+                        response = self.configure(args[0], int(args[1]))
+                    elif command == "LIST":
+                        response = self.list_files()
+                    elif command == "GET":
+                        return self.get_file(connection, args[0])
+                    elif command == "DELETE":
+                        response = self.delete_file(args[0])
+                    elif command == "STATS":
+                        response = self.stats()
+                    else:
+                        response = {"status": "ERROR", "data": "Invalid command"}
 
-            connection.sendall(json.dumps(response).encode() + b"\r\n\r\n")
+            send_all(connection, json.dumps(response).encode() + b"\r\n\r\n")
             return True
+        except ServerBusy as e:
+            set_command("BUSY")
+            self.send_busy(connection, e, binary=False)
+            return None
         except Exception as e:
             logging.warning(f"Error processing client {connection.getpeername()}: {str(e)}")
             response = {"status": "ERROR", "data": str(e)}
-            connection.sendall(json.dumps(response).encode() + b"\r\n\r\n")
+            send_all(connection, json.dumps(response).encode() + b"\r\n\r\n")
             return False
         finally:
-            connection.close()
+            self.close_connection(connection)
 
     def update_counters(self, future):
-        if future.result():
-            self.successful_operations.value += 1
-        else:
-            self.failed_operations.value += 1
+        success = future.exception() is None and future.result()
+        if success is not None:
+            self.record_result(success)
+
+    def record_result(self, success):
+        counter = self.successful_operations if success else self.failed_operations
+        with counter.get_lock():
+            counter.value += 1
+
+    def bind(self):
+        if not self.listening:
+            self.my_socket.bind((self.host, self.port))
 
     def run(self):
-        self.my_socket.bind((self.host, self.port))
-        self.my_socket.listen(5)
+        self.bind()
+        self.my_socket.listen(self.backlog)
         logging.warning(f"Server listening on {self.host}:{self.port} with {self.workers} workers")
 
         with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            self.executor = executor
+            self.idle_watcher = IdleWatcher(self.submit, timeout=self.keepalive_timeout,
+                                            on_close=self.close_connection)
+            self.scheduler = SendScheduler(self.shaper)
             while True:
                 try:
                     connection, client_address = self.my_socket.accept()
+                    connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                    self.metrics.connection_opened()
                     logging.warning(f"Connection from {client_address}")
-                    future = executor.submit(self.process_request, connection)
-                    future.add_done_callback(self.update_counters)
+                    # Koneksi baru juga menunggu di IdleWatcher sampai request pertamanya tiba, sehingga
+                    # thread worker dan antrean hanya berisi request yang siap diproses
+                    self.idle_watcher.add(connection, None)
                     logging.warning(f"Server - Successful Operations: {self.successful_operations.value}, Failed Operations: {self.failed_operations.value}")
                 except KeyboardInterrupt:
                     logging.warning("Server shutting down")
@@ -129,16 +843,143 @@ class FileServer:
                     logging.warning(f"Error: {str(e)}")
         self.my_socket.close()
 
-def main():
-    if len(sys.argv) != 2:
-        print("Usage: python file_server.py <workers: 1/5/50>")
-        sys.exit(1)
-    workers = int(sys.argv[1])
-    if workers not in [1, 5, 50]:
-        print("Workers must be 1, 5, or 50")
-        sys.exit(1)
-    svr = FileServer(workers=workers)
+# admission: opsi admission control (backlog, max_pending, limits, retry_after), None = default
+# checksum: algoritma checksum yang disimpan di index, None = yang tercepat tersedia
+# shaping: batas bandwidth dan ukuran body besar (max_rate, client_rate, bulk_size), None = default
+# storage_dirs: daftar direktori shard, None = ./storedfiles
+def serve_worker(engine, host, port, workers, reuse_port, listen_socket, counters, index_refresh=0, cache_bytes=0,
+                 storage="flat", admission=None, checksum=None, shaping=None, storage_dirs=None):
+    if engine == "asyncio":
+        from async_server_ets import AsyncFileServer
+        svr = AsyncFileServer(host=host, port=port, io_workers=workers, reuse_port=reuse_port,
+                              listen_socket=listen_socket, counters=counters, index_refresh=index_refresh,
+                              cache_bytes=cache_bytes, storage=storage, checksum=checksum, **(admission or {}),
+                              **(shaping or {}), storage_dirs=storage_dirs)
+    else:
+        svr = FileServer(host=host, port=port, workers=workers, reuse_port=reuse_port,
+                         listen_socket=listen_socket, counters=counters, index_refresh=index_refresh,
+                         cache_bytes=cache_bytes, storage=storage, checksum=checksum, **(admission or {}),
+                         **(shaping or {}), storage_dirs=storage_dirs)
     svr.run()
 
+# Jalankan N proses worker yang masing-masing menerima koneksi sendiri.
+# Dengan SO_REUSEPORT setiap proses punya socket sendiri dan kernel membagi koneksi,
+# tanpa SO_REUSEPORT semua proses accept() dari satu socket yang dibuat proses induk.
+# Index tiap proses disinkronkan lewat refresh berkala karena upload bisa diterima proses lain.
+def serve_processes(processes, engine="thread", host='0.0.0.0', port=8686, workers=1, index_refresh=1.0,
+                    cache_bytes=0, storage="flat", admission=None, checksum=None, shaping=None, storage_dirs=None):
+    context = multiprocessing.get_context("fork")
+    counters = (context.Value('i', 0), context.Value('i', 0))
+    reuse_port = hasattr(socket, "SO_REUSEPORT")
+    listen_socket = None
+    if not reuse_port:
+        listen_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listen_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        listen_socket.bind((host, port))
+        listen_socket.listen((admission or {}).get("backlog", DEFAULT_BACKLOG))
+    worker_args = (engine, host, port, workers, reuse_port, listen_socket, counters, index_refresh, cache_bytes, storage,
+                   admission, checksum, shaping, storage_dirs)
+    children = [context.Process(target=serve_worker, args=worker_args) for _ in range(processes)]
+    for child in children:
+        child.start()
+    logging.warning(f"Started {processes} {engine} worker processes on {host}:{port} "
+                    f"({'SO_REUSEPORT' if reuse_port else 'shared socket'})")
+    try:
+        for child in children:
+            child.join()
+    except KeyboardInterrupt:
+        logging.warning("Server shutting down")
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        for child in children:
+            child.terminate()
+            child.join()
+    logging.warning(f"Server - Successful Operations: {counters[0].value}, Failed Operations: {counters[1].value}")
+
+# File upload-<id>.part/.chunks yang ditinggalkan client (tidak pernah di-COMMIT) dan lebih tua dari max_age,
+# seperti gc chunk dedup dengan grace period; setiap PUTCHUNK memperbarui mtime keduanya
+def sweep_uploads(temp_dir, max_age=DEFAULT_UPLOAD_TTL):
+    deadline = time.time() - max_age
+    removed = 0
+    for name in os.listdir(temp_dir):
+        if not name.startswith("upload-"):
+            continue
+        path = os.path.join(temp_dir, name)
+        try:
+            if os.path.getmtime(path) < deadline:
+                os.remove(path)
+                removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="File server")
+    parser.add_argument("workers", type=int, help="jumlah worker thread (per proses)")
+    parser.add_argument("--engine", choices=["thread", "asyncio"], default="thread",
+                        help="thread: ThreadPoolExecutor per koneksi, asyncio: event loop + pool kecil untuk I/O disk")
+    parser.add_argument("--port", type=int, default=8686)
+    parser.add_argument("--processes", type=int, default=1, help="jumlah proses worker")
+    parser.add_argument("--index-refresh", type=float, default=None,
+                        help="interval (detik) cek perubahan direktori penyimpanan dari luar server, 0 = mati "
+                             "(default 0, atau 1 bila --processes > 1)")
+    parser.add_argument("--cache-mb", type=int, default=0,
+                        help="batas cache payload file populer dalam MB per proses, 0 = mati")
+    parser.add_argument("--storage", choices=["flat", "dedup"], default="flat",
+                        help="flat: satu file per nama, dedup: chunk unik (sha256) + manifest per nama")
+    parser.add_argument("--backlog", type=int, default=DEFAULT_BACKLOG, help="panjang antrean listen() kernel")
+    parser.add_argument("--max-pending", type=int, default=DEFAULT_MAX_PENDING,
+                        help="batas request yang menunggu diproses per proses, lebihnya dibalas BUSY (0 = tanpa batas)")
+    parser.add_argument("--limit", type=parse_limit, action="append", default=[], metavar="CMD=N",
+                        help="batas request bersamaan untuk satu perintah, misalnya --limit UPLOAD=8 (boleh berulang)")
+    parser.add_argument("--retry-after", type=float, default=DEFAULT_RETRY_AFTER,
+                        help="saran waktu tunggu (detik) di balasan BUSY saat antrean kosong")
+    parser.add_argument("--checksum", choices=available_checksums(), default=available_checksums()[0],
+                        help="algoritma checksum isi file yang dihitung saat upload dan disimpan di index")
+    parser.add_argument("--max-rate", type=float, default=0,
+                        help="batas bandwidth kirim total dalam MB/s per proses, 0 = tanpa batas")
+    parser.add_argument("--client-rate", type=float, default=0,
+                        help="batas bandwidth kirim per client (alamat IP) dalam MB/s, 0 = tanpa batas")
+    parser.add_argument("--bulk-kb", type=int, default=DEFAULT_BULK_SIZE // 1024,
+                        help="body GET sebesar ini ke atas dikirim bergiliran oleh scheduler dan menunggu kuota "
+                             "bandwidth, yang lebih kecil langsung dikirim")
+    parser.add_argument("--shard", action="append", default=[], metavar="DIR",
+                        help="direktori penyimpanan, boleh berulang (misalnya satu per disk): file dibagi ke semua "
+                             "direktori menurut hash namanya, urutan dan jumlahnya harus tetap (default ./storedfiles)")
+    parser.add_argument("--upload-ttl", type=float, default=DEFAULT_UPLOAD_TTL / 3600,
+                        help="sisa upload bertahap yang tidak disentuh selama ini (jam) dihapus saat server mulai")
+    args = parser.parse_args()
+    if args.workers < 1 or args.processes < 1:
+        parser.error("workers and --processes must be positive")
+    if args.backlog < 1 or args.max_pending < 0 or args.retry_after < 0:
+        parser.error("--backlog must be positive, --max-pending and --retry-after must not be negative")
+    if args.max_rate < 0 or args.client_rate < 0 or args.bulk_kb < 1:
+        parser.error("--max-rate and --client-rate must not be negative, --bulk-kb must be positive")
+    if args.upload_ttl < 0:
+        parser.error("--upload-ttl must not be negative")
+    cache_bytes = args.cache_mb * 1024 * 1024
+    admission = {"backlog": args.backlog, "max_pending": args.max_pending, "limits": dict(args.limit),
+                 "retry_after": args.retry_after}
+    shaping = {"max_rate": args.max_rate * 1024 * 1024, "client_rate": args.client_rate * 1024 * 1024,
+               "bulk_size": args.bulk_kb * 1024}
+    storage_dirs = [os.path.abspath(path) for path in args.shard or [DEFAULT_STORAGE_DIR]]
+    if len(set(storage_dirs)) != len(storage_dirs):
+        parser.error("--shard directories must be distinct")
+    storage = make_storage(args.storage, storage_dirs)
+    if args.storage == "dedup":
+        # Bersihkan chunk yang tidak lagi dirujuk manifest (sisa file yang dihapus/ditimpa)
+        removed = storage.gc()
+        logging.warning(f"Removed {removed} unreferenced chunks")
+    removed = sweep_uploads(storage.temp_dir, args.upload_ttl * 3600)
+    logging.warning(f"Removed {removed} abandoned upload files")
+    if args.processes > 1:
+        index_refresh = 1.0 if args.index_refresh is None else args.index_refresh
+        serve_processes(args.processes, engine=args.engine, port=args.port, workers=args.workers,
+                        index_refresh=index_refresh, cache_bytes=cache_bytes, storage=args.storage,
+                        admission=admission, checksum=args.checksum, shaping=shaping, storage_dirs=storage_dirs)
+    else:
+        serve_worker(args.engine, '0.0.0.0', args.port, args.workers, False, None, None, args.index_refresh or 0,
+                     cache_bytes, args.storage, admission, args.checksum, shaping, storage_dirs)
+
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,496 @@
+import os
+import io
+import json
+import time
+import uuid
+import re
+import hashlib
+import shutil
+import zlib
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from checksum_ets import combine_crc32
+
+# Metadata file yang sama untuk semua backend (dipakai index dan validator cache)
+FileStat = namedtuple("FileStat", "st_size st_ino st_mtime st_mtime_ns")
+
+DIGEST_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+# Checksum isi file (lihat checksum_ets) disimpan sebagai extended attribute file itu sendiri sehingga
+# ikut berpindah saat rename dan terbaca oleh proses worker lain. Filesystem tanpa xattr: tidak disimpan
+CHECKSUM_XATTR = "user.ets.checksum"
+
+# Penanda di tiap direktori shard (urutan dan jumlah shard tidak boleh berubah, lihat ShardedStorage)
+SHARD_MARKER = ".shard"
+DEFAULT_SHARD_WORKERS = 4
+
+
+def to_file_stat(stat, size=None):
+    return FileStat(stat.st_size if size is None else size, stat.st_ino, stat.st_mtime, stat.st_mtime_ns)
+
+
+def check_filename(filename):
+    # Nama file harus nama polos (tanpa path, bukan file tersembunyi/sementara)
+    if not filename or filename != os.path.basename(filename) or filename.startswith('.'):
+        raise ValueError(f"Invalid filename {filename}")
+    return filename
+
+
+# target: path atau file descriptor
+def write_checksum(target, checksum):
+    try:
+        os.setxattr(target, CHECKSUM_XATTR, checksum.encode())
+    except (AttributeError, OSError):
+        pass
+
+
+def read_checksum(target):
+    try:
+        return os.getxattr(target, CHECKSUM_XATTR).decode()
+    except (AttributeError, OSError):
+        return None
+
+
+# Kembalikan inode file baru (tetap sama setelah rename)
+def write_atomic(path, data, temp_dir, checksum=None):
+    temp_path = os.path.join(temp_dir, f"{uuid.uuid4().hex}.tmp")
+    with open(temp_path, 'wb') as fp:
+        fp.write(data)
+        if checksum:
+            write_checksum(fp.fileno(), checksum)
+        inode = os.fstat(fp.fileno()).st_ino
+    os.replace(temp_path, path)
+    return inode
+
+
+# Penulis file baru: data ditulis ke file sementara, commit() me-rename secara atomik.
+# Upload bersamaan ke nama yang sama masing-masing punya file sementara, yang terakhir rename menang.
+# inode (diisi commit) menandai versi file milik penulis ini untuk index
+class FlatWriter:
+    def __init__(self, storage, filename):
+        self.storage = storage
+        self.filename = filename
+        self.temp_path = storage.temp_path(filename)
+        self.fp = open(self.temp_path, 'wb')
+        self.size = 0
+        self.inode = None
+
+    def write(self, data):
+        self.fp.write(data)
+        self.size += len(data)
+
+    def commit(self, checksum=None):
+        if checksum:
+            write_checksum(self.fp.fileno(), checksum)
+        self.inode = os.fstat(self.fp.fileno()).st_ino
+        self.fp.close()
+        os.replace(self.temp_path, self.storage.path(self.filename))
+        return self.size
+
+    def abort(self):
+        self.fp.close()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+
+# Backend default: satu file utuh per nama di root (perilaku lama ./storedfiles)
+class FlatStorage:
+    dedup = False
+    sharded = False
+
+    def __init__(self, root):
+        self.root = root
+        self.temp_dir = os.path.join(root, ".tmp")
+        os.makedirs(self.temp_dir, exist_ok=True)
+
+    def path(self, filename):
+        return os.path.join(self.root, check_filename(filename))
+
+    def temp_path(self, filename):
+        return os.path.join(self.temp_dir, f"{filename}.{uuid.uuid4().hex}.tmp")
+
+    # Direktori yang mtime-nya berubah setiap ada file dibuat/dihapus (dipantau index)
+    def watch_paths(self):
+        return [self.root]
+
+    def scan(self):
+        with os.scandir(self.root) as it:
+            for entry in it:
+                if not entry.name.startswith('.') and entry.is_file():
+                    yield entry.name, entry.inode(), lambda entry=entry: to_file_stat(entry.stat())
+
+    def stat(self, filename):
+        return to_file_stat(os.stat(self.path(filename)))
+
+    # fp: file yang sudah dibuka (open_read), sehingga checksum pasti milik isi yang sama
+    def checksum(self, filename, fp=None):
+        return read_checksum(self.path(filename) if fp is None else fp.fileno())
+
+    # Kembalikan (file object, FileStat); file object asli sehingga bisa dikirim dengan sendfile
+    def open_read(self, filename):
+        fp = open(self.path(filename), 'rb')
+        return fp, to_file_stat(os.fstat(fp.fileno()))
+
+    def writer(self, filename):
+        check_filename(filename)
+        return FlatWriter(self, filename)
+
+    # Jadikan file sementara yang sudah lengkap (misalnya hasil PUTCHUNK) sebagai isi filename,
+    # kembalikan inode versi baru (untuk index)
+    def commit_file(self, temp_path, filename, checksum=None):
+        if checksum:
+            write_checksum(temp_path, checksum)
+        inode = os.stat(temp_path).st_ino
+        os.replace(temp_path, self.path(filename))
+        return inode
+
+    def delete(self, filename):
+        os.remove(self.path(filename))
+
+
+# Pembaca file dedup: isi file adalah gabungan chunk sesuai manifest.
+# Tidak punya fileno(), tapi segments() memberi (path chunk, offset, panjang) agar tiap chunk
+# tetap bisa dikirim dengan sendfile.
+class DedupReader(io.RawIOBase):
+    def __init__(self, storage, manifest):
+        self.storage = storage
+        self.chunk_size = manifest["chunk_size"]
+        self.chunks = manifest["chunks"]
+        self.size = manifest["size"]
+        self.checksum = manifest.get("checksum")
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self.position, io.SEEK_END: self.size}[whence]
+        self.position = max(0, base + offset)
+        return self.position
+
+    def tell(self):
+        return self.position
+
+    def segments(self, offset=0, count=None):
+        end = self.size if count is None else min(self.size, offset + count)
+        while offset < end:
+            index, chunk_offset = divmod(offset, self.chunk_size)
+            length = min(self.chunk_size - chunk_offset, end - offset)
+            yield self.storage.chunk_path(self.chunks[index]), chunk_offset, length
+            offset += length
+
+    def read(self, size=-1):
+        count = None if size is None or size < 0 else size
+        parts = []
+        for path, offset, length in self.segments(self.position, count):
+            with open(path, 'rb') as fp:
+                fp.seek(offset)
+                parts.append(fp.read(length))
+        data = b"".join(parts)
+        self.position += len(data)
+        return data
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+# Penulis file dedup: data dipotong per chunk_size, tiap chunk di-hash dan hanya disimpan
+# bila belum ada; commit() menulis manifest (daftar hash) untuk nama file
+class DedupWriter:
+    def __init__(self, storage, filename):
+        self.storage = storage
+        self.filename = filename
+        self.buffer = bytearray()
+        self.chunks = []
+        self.size = 0
+        self.inode = None
+
+    def write(self, data):
+        self.buffer += data
+        chunk_size = self.storage.chunk_size
+        while len(self.buffer) >= chunk_size:
+            self._store(bytes(self.buffer[:chunk_size]))
+            del self.buffer[:chunk_size]
+
+    def _store(self, data):
+        digest = hashlib.sha256(data).hexdigest()
+        self.storage.put_chunk(digest, data)
+        self.chunks.append(digest)
+        self.size += len(data)
+
+    def commit(self, checksum=None):
+        if self.buffer:
+            self._store(bytes(self.buffer))
+            self.buffer.clear()
+        self.inode = self.storage.write_manifest(self.filename, self.chunks, self.size, checksum)
+        return self.size
+
+    def abort(self):
+        self.buffer.clear()
+
+
+# Backend content-addressed: chunk unik disimpan sekali di .chunks/<2 huruf>/<sha256>,
+# setiap nama file hanya berupa manifest JSON di .manifests/<nama>.json.
+# Upload ulang file identik tidak menulis data baru sama sekali.
+class DedupStorage(FlatStorage):
+    dedup = True
+
+    def __init__(self, root, chunk_size=4 * 1024 * 1024):
+        super().__init__(root)
+        self.chunk_size = chunk_size
+        self.chunk_dir = os.path.join(root, ".chunks")
+        self.manifest_dir = os.path.join(root, ".manifests")
+        os.makedirs(self.chunk_dir, exist_ok=True)
+        os.makedirs(self.manifest_dir, exist_ok=True)
+        # Storage pemilik chunk, dipilih dari hash chunk; diisi ShardedStorage dengan semua shard
+        self.chunk_stores = [self]
+
+    def path(self, filename):
+        return os.path.join(self.manifest_dir, check_filename(filename) + ".json")
+
+    def chunk_path(self, digest):
+        if not DIGEST_PATTERN.match(str(digest)):
+            raise ValueError(f"Invalid chunk hash {digest}")
+        return os.path.join(self.chunk_owner(digest).chunk_dir, digest[:2], digest)
+
+    def chunk_owner(self, digest):
+        return self.chunk_stores[int(digest[:8], 16) % len(self.chunk_stores)]
+
+    def watch_paths(self):
+        return [self.manifest_dir]
+
+    def scan(self):
+        with os.scandir(self.manifest_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".json") and entry.is_file():
+                    name = entry.name[:-len(".json")]
+                    yield name, entry.inode(), lambda name=name: self.stat(name)
+
+    def read_manifest(self, filename):
+        with open(self.path(filename), 'rb') as fp:
+            manifest = json.load(fp)
+            return manifest, os.fstat(fp.fileno())
+
+    def stat(self, filename):
+        manifest, stat = self.read_manifest(filename)
+        return to_file_stat(stat, manifest["size"])
+
+    def checksum(self, filename, fp=None):
+        if fp is not None:
+            return fp.checksum
+        try:
+            return self.read_manifest(filename)[0].get("checksum")
+        except (OSError, ValueError):
+            return None
+
+    def open_read(self, filename):
+        manifest, stat = self.read_manifest(filename)
+        return DedupReader(self, manifest), to_file_stat(stat, manifest["size"])
+
+    def writer(self, filename):
+        check_filename(filename)
+        return DedupWriter(self, filename)
+
+    def has_chunk(self, digest):
+        return os.path.exists(self.chunk_path(digest))
+
+    # Simpan chunk bila belum ada. Chunk yang sudah ada di-touch supaya tidak ikut dihapus gc().
+    # crc32 chunk disimpan di xattr-nya agar checksum file dari manifest bisa digabung tanpa membaca chunk
+    def put_chunk(self, digest, data):
+        path = self.chunk_path(digest)
+        if os.path.exists(path):
+            os.utime(path)
+            return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_atomic(path, data, self.chunk_owner(digest).temp_dir, f"crc32:{zlib.crc32(data):08x}")
+        return True
+
+    def chunk_crc32(self, digest):
+        path = self.chunk_path(digest)
+        algorithm, _, value = (read_checksum(path) or "").partition(":")
+        if algorithm == "crc32":
+            return int(value, 16)
+        with open(path, 'rb') as fp:
+            return zlib.crc32(fp.read())
+
+    def write_manifest(self, filename, chunks, size, checksum=None):
+        manifest = {"name": filename, "size": size, "chunk_size": self.chunk_size, "chunks": chunks}
+        if checksum:
+            manifest["checksum"] = checksum
+        return write_atomic(self.path(filename), json.dumps(manifest).encode(), self.temp_dir)
+
+    def commit_file(self, temp_path, filename, checksum=None):
+        writer = self.writer(filename)
+        with open(temp_path, 'rb') as fp:
+            while True:
+                data = fp.read(self.chunk_size)
+                if not data:
+                    break
+                writer.write(data)
+        writer.commit(checksum)
+        os.remove(temp_path)
+        return writer.inode
+
+    # Manifest dari daftar hash yang dikirim client; semua chunk harus sudah ada di server.
+    # Kembalikan (checksum file: crc32 gabungan chunk, inode manifest)
+    def commit_manifest(self, filename, chunks, total):
+        check_filename(filename)
+        sizes = [os.path.getsize(self.chunk_path(digest)) for digest in chunks]
+        if sum(sizes) != total or any(size != self.chunk_size for size in sizes[:-1]):
+            raise ValueError(f"Chunk list does not match size {total} of {filename}")
+        for digest in chunks:
+            os.utime(self.chunk_path(digest))
+        checksum = f"crc32:{combine_crc32(zip(map(self.chunk_crc32, chunks), sizes)):08x}"
+        return checksum, self.write_manifest(filename, chunks, total, checksum)
+
+    # Hapus chunk yang tidak dirujuk manifest mana pun dan lebih tua dari grace_period,
+    # supaya chunk milik upload yang sedang berjalan tidak ikut terhapus
+    def gc(self, grace_period=3600):
+        return self.remove_chunks(self.referenced_chunks(), grace_period)
+
+    def referenced_chunks(self):
+        referenced = set()
+        for name, _, _ in self.scan():
+            referenced.update(self.read_manifest(name)[0]["chunks"])
+        return referenced
+
+    # Hanya chunk di chunk_dir milik storage ini
+    def remove_chunks(self, referenced, grace_period):
+        deadline = time.time() - grace_period
+        removed = 0
+        for prefix in os.listdir(self.chunk_dir):
+            for digest in os.listdir(os.path.join(self.chunk_dir, prefix)):
+                path = os.path.join(self.chunk_dir, prefix, digest)
+                if digest not in referenced and os.path.getmtime(path) < deadline:
+                    os.remove(path)
+                    removed += 1
+        return removed
+
+
+STORAGE_BACKENDS = {"flat": FlatStorage, "dedup": DedupStorage}
+
+
+def shard_index(name, count):
+    # crc32, bukan hash() bawaan yang berbeda di tiap proses
+    return zlib.crc32(name.encode()) % count
+
+
+# Beberapa direktori root (misalnya satu per disk), masing-masing backend biasa. Nama file ditempatkan
+# di shard hasil hash namanya, chunk dedup di shard hasil hash chunk-nya. Setiap shard punya pool
+# thread I/O sendiri (dipakai engine asyncio dan untuk scan/gc paralel) sehingga disk yang lambat
+# tidak menahan I/O shard lain. Jumlah dan urutan shard harus tetap: penanda .shard di tiap direktori
+# diperiksa saat start
+class ShardedStorage:
+    sharded = True
+
+    def __init__(self, kind, roots, io_workers=DEFAULT_SHARD_WORKERS):
+        self.shards = [STORAGE_BACKENDS[kind](root) for root in roots]
+        for index, shard in enumerate(self.shards):
+            self.check_marker(shard, index, len(self.shards))
+        self.pools = [ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix=f"shard{index}")
+                      for index in range(len(self.shards))]
+        self.dedup = self.shards[0].dedup
+        if self.dedup:
+            self.chunk_size = self.shards[0].chunk_size
+            for shard in self.shards:
+                shard.chunk_stores = self.shards
+        # File sementara yang tidak terikat nama file (upload bertahap, hasil kompresi)
+        self.root = self.shards[0].root
+        self.temp_dir = self.shards[0].temp_dir
+
+    @staticmethod
+    def check_marker(shard, index, count):
+        path = os.path.join(shard.root, SHARD_MARKER)
+        expected = {"index": index, "count": count}
+        if not os.path.exists(path):
+            write_atomic(path, json.dumps(expected).encode(), shard.temp_dir)
+            return
+        with open(path, 'rb') as fp:
+            marker = json.load(fp)
+        if marker != expected:
+            raise ValueError(f"Shard directory {shard.root} belongs to shard {marker.get('index')} of "
+                             f"{marker.get('count')}, not {index} of {count}")
+
+    def shard_index(self, filename):
+        return shard_index(check_filename(filename), len(self.shards))
+
+    def shard(self, filename):
+        return self.shards[self.shard_index(filename)]
+
+    def pool(self, filename):
+        return self.pools[self.shard_index(filename)]
+
+    # Jalankan func(shard) di semua shard bersamaan, hasil sesuai urutan shard
+    def map_shards(self, func):
+        futures = [pool.submit(func, shard) for pool, shard in zip(self.pools, self.shards)]
+        return [future.result() for future in futures]
+
+    def path(self, filename):
+        return self.shard(filename).path(filename)
+
+    def temp_path(self, filename):
+        return self.shard(filename).temp_path(filename)
+
+    def watch_paths(self):
+        return [path for shard in self.shards for path in shard.watch_paths()]
+
+    def scan(self):
+        for entries in self.map_shards(lambda shard: list(shard.scan())):
+            yield from entries
+
+    def stat(self, filename):
+        return self.shard(filename).stat(filename)
+
+    def checksum(self, filename, fp=None):
+        return self.shard(filename).checksum(filename, fp)
+
+    def open_read(self, filename):
+        return self.shard(filename).open_read(filename)
+
+    def writer(self, filename):
+        return self.shard(filename).writer(filename)
+
+    # temp_path berada di temp_dir shard pertama; rename tidak bisa lintas filesystem sehingga
+    # file dipindah (disalin) dulu ke temp shard tujuan
+    def commit_file(self, temp_path, filename, checksum=None):
+        shard = self.shard(filename)
+        if not shard.dedup and os.stat(temp_path).st_dev != os.stat(shard.temp_dir).st_dev:
+            moved = shard.temp_path(filename)
+            shutil.move(temp_path, moved)
+            temp_path = moved
+        return shard.commit_file(temp_path, filename, checksum)
+
+    def delete(self, filename):
+        self.shard(filename).delete(filename)
+
+    def chunk_path(self, digest):
+        return self.shards[0].chunk_path(digest)
+
+    def has_chunk(self, digest):
+        return self.shards[0].has_chunk(digest)
+
+    def put_chunk(self, digest, data):
+        return self.shards[0].put_chunk(digest, data)
+
+    def commit_manifest(self, filename, chunks, total):
+        return self.shard(filename).commit_manifest(filename, chunks, total)
+
+    def gc(self, grace_period=3600):
+        referenced = set().union(*self.map_shards(lambda shard: shard.referenced_chunks()))
+        return sum(self.map_shards(lambda shard: shard.remove_chunks(referenced, grace_period)))
+
+
+# roots: satu direktori, atau daftar direktori shard (lebih dari satu menjadi ShardedStorage)
+def make_storage(kind, roots, io_workers=DEFAULT_SHARD_WORKERS):
+    if kind not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown storage backend {kind}")
+    if isinstance(roots, str):
+        roots = [roots]
+    if len(roots) > 1:
+        return ShardedStorage(kind, roots, io_workers)
+    return STORAGE_BACKENDS[kind](roots[0])
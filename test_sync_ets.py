@@ -0,0 +1,65 @@
+import os
+import socket
+import shutil
+import logging
+import tempfile
+import threading
+import unittest
+import client_ets
+from server_ets import FileServer
+
+# Sinkronisasi direktori ke server sungguhan (engine thread, storage di direktori sementara).
+# Jumlah file melebihi satu halaman LIST remote_entries (limit 1000) dan daftar detail-nya
+# lebih besar dari batas header frame, sehingga pagination dan body LIST ikut teruji.
+FILE_COUNT = 1500
+
+
+class SyncDirectoryTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.WARNING)
+        cls.temp_dir = tempfile.mkdtemp()
+        cls.local_dir = os.path.join(cls.temp_dir, "local")
+        os.makedirs(cls.local_dir)
+        listen_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listen_socket.bind(("127.0.0.1", 0))
+        port = listen_socket.getsockname()[1]
+        server = FileServer("127.0.0.1", port, workers=4, listen_socket=listen_socket,
+                            storage_dirs=[os.path.join(cls.temp_dir, "stored")])
+        threading.Thread(target=server.run, daemon=True).start()
+        client_ets.server_address = ("127.0.0.1", port)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.temp_dir, ignore_errors=True)
+        logging.disable(logging.NOTSET)
+
+    def test_sync_more_than_one_page(self):
+        names = [f"synced_file_with_a_fairly_long_descriptive_name_{i:05d}.txt" for i in range(FILE_COUNT)]
+        for name in names:
+            with open(os.path.join(self.local_dir, name), 'w') as fp:
+                fp.write(name)
+
+        result = client_ets.sync_directory(self.local_dir)
+        self.assertEqual(result['status'], 'OK')
+        self.assertEqual(len(result['uploaded']), FILE_COUNT)
+
+        remote = client_ets.remote_entries()
+        self.assertEqual(remote['status'], 'OK')
+        self.assertEqual(sorted(remote['data']), names)
+
+        result = client_ets.sync_directory(self.local_dir)
+        self.assertEqual(result['status'], 'OK')
+        self.assertEqual(result['uploaded'], [])
+        self.assertEqual(result['unchanged'], FILE_COUNT)
+
+        for name in names[:10]:
+            os.remove(os.path.join(self.local_dir, name))
+        result = client_ets.sync_directory(self.local_dir, delete=True)
+        self.assertEqual(result['status'], 'OK')
+        self.assertEqual(result['deleted'], names[:10])
+        self.assertEqual(len(client_ets.remote_entries()['data']), FILE_COUNT - 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,450 @@
+import base64
+import io
+import os
+import json
+import mmap
+import socket
+import threading
+from time import perf_counter
+from metrics_ets import record_recv, record_send, add_phase
+
+# Penanda awal frame biner, request/response tanpa penanda ini diperlakukan sebagai protokol lama (JSON)
+MAGIC = b"ETS1"
+TERMINATOR = b"\r\n\r\n"
+CHUNK_SIZE = 1024 * 1024  # 1 MB
+MAX_HEADER_SIZE = 64 * 1024  # 64 KB
+# Kelipatan 3 supaya setiap potongan bisa di-base64 sendiri tanpa padding di tengah
+BASE64_CHUNK_SIZE = 3 * 256 * 1024  # 768 KB
+# Jendela mmap kelipatan BASE64_CHUNK_SIZE (dan ALLOCATIONGRANULARITY) sehingga setiap jendela bisa
+# di-base64 sendiri dan offset jendela berikutnya selalu sah untuk mmap
+MMAP_WINDOW = 4 * BASE64_CHUNK_SIZE  # 3 MB
+
+
+class ProtocolError(Exception):
+    pass
+
+
+# Dimunculkan bila lawan bicara tidak mengirim frame biner (server/client protokol lama)
+class NotBinaryError(ProtocolError):
+    pass
+
+
+# Pembaca socket dengan buffer, supaya sisa data setelah header tidak hilang
+class SocketReader:
+    def __init__(self, sock, bufsize=CHUNK_SIZE):
+        self.sock = sock
+        self.bufsize = bufsize
+        self.buffer = bytearray()
+
+    def _fill(self):
+        started = perf_counter()
+        data = self.sock.recv(self.bufsize)
+        record_recv(len(data), perf_counter() - started)
+        if not data:
+            return False
+        self.buffer += data
+        return True
+
+    def peek(self, size):
+        while len(self.buffer) < size and self._fill():
+            pass
+        return bytes(self.buffer[:size])
+
+    def take(self):
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+    def read_until(self, delimiter=TERMINATOR, limit=MAX_HEADER_SIZE):
+        start = 0
+        while True:
+            pos = self.buffer.find(delimiter, start)
+            if pos >= 0:
+                data = bytes(self.buffer[:pos])
+                del self.buffer[:pos + len(delimiter)]
+                return data
+            if len(self.buffer) > limit:
+                raise ProtocolError("Header too large")
+            start = max(0, len(self.buffer) - len(delimiter) + 1)
+            if not self._fill():
+                raise ProtocolError("Connection closed before header was complete")
+
+    # Iterasi data sampai delimiter tanpa menumpuk seluruh data di memori,
+    # hanya len(delimiter) - 1 byte terakhir yang ditahan untuk dicek di chunk berikutnya.
+    # Bila koneksi ditutup sebelum delimiter, sisa data dianggap akhir request.
+    def iter_until(self, delimiter=TERMINATOR):
+        keep = len(delimiter) - 1
+        while True:
+            pos = self.buffer.find(delimiter)
+            if pos >= 0:
+                if pos:
+                    yield bytes(self.buffer[:pos])
+                del self.buffer[:pos + len(delimiter)]
+                return
+            if len(self.buffer) > keep:
+                data = bytes(self.buffer[:len(self.buffer) - keep])
+                del self.buffer[:len(data)]
+                yield data
+            if not self._fill():
+                if self.buffer:
+                    yield self.take()
+                return
+
+    def read_exact(self, size):
+        while len(self.buffer) < size:
+            if not self._fill():
+                raise ProtocolError("Connection closed before body was complete")
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+    # Isi view (misalnya jendela mmap file tujuan) dengan tepat len(view) byte; data socket
+    # diterima langsung ke view tanpa bytes sementara
+    def readinto_exact(self, view):
+        filled = min(len(self.buffer), len(view))
+        if filled:
+            view[:filled] = self.buffer[:filled]
+            del self.buffer[:filled]
+        while filled < len(view):
+            started = perf_counter()
+            with view[filled:] as target:
+                size = self.sock.recv_into(target)
+            record_recv(size, perf_counter() - started)
+            if not size:
+                raise ProtocolError("Connection closed before body was complete")
+            filled += size
+
+    # Iterasi isi body sebanyak size byte tanpa menampung seluruhnya di memori
+    def iter_exact(self, size, chunk_size=CHUNK_SIZE):
+        remaining = size
+        if self.buffer and remaining > 0:
+            data = bytes(self.buffer[:remaining])
+            del self.buffer[:len(data)]
+            remaining -= len(data)
+            yield data
+        while remaining > 0:
+            started = perf_counter()
+            data = self.sock.recv(min(chunk_size, remaining))
+            record_recv(len(data), perf_counter() - started)
+            if not data:
+                raise ProtocolError("Connection closed before body was complete")
+            remaining -= len(data)
+            yield data
+
+
+# Versi asyncio dari SocketReader: buffer sendiri di atas asyncio.StreamReader (server asyncio dan client async)
+class AsyncReader:
+    def __init__(self, stream):
+        self.stream = stream
+        self.buffer = bytearray()
+
+    async def _fill(self):
+        started = perf_counter()
+        data = await self.stream.read(CHUNK_SIZE)
+        record_recv(len(data), perf_counter() - started)
+        if not data:
+            return False
+        self.buffer += data
+        return True
+
+    async def peek(self, size):
+        while len(self.buffer) < size and await self._fill():
+            pass
+        return bytes(self.buffer[:size])
+
+    async def read_until(self, delimiter=TERMINATOR, limit=MAX_HEADER_SIZE):
+        start = 0
+        while True:
+            pos = self.buffer.find(delimiter, start)
+            if pos >= 0:
+                data = bytes(self.buffer[:pos])
+                del self.buffer[:pos + len(delimiter)]
+                return data
+            if len(self.buffer) > limit:
+                raise ProtocolError("Header too large")
+            start = max(0, len(self.buffer) - len(delimiter) + 1)
+            if not await self._fill():
+                raise ProtocolError("Connection closed before header was complete")
+
+    async def iter_until(self, delimiter=TERMINATOR):
+        keep = len(delimiter) - 1
+        while True:
+            pos = self.buffer.find(delimiter)
+            if pos >= 0:
+                if pos:
+                    yield bytes(self.buffer[:pos])
+                del self.buffer[:pos + len(delimiter)]
+                return
+            if len(self.buffer) > keep:
+                data = bytes(self.buffer[:len(self.buffer) - keep])
+                del self.buffer[:len(data)]
+                yield data
+            if not await self._fill():
+                if self.buffer:
+                    data = bytes(self.buffer)
+                    self.buffer.clear()
+                    yield data
+                return
+
+    async def iter_exact(self, size):
+        remaining = size
+        if self.buffer and remaining > 0:
+            data = bytes(self.buffer[:remaining])
+            del self.buffer[:len(data)]
+            remaining -= len(data)
+            yield data
+        while remaining > 0:
+            started = perf_counter()
+            data = await self.stream.read(min(CHUNK_SIZE, remaining))
+            record_recv(len(data), perf_counter() - started)
+            if not data:
+                raise ProtocolError("Connection closed before body was complete")
+            remaining -= len(data)
+            yield data
+
+    async def read_frame_header(self):
+        if await self.peek(len(MAGIC)) != MAGIC:
+            raise NotBinaryError("Not a binary frame")
+        del self.buffer[:len(MAGIC)]
+        raw = await self.read_until(TERMINATOR)
+        started = perf_counter()
+        header = json.loads(raw)
+        add_phase("decode", perf_counter() - started)
+        if not isinstance(header, dict):
+            raise ProtocolError("Invalid frame header")
+        return header
+
+
+# Frame biner: MAGIC + header JSON + "\r\n\r\n" + body mentah sebanyak header["size"] byte
+def encode_header(header):
+    return MAGIC + json.dumps(header).encode() + TERMINATOR
+
+
+def send_frame(sock, header, body=b""):
+    header.setdefault("size", len(body))
+    send_all(sock, encode_header(header) + body)
+
+
+# Data balasan yang bisa besar (misalnya daftar LIST) dikirim sebagai body JSON dengan content "json",
+# bukan di header yang dibatasi MAX_HEADER_SIZE
+def json_body(response):
+    body = json.dumps(response.pop("data", None)).encode()
+    response.update(content="json", size=len(body))
+    return body
+
+
+def read_json_body(header, body):
+    if header.pop("content", None) == "json":
+        header["data"] = json.loads(body)
+    return header
+
+
+def send_all(sock, data):
+    started = perf_counter()
+    sock.sendall(data)
+    record_send(len(data), perf_counter() - started)
+
+
+def read_frame_header(reader):
+    if reader.read_exact(len(MAGIC)) != MAGIC:
+        raise NotBinaryError("Not a binary frame")
+    raw = reader.read_until(TERMINATOR)
+    started = perf_counter()
+    header = json.loads(raw)
+    add_phase("decode", perf_counter() - started)
+    if not isinstance(header, dict):
+        raise ProtocolError("Invalid frame header")
+    return header
+
+
+# Kirim isi file dari disk ke socket: sendfile (zero-copy) bila bisa,
+# selain itu loop per chunk sehingga memori per koneksi tetap kecil
+def send_file_body(sock, fp, offset=0, count=None):
+    started = perf_counter()
+    total_sent = _send_file_body(sock, fp, offset, count)
+    record_send(total_sent, perf_counter() - started)
+    return total_sent
+
+
+def _send_file_body(sock, fp, offset, count):
+    # File yang tersusun dari beberapa file (storage dedup) dikirim per segmen, tetap dengan sendfile
+    if hasattr(fp, "segments"):
+        total_sent = 0
+        for path, segment_offset, length in fp.segments(offset, count):
+            with open(path, 'rb') as segment:
+                total_sent += sock.sendfile(segment, segment_offset, length)
+        return total_sent
+    try:
+        fp.fileno()
+        return sock.sendfile(fp, offset, count)
+    except (AttributeError, io.UnsupportedOperation):
+        pass
+    fp.seek(offset)
+    total_sent = 0
+    while count is None or total_sent < count:
+        size = CHUNK_SIZE if count is None else min(CHUNK_SIZE, count - total_sent)
+        chunk = fp.read(size)
+        if not chunk:
+            break
+        sock.sendall(chunk)
+        total_sent += len(chunk)
+    return total_sent
+
+
+# Petakan fp mulai offset sepanjang length per jendela MMAP_WINDOW. Hanya satu jendela yang dipetakan
+# sekaligus sehingga RSS proses tidak ikut membesar sebesar file. View yang diberikan dilepas sebelum
+# jendela berikutnya, jadi pemakai tidak boleh menyimpannya (atau potongannya) di luar iterasi
+def mmap_windows(fp, offset=0, length=None, write=False):
+    if length is None:
+        length = os.fstat(fp.fileno()).st_size - offset
+    end = offset + length
+    access = mmap.ACCESS_WRITE if write else mmap.ACCESS_READ
+    while offset < end:
+        start = offset - offset % mmap.ALLOCATIONGRANULARITY
+        size = min(MMAP_WINDOW, end - start)
+        with mmap.mmap(fp.fileno(), size, access=access, offset=start) as mapped:
+            view = memoryview(mapped)[offset - start:]
+            try:
+                yield view
+            finally:
+                view.release()
+        offset = start + size
+
+
+# Decoder base64 bertahap; spasi, baris baru dan tanda kutip (hasil shlex.quote) diabaikan
+class Base64StreamDecoder:
+    def __init__(self):
+        self.pending = b""
+
+    # chunk boleh memoryview (potongan pertama body dari parser_ets)
+    def feed(self, chunk):
+        data = self.pending + bytes(chunk).translate(None, b"'\" \t\r\n")
+        usable = len(data) - len(data) % 4
+        self.pending = data[usable:]
+        return base64.b64decode(data[:usable]) if usable else b""
+
+    def flush(self):
+        data, self.pending = self.pending, b""
+        return base64.b64decode(data) if data else b""
+
+
+def decode_base64_stream(chunks):
+    decoder = Base64StreamDecoder()
+    for chunk in chunks:
+        started = perf_counter()
+        decoded = decoder.feed(chunk)
+        add_phase("decode", perf_counter() - started)
+        if decoded:
+            yield decoded
+    decoded = decoder.flush()
+    if decoded:
+        yield decoded
+
+
+# Koneksi persisten ke server beserta reader-nya (sisa buffer ikut tersimpan)
+class Connection:
+    def __init__(self, sock):
+        self.sock = sock
+        self.reader = SocketReader(sock)
+        self.reused = False
+
+    def close(self):
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+# Pool koneksi keep-alive sisi client, aman dipakai bersama oleh banyak thread
+class ConnectionPool:
+    def __init__(self, address, max_idle=64, timeout=None):
+        self.address = address
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self.idle = []
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            if self.idle:
+                connection = self.idle.pop()
+                connection.reused = True
+                return connection
+        sock = socket.create_connection(self.address, timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return Connection(sock)
+
+    def release(self, connection):
+        # Sisa data yang belum dibaca berarti stream tidak sinkron, koneksi tidak bisa dipakai ulang
+        if not connection.reader.buffer:
+            with self.lock:
+                if len(self.idle) < self.max_idle:
+                    self.idle.append(connection)
+                    return
+        connection.close()
+
+    def close(self):
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for connection in idle:
+            connection.close()
+
+
+class AsyncConnection:
+    def __init__(self, stream, writer):
+        self.reader = AsyncReader(stream)
+        self.writer = writer
+        self.reused = False
+
+    def close(self):
+        self.writer.close()
+
+
+# Versi asyncio dari ConnectionPool untuk satu event loop. max_connections membatasi socket yang terbuka
+# bersamaan (0 = tanpa batas), request berikutnya menunggu koneksi yang dikembalikan ke pool.
+# asyncio diimpor di dalam method supaya client blocking (CLI) tidak ikut memuatnya
+class AsyncConnectionPool:
+    def __init__(self, address, max_connections=0, timeout=None):
+        import asyncio
+        self.address = address
+        self.timeout = timeout
+        self.slots = asyncio.Semaphore(max_connections) if max_connections else None
+        self.idle = []
+
+    async def acquire(self):
+        import asyncio
+        if self.slots:
+            await self.slots.acquire()
+        try:
+            while self.idle:
+                connection = self.idle.pop()
+                # Koneksi yang sudah ditutup server selama idle dibuang
+                if not connection.writer.is_closing() and not connection.reader.stream.at_eof():
+                    connection.reused = True
+                    return connection
+                connection.close()
+            stream, writer = await asyncio.wait_for(asyncio.open_connection(*self.address), self.timeout)
+        except BaseException:
+            if self.slots:
+                self.slots.release()
+            raise
+        return AsyncConnection(stream, writer)
+
+    def release(self, connection):
+        if not connection.reader.buffer and not connection.writer.is_closing():
+            self.idle.append(connection)
+        else:
+            connection.close()
+        if self.slots:
+            self.slots.release()
+
+    # Koneksi yang gagal/tidak sinkron ditutup, slotnya dikembalikan
+    def discard(self, connection):
+        connection.close()
+        if self.slots:
+            self.slots.release()
+
+    def close(self):
+        idle, self.idle = self.idle, []
+        for connection in idle:
+            connection.close()